@@ -1,6 +1,6 @@
 from typing import List
 from sqlalchemy.orm import Session
-from sqlalchemy import and_
+from sqlalchemy import and_, insert
 
 from app.database.models import EngagementEvent
 
@@ -11,29 +11,40 @@ class EngagementEventsDataAccess:
     def __init__(self, db: Session):
         self.db = db
 
-    def log_event(self, simulation_id: str, system_id: int, timestamp_s: float, event: str, **event_data) -> None:
-        """Log a simulation event to the database"""
-        
+    @staticmethod
+    def build_event_row(simulation_id: str, system_id: int, timestamp_s: float, event: str, **event_data) -> dict[str, float | int | str | None]:
+        """Build a plain engagement_events row, without materializing an ORM instance"""
         force_applied_n = event_data.get('force_applied_n')
         energy_consumed_j = event_data.get('energy_consumed_j')
         acceleration_mps2 = event_data.get('acceleration_mps2')
 
-        event = EngagementEvent(
-            simulation_id=simulation_id,
-            system_id=system_id,
-            timestamp_s=round(timestamp_s, 4),
-            event=event,
-            coil_id=event_data.get('coil_id'),
-            position_m=event_data.get('position_m'),
-            velocity_mps=event_data.get('velocity_mps'),
-            acceleration_mps2=acceleration_mps2 if acceleration_mps2 is not None else 0,
-            acceleration_duration_s=event_data.get('acceleration_duration_s'),
-            acceleration_segment_length_m=event_data.get('acceleration_segment_length_m'),
-            force_applied_n=force_applied_n if force_applied_n is not None else 0,
-            energy_consumed_j=energy_consumed_j if energy_consumed_j is not None else 0
-        )
-        
-        self.db.add(event)
+        return {
+            "simulation_id": simulation_id,
+            "system_id": system_id,
+            "timestamp_s": round(timestamp_s, 4),
+            "event": event,
+            "coil_id": event_data.get('coil_id'),
+            "position_m": event_data.get('position_m'),
+            "velocity_mps": event_data.get('velocity_mps'),
+            "acceleration_mps2": acceleration_mps2 if acceleration_mps2 is not None else 0,
+            "acceleration_duration_s": event_data.get('acceleration_duration_s'),
+            "acceleration_segment_length_m": event_data.get('acceleration_segment_length_m'),
+            "force_applied_n": force_applied_n if force_applied_n is not None else 0,
+            "energy_consumed_j": energy_consumed_j if energy_consumed_j is not None else 0,
+        }
+
+
+    def log_event(self, simulation_id: str, system_id: int, timestamp_s: float, event: str, **event_data) -> None:
+        """Log a simulation event to the database"""
+        self.bulk_insert_events([self.build_event_row(simulation_id, system_id, timestamp_s, event, **event_data)])
+
+
+    def bulk_insert_events(self, rows: list[dict[str, float | int | str | None]]) -> None:
+        """Insert many event rows with a single executemany INSERT and one commit"""
+        if not rows:
+            return
+
+        self.db.execute(insert(EngagementEvent), rows)
         self.db.commit()
     
         
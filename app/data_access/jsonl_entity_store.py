@@ -0,0 +1,298 @@
+import fcntl
+import json
+import os
+import tempfile
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+
+EntityRecord = dict[str, float | int | str | dict | list]
+
+# Background compaction configuration with environment variable support
+ENTITY_COMPACTION_INTERVAL_S = float(os.getenv("ENTITY_COMPACTION_INTERVAL_S", 300))
+ENTITY_COMPACTION_MIN_DEAD_RATIO = float(os.getenv("ENTITY_COMPACTION_MIN_DEAD_RATIO", 0.5))
+ENTITY_COMPACTION_MIN_DEAD_LINES = int(os.getenv("ENTITY_COMPACTION_MIN_DEAD_LINES", 100))
+
+TOMBSTONE_KEY = "_deleted"
+
+
+@contextmanager
+def entity_file_lock(path: Path):
+    """Exclusive inter-process lock on an entity file, held while appending to it, compacting it or allocating its IDs"""
+    path.parent.mkdir(parents=True, exist_ok=True)
+
+    with open(path.with_name(path.name + ".lock"), "a") as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+class JsonlEntityStore:
+    """
+    Data access class for an append-only JSONL entity file, keeping an in-memory id -> record index.
+
+    Every mutation appends one line: an update appends the full new version of the record and a delete appends
+    a tombstone ({"id": ..., "_deleted": true}), so writes are O(1). The index resolves each id to its latest line.
+    Superseded lines are removed by compact(), which rewrites the file atomically.
+
+    The index is built on first use and kept in sync on every access with a single stat() call:
+    lines appended by other processes are read incrementally from the last indexed byte offset,
+    and a file that was replaced (e.g. compacted by another process) is re-indexed from scratch.
+    """
+
+    def __init__(self, path: Path):
+        self.path = path
+        self._lock = threading.RLock()
+        self._reset()
+
+
+    def refresh(self) -> None:
+        """Bring the index up to date with the file"""
+        with self._lock:
+            try:
+                stat = os.stat(self.path)
+            except FileNotFoundError:
+                self._reset()
+                return
+
+            signature = (stat.st_ino, stat.st_size, stat.st_mtime_ns)
+            if signature == self._signature:
+                return
+
+            appended_only = self._signature is not None and stat.st_ino == self._signature[0] and stat.st_size > self._signature[1]
+            if not appended_only:
+                self._reset()
+
+            self._read_from_offset()
+            self._signature = signature
+
+
+    def _reset(self) -> None:
+        self._records: dict[int, EntityRecord] = {}
+        self._malformed_lines: list[bytes] = []
+        self._line_count = 0
+        self._max_id = 0
+        self._signature: tuple[int, int, int] | None = None
+        self._offset = 0
+
+
+    def _read_from_offset(self) -> None:
+        with open(self.path, "rb") as f:
+            f.seek(self._offset)
+            data = f.read()
+
+        # A concurrent writer may not have finished its last line yet; leave it for the next refresh
+        complete_length = data.rfind(b"\n") + 1
+        for line in data[:complete_length].splitlines():
+            if line.strip():
+                self._index_line(line)
+
+        self._offset += complete_length
+
+
+    def _index_line(self, line: bytes) -> None:
+        try:
+            record = json.loads(line)
+        except json.JSONDecodeError:
+            # kept aside so compaction does not lose them
+            self._malformed_lines.append(line)
+            return
+
+        if not isinstance(record, dict) or not isinstance(record.get("id"), int):
+            self._malformed_lines.append(line)
+            return
+
+        self._line_count += 1
+        self._max_id = max(self._max_id, record["id"])
+        if record.get(TOMBSTONE_KEY):
+            self._records.pop(record["id"], None)
+        else:
+            self._records[record["id"]] = record
+
+
+    @property
+    def dead_line_count(self) -> int:
+        """Lines holding superseded versions or tombstones"""
+        return self._line_count - len(self._records)
+
+
+    def get(self, entity_id: int) -> EntityRecord | None:
+        with self._lock:
+            self.refresh()
+            record = self._records.get(entity_id)
+
+        return dict(record) if record is not None else None
+
+
+    def get_many(self, entity_ids: list[int]) -> dict[int, EntityRecord]:
+        """Resolve many ids against a single refresh of the index. Missing ids are left out."""
+        with self._lock:
+            self.refresh()
+            return {entity_id: dict(self._records[entity_id]) for entity_id in entity_ids if entity_id in self._records}
+
+
+    def all(self) -> list[EntityRecord]:
+        """All live records, in the order they were first written"""
+        with self._lock:
+            self.refresh()
+            return [dict(record) for record in self._records.values()]
+
+
+    def max_id(self) -> int:
+        """Highest id in the file, tombstoned ones included, tracked as lines are indexed"""
+        with self._lock:
+            self.refresh()
+            return self._max_id
+
+
+    def append(self, record: EntityRecord) -> None:
+        with self._lock, entity_file_lock(self.path):
+            self._write_line(record)
+
+
+    def _write_line(self, record: EntityRecord) -> None:
+        """Append the record and index it; the caller holds the file lock"""
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(record) + "\n")
+
+        self.refresh()
+
+
+    def update(self, entity_id: int, changes: EntityRecord) -> EntityRecord | None:
+        """
+        Append a new version of the record with changes applied. Returns the updated record or None if not found.
+        The record is read under the file lock, so a concurrent delete cannot be undone by appending a stale version.
+        """
+        with self._lock, entity_file_lock(self.path):
+            self.refresh()
+            record = self._records.get(entity_id)
+            if record is None:
+                return None
+
+            record = {**record, **changes}
+            self._write_line(record)
+
+            return dict(self._records[entity_id])
+
+
+    def delete(self, entity_id: int) -> bool:
+        """Append a tombstone for the record. Returns False if it was not found."""
+        with self._lock, entity_file_lock(self.path):
+            self.refresh()
+            if entity_id not in self._records:
+                return False
+
+            self._write_line({"id": entity_id, TOMBSTONE_KEY: True})
+
+            return True
+
+
+    def needs_compaction(self) -> bool:
+        with self._lock:
+            self.refresh()
+            dead_line_count = self.dead_line_count
+
+            return dead_line_count >= ENTITY_COMPACTION_MIN_DEAD_LINES and dead_line_count >= ENTITY_COMPACTION_MIN_DEAD_RATIO * self._line_count
+
+
+    def compact(self) -> int:
+        """
+        Rewrite the file with only the latest version of each live record, in first-written order.
+        Uses an atomic write (temp file + replace) to avoid corruption. Returns the number of dropped lines.
+        """
+        with self._lock, entity_file_lock(self.path):
+            self.refresh()
+            if self._signature is None:
+                return 0
+
+            dead_line_count = self.dead_line_count
+
+            with tempfile.NamedTemporaryFile("wb", delete=False, dir=str(self.path.parent)) as tmp:
+                tmp_path = Path(tmp.name)
+                for record in self._records.values():
+                    tmp.write(json.dumps(record, ensure_ascii=False).encode("utf-8") + b"\n")
+
+                # keep malformed lines as-is to avoid data loss
+                for line in self._malformed_lines:
+                    tmp.write(line + b"\n")
+
+            os.replace(tmp_path, self.path)
+            self.refresh()
+
+            return dead_line_count
+
+
+def read_max_id(path: Path) -> int:
+    """
+    Highest id in the entity file, tombstoned ones included, read straight from the file.
+    Takes neither a store's lock nor the file lock, so it can run while the file lock is held.
+    """
+    max_id = 0
+    try:
+        with open(path, "rb") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+
+                if isinstance(record, dict) and isinstance(record.get("id"), int):
+                    max_id = max(max_id, record["id"])
+    except FileNotFoundError:
+        pass
+
+    return max_id
+
+
+_stores: dict[Path, JsonlEntityStore] = {}
+_stores_lock = threading.Lock()
+_compactor_stop: threading.Event | None = None
+
+
+def get_entity_store(path: Path) -> JsonlEntityStore:
+    """Get the process-wide store of an entity file"""
+    with _stores_lock:
+        store = _stores.get(path)
+        if store is None:
+            store = _stores[path] = JsonlEntityStore(path)
+
+    return store
+
+
+def compact_entity_stores() -> None:
+    """Compact every store whose share of dead lines crossed the configured thresholds"""
+    with _stores_lock:
+        stores = list(_stores.values())
+
+    for store in stores:
+        try:
+            if store.needs_compaction():
+                store.compact()
+        except Exception as e:
+            print(f"Entity file compaction failed for {store.path}: {e}")
+
+
+def start_entity_compactor() -> None:
+    """Start the background thread that periodically compacts the entity files"""
+    global _compactor_stop
+
+    if _compactor_stop is not None:
+        return
+
+    stop = _compactor_stop = threading.Event()
+
+    def run():
+        while not stop.wait(ENTITY_COMPACTION_INTERVAL_S):
+            compact_entity_stores()
+
+    threading.Thread(target=run, name="entity-compactor", daemon=True).start()
+
+
+def stop_entity_compactor() -> None:
+    global _compactor_stop
+
+    if _compactor_stop is not None:
+        _compactor_stop.set()
+        _compactor_stop = None
@@ -0,0 +1,23 @@
+from app.domain.entities.segment_table import SegmentTable
+
+
+class CachedSimulation:
+    """
+    Engine output of a simulation run, detached from the entities it was computed for,
+    so any system with the same fingerprint can reuse it.
+
+    Coil IDs are replaced by the coil's rank in ascending position order, starting at 1 (0 or None means no coil),
+    and the engagement event rows carry no simulation or system ID.
+
+    Attributes:
+        segment_table (SegmentTable): Segments of the run, with read-only columns
+        engagement_events (list[dict]): Engagement event rows of the run, in logging order
+    """
+
+    def __init__(self, segment_table: SegmentTable, engagement_events: list[dict[str, float | int | str | None]]):
+        self.segment_table = segment_table
+        self.engagement_events = engagement_events
+
+
+    def __str__(self):
+        return f"CachedSimulation(segments={len(self.segment_table)}, engagement_events={len(self.engagement_events)})"
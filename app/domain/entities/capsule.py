@@ -1,5 +1,5 @@
-import json
 from pathlib import Path
+from app.data_access.jsonl_entity_store import get_entity_store
 
 
 class Capsule:
@@ -23,8 +23,7 @@ class Capsule:
 
 
     def save_to_file(self):
-        with open(self.DATABASE_FILE_PATH, "a", encoding="utf-8") as f:
-            f.write(json.dumps({"id": self.id, "mass": self.mass, "initial_velocity": self.initial_velocity}) + "\n")
+        get_entity_store(self.DATABASE_FILE_PATH).append({"id": self.id, "mass": self.mass, "initial_velocity": self.initial_velocity})
     
 
     def __str__(self):
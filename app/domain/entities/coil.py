@@ -1,5 +1,5 @@
-import json
 from pathlib import Path
+from app.data_access.jsonl_entity_store import get_entity_store
 
 
 class Coil:
@@ -24,8 +24,7 @@ class Coil:
 
 
     def save_to_file(self):
-        with open(self.DATABASE_FILE_PATH, "a", encoding="utf-8") as f:
-             f.write(json.dumps({"id": self.id, "length": self.length, "force_applied": self.force_applied}) + "\n")
+        get_entity_store(self.DATABASE_FILE_PATH).append({"id": self.id, "length": self.length, "force_applied": self.force_applied})
 
 
     def __str__(self):
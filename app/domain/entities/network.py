@@ -0,0 +1,57 @@
+from pathlib import Path
+from app.data_access.jsonl_entity_store import get_entity_store
+from app.domain.services.system_service import get_systems_by_ids
+
+class Network:
+    """
+    Attributes:
+        id (int): Unique identifier for the network
+        connections (list[tuple[int, int]]): Pairs of system IDs (from, to): the end of the first system's tube
+            leads into the beginning of the second one's
+    """
+
+    DATABASE_FILE_PATH = Path(__file__).parent.parent.parent / "data" / "network.jsonl"
+
+    def __init__(self, network_id: int, connections: list[tuple[int, int]], save_to_file: bool = True):
+        self.id = network_id
+        self.connections = connections
+
+        if save_to_file:  # Only validate when creating new networks, not when loading existing ones
+            self.is_network_valid()
+            self.save_to_file()
+
+
+    def save_to_file(self):
+        get_entity_store(self.DATABASE_FILE_PATH).append({"id": self.id, "connections": [list(connection) for connection in self.connections]})
+
+
+    def get_system_ids(self) -> list[int]:
+        """IDs of every system of the network, in order of first appearance"""
+        return list(dict.fromkeys(system_id for connection in self.connections for system_id in connection))
+
+
+    def validate_system_ids(self):
+        systems = get_systems_by_ids(self.get_system_ids())
+
+        for system_id in self.get_system_ids():
+            if system_id not in systems:
+                raise ValueError(f"System with id {system_id} not found")
+
+
+    def validate_route(self, system_ids: list[int]):
+        """A route must start on a system of the network and only follow its connections"""
+        if system_ids[0] not in self.get_system_ids():
+            raise ValueError(f"System {system_ids[0]} is not part of network {self.id}")
+
+        connections = set(self.connections)
+        for from_system_id, to_system_id in zip(system_ids, system_ids[1:]):
+            if (from_system_id, to_system_id) not in connections:
+                raise ValueError(f"Network {self.id} has no connection from system {from_system_id} to system {to_system_id}")
+
+
+    def is_network_valid(self):
+        self.validate_system_ids()
+
+
+    def __str__(self):
+        return f"Network(id={self.id}, connections={self.connections})"
@@ -0,0 +1,71 @@
+import numpy as np
+
+from app.domain.entities.segment_table import SegmentTable
+from app.domain.utils.trajectory_sampling_utils import evaluate_segment_table, get_segment_entry_velocities
+
+
+class SegmentIndex:
+    """
+    Lookup structure over the segments of a run, answering state-at-time and time-at-position queries in batches.
+    Each query is a binary search on the sorted segment start times or start positions, followed by the closed-form
+    equations of the segment found (see evaluate_segment_table).
+
+    Attributes:
+        segment_table (SegmentTable): Segments of the run
+        entry_velocities (np.ndarray): Velocity of the capsule when entering each segment, in m/s
+        end_time (float): Time the capsule reaches the tube's end, in seconds
+        end_position (float): Position of the tube's end, in meters
+    """
+
+    def __init__(self, segment_table: SegmentTable):
+        self.segment_table = segment_table
+        self.entry_velocities = get_segment_entry_velocities(segment_table)
+
+        self.end_time = float(segment_table.start_time[-1] + segment_table.traverse_time[-1])
+        # Runs with coils end on a zero-duration marker row at the tube's end
+        last_length = segment_table.length[-1] if segment_table.traverse_time[-1] > 0 else 0.0
+        self.end_position = float(segment_table.starting_position[-1] + last_length)
+
+
+    def get_state_at_times(self, times: np.ndarray) -> dict[str, np.ndarray]:
+        """Position, velocity, acceleration, force and total energy consumed at each time; NaN outside the run"""
+        times = np.asarray(times, dtype=np.float64)
+
+        state = evaluate_segment_table(self.segment_table, times)
+
+        return self.mask_outside(state, (times < 0) | (times > self.end_time))
+
+
+    def get_state_at_positions(self, positions: np.ndarray) -> dict[str, np.ndarray]:
+        """Time the capsule reaches each position, with its state there; NaN outside the tube"""
+        positions = np.asarray(positions, dtype=np.float64)
+        segment_table = self.segment_table
+
+        rows = np.clip(np.searchsorted(segment_table.starting_position, positions, side="right") - 1, 0, len(segment_table) - 1)
+        distances = np.maximum(positions - segment_table.starting_position[rows], 0)
+
+        # Root of v0·τ + a·τ²/2 = d, in a form that also holds for a = 0 and does not cancel out for small a
+        entry_velocities = self.entry_velocities[rows]
+        elapsed = 2 * distances / (entry_velocities + np.sqrt(np.square(entry_velocities) + 2 * segment_table.acceleration[rows] * distances))
+        elapsed = np.minimum(elapsed, segment_table.traverse_time[rows])
+
+        state = evaluate_segment_table(segment_table, segment_table.start_time[rows] + elapsed)
+        state["position_m"] = positions.copy()
+
+        return self.mask_outside(state, (positions < 0) | (positions > self.end_position))
+
+
+    def mask_outside(self, state: dict[str, np.ndarray], outside: np.ndarray) -> dict[str, np.ndarray]:
+        if outside.any():
+            for values in state.values():
+                values[outside] = np.nan
+
+        return state
+
+
+    def __len__(self) -> int:
+        return len(self.segment_table)
+
+
+    def __str__(self):
+        return f"SegmentIndex(segments={len(self)}, end_time={self.end_time}s, end_position={self.end_position}m)"
@@ -0,0 +1,109 @@
+from enum import IntEnum
+
+import numpy as np
+
+from app.domain.entities.acceleration_segment import AccelerationSegment
+from app.domain.entities.coil import Coil
+from app.domain.entities.segment import Segment
+
+
+class SegmentKind(IntEnum):
+    CONSTANT_VELOCITY = 0
+    ACCELERATION = 1
+
+
+# Coil IDs are always positive, so 0 marks segments that are not related to any coil
+NO_RELATED_COIL_ID = 0
+
+
+class SegmentTable:
+    """
+    Array-backed table of the segments of a simulation run, one typed column per attribute and one row per segment.
+    Replaces a list of Segment objects: rows are ordered by start time, exactly as the segments are traversed.
+
+    Attributes:
+        start_time (np.ndarray): Start time of the capsule within each segment, in seconds
+        traverse_time (np.ndarray): Time taken by the capsule to traverse each segment, in seconds
+        starting_position (np.ndarray): Starting position of each segment relative to the beginning of the tube, in meters
+        length (np.ndarray): Length of each segment, in meters
+        velocity (np.ndarray): Velocity of the capsule at the end of each segment, in m/s
+        acceleration (np.ndarray): Constant acceleration of the capsule in each segment, in m/s²
+        force_applied (np.ndarray): Force applied on the capsule in each segment, in Newtons
+        energy (np.ndarray): Energy consumed in each segment, in Joules
+        related_coil_id (np.ndarray): ID of the coil associated with each segment, NO_RELATED_COIL_ID if none
+        kind (np.ndarray): SegmentKind of each segment
+    """
+
+    COLUMNS: dict[str, type] = {
+        "start_time": np.float64,
+        "traverse_time": np.float64,
+        "starting_position": np.float64,
+        "length": np.float64,
+        "velocity": np.float64,
+        "acceleration": np.float64,
+        "force_applied": np.float64,
+        "energy": np.float64,
+        "related_coil_id": np.int64,
+        "kind": np.int8,
+    }
+
+    def __init__(self, size: int):
+        for name, dtype in self.COLUMNS.items():
+            setattr(self, name, np.zeros(size, dtype=dtype))
+
+
+    @classmethod
+    def from_columns(cls, columns: dict[str, np.ndarray]) -> "SegmentTable":
+        """Build a table around existing column arrays, without copying them"""
+        table = cls.__new__(cls)
+        for name in cls.COLUMNS:
+            setattr(table, name, columns[name])
+
+        return table
+
+
+    @classmethod
+    def from_segments(cls, segments: list[Segment], coils: dict[int, Coil]) -> "SegmentTable":
+        """Build a table from the per-segment objects produced by the reference loop engine"""
+        table = cls(len(segments))
+
+        for row, segment in enumerate(segments):
+            is_accel = isinstance(segment, AccelerationSegment)
+
+            table.start_time[row] = segment.start_time
+            table.traverse_time[row] = segment.traverse_time
+            table.starting_position[row] = segment.starting_position
+            table.length[row] = segment.length
+            table.velocity[row] = segment.final_velocity if is_accel else segment.velocity
+            table.related_coil_id[row] = segment.related_coil_id or NO_RELATED_COIL_ID
+
+            if is_accel:
+                table.acceleration[row] = segment.acceleration
+                table.force_applied[row] = coils[segment.related_coil_id].force_applied
+                table.energy[row] = segment.energy_consumed
+                table.kind[row] = SegmentKind.ACCELERATION
+
+        return table
+
+
+    def __len__(self) -> int:
+        return len(self.start_time)
+
+
+    @property
+    def total_travel_time(self) -> float:
+        return float(self.traverse_time.sum())
+
+
+    @property
+    def final_velocity(self) -> float:
+        return float(self.velocity[-1])
+
+
+    @property
+    def total_energy_consumed(self) -> float:
+        return float(self.energy.sum())
+
+
+    def __str__(self):
+        return f"SegmentTable(segments={len(self)}, total_travel_time={self.total_travel_time}s, final_velocity={self.final_velocity}m/s, total_energy_consumed={self.total_energy_consumed}J)"
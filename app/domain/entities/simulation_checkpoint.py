@@ -0,0 +1,69 @@
+import numpy as np
+
+from app.domain.entities.segment_table import SegmentTable
+
+
+class SimulationCheckpoint:
+    """
+    Last run of a system, kept so the next run of the same system can resume from the first coil that changed.
+
+    Attributes:
+        mass (float): Capsule mass of the run, in kg
+        initial_velocity (float): Capsule initial velocity of the run, in m/s
+        tube_length (float): Tube length of the run, in meters
+        coil_ids (np.ndarray): IDs of the coils, in ascending position order
+        positions (np.ndarray): Position of each coil, in meters
+        lengths (np.ndarray): Length of each coil, in meters
+        forces_applied (np.ndarray): Force applied by each coil, in Newtons
+        segment_table (SegmentTable): Segments of the run
+        engagement_events (list[dict]): Engagement event rows of the run, without simulation or system ID
+        exit_times (np.ndarray): Time the capsule leaves each coil, in seconds
+        exit_velocities (np.ndarray): Velocity of the capsule when leaving each coil, in m/s
+        cumulative_energies (np.ndarray): Total energy consumed when leaving each coil, in Joules
+    """
+
+    def __init__(self, mass: float, initial_velocity: float, tube_length: float, coil_ids: np.ndarray, positions: np.ndarray, lengths: np.ndarray, forces_applied: np.ndarray, segment_table: SegmentTable, engagement_events: list[dict[str, float | int | str | None]]):
+        self.mass = mass
+        self.initial_velocity = initial_velocity
+        self.tube_length = tube_length
+        self.coil_ids = coil_ids
+        self.positions = positions
+        self.lengths = lengths
+        self.forces_applied = forces_applied
+        self.segment_table = segment_table
+        self.engagement_events = engagement_events
+
+        # The constant velocity row after each coil starts exactly when the capsule leaves it
+        const_rows = slice(2, -1, 2)
+        self.exit_times = segment_table.start_time[const_rows]
+        self.exit_velocities = segment_table.velocity[const_rows]
+        self.cumulative_energies = np.cumsum(segment_table.energy[1:-1:2])
+
+
+    def get_resume_coil_index(self, coil_ids: np.ndarray, positions: np.ndarray, lengths: np.ndarray, forces_applied: np.ndarray, mass: float, initial_velocity: float, tube_length: float) -> int:
+        """
+        Index of the first coil (in ascending position order) whose pass differs from the checkpointed run.
+        Everything upstream of it can be reused. 0 means nothing can be reused, len(coil_ids) means nothing changed.
+        """
+        coil_count = len(coil_ids)
+        if coil_count == 0 or len(self.coil_ids) == 0 or mass != self.mass or initial_velocity != self.initial_velocity:
+            return 0
+
+        common_count = min(coil_count, len(self.coil_ids))
+        changed = (
+            (coil_ids[:common_count] != self.coil_ids[:common_count])
+            | (positions[:common_count] != self.positions[:common_count])
+            | (lengths[:common_count] != self.lengths[:common_count])
+            | (forces_applied[:common_count] != self.forces_applied[:common_count])
+        )
+        resume_index = int(np.argmax(changed)) if changed.any() else common_count
+
+        # Removed coils or a new tube length only change the tail, which is recomputed from the last coil
+        if resume_index == coil_count and (coil_count != len(self.coil_ids) or tube_length != self.tube_length):
+            resume_index = coil_count - 1
+
+        return resume_index
+
+
+    def __str__(self):
+        return f"SimulationCheckpoint(coils={len(self.coil_ids)}, segments={len(self.segment_table)})"
@@ -0,0 +1,28 @@
+from sqlalchemy.orm import Session
+
+
+class SimulationContext:
+    """
+    State of a single simulation run. It is passed explicitly through the engine and the event logger,
+    so overlapping runs in different threads or processes never share state.
+
+    Attributes:
+        simulation_id (str): ID of the simulation run
+        system_id (int): ID of the simulated system
+        db (Session): Database session owned by this run
+        engagement_events (list[dict]): Engagement event rows buffered during the run
+    """
+
+    def __init__(self, simulation_id: str, system_id: int, db: Session):
+        self.simulation_id = simulation_id
+        self.system_id = system_id
+        self.db = db
+        self.engagement_events: list[dict[str, float | int | str | None]] = []
+
+
+    def close(self):
+        self.db.close()
+
+
+    def __str__(self):
+        return f"SimulationContext(simulation_id={self.simulation_id}, system_id={self.system_id}, buffered_events={len(self.engagement_events)})"
@@ -0,0 +1,67 @@
+from concurrent.futures import Future
+from datetime import datetime, timezone
+from enum import Enum
+
+from app.domain.schemas.simulation_schemas import ExportFormat
+
+
+class SimulationJobStatus(Enum):
+    PENDING = "pending"
+    RUNNING = "running"
+    COMPLETED = "completed"
+    FAILED = "failed"
+
+
+class SimulationJob:
+    """
+    A simulation submitted to the background worker pool.
+
+    Attributes:
+        id (str): Unique identifier for the job
+        future (Future): Future of the worker call, resolving to the result content and its headers
+        export_format (ExportFormat): Format of the result; JSON results are kept uncompressed and encoded per download
+        compression_level (int, optional): zlib compression level requested at submission, applied when a JSON result is downloaded
+        submitted_at (datetime): Time the job was submitted
+        completed_at (datetime, optional): Time the job finished, successfully or not. None while it is pending or running.
+    """
+
+    def __init__(self, job_id: str, future: Future, export_format: ExportFormat = ExportFormat.JSON, compression_level: int | None = None):
+        self.id = job_id
+        self.future = future
+        self.export_format = export_format
+        self.compression_level = compression_level
+        self.submitted_at = datetime.now(timezone.utc)
+        self.completed_at: datetime | None = None
+
+        future.add_done_callback(self._mark_completed)
+
+
+    def _mark_completed(self, _future: Future):
+        self.completed_at = datetime.now(timezone.utc)
+
+
+    @property
+    def status(self) -> SimulationJobStatus:
+        if not self.future.done():
+            return SimulationJobStatus.RUNNING if self.future.running() else SimulationJobStatus.PENDING
+
+        if self.future.cancelled() or self.future.exception() is not None:
+            return SimulationJobStatus.FAILED
+
+        return SimulationJobStatus.COMPLETED
+
+
+    @property
+    def error(self) -> str | None:
+        if not self.future.done():
+            return None
+
+        if self.future.cancelled():
+            return "Job was cancelled"
+
+        exception = self.future.exception()
+        return str(exception) if exception is not None else None
+
+
+    def __str__(self):
+        return f"SimulationJob(id={self.id}, status={self.status.value}, submitted_at={self.submitted_at})"
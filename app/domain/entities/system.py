@@ -1,9 +1,9 @@
-import json
 from pathlib import Path
+from app.data_access.jsonl_entity_store import get_entity_store
 from app.domain.entities.coil import Coil
 from app.domain.entities.tube import Tube
 from app.domain.entities.capsule import Capsule
-from app.domain.services.coil_service import get_coil_by_id
+from app.domain.services.coil_service import get_coils_by_ids
 from app.domain.services.tube_service import get_tube_by_id
 from app.domain.services.capsule_service import get_capsule_by_id
 
@@ -23,6 +23,7 @@ class System:
         self.tube_id = tube_id
         self.coil_ids_to_positions = coil_ids_to_positions
         self.capsule_id = capsule_id
+        self._coils: dict[int, Coil] | None = None
 
         if save_to_file:  # Only validate when creating new systems, not when loading existing ones
             self.is_system_valid()
@@ -30,16 +31,27 @@ class System:
     
 
     def save_to_file(self):
-        with open(self.DATABASE_FILE_PATH, "a", encoding="utf-8") as f:
-             f.write(json.dumps({"id": self.id, "tube_id": self.tube_id, "coil_ids_to_positions": self.coil_ids_to_positions, "capsule_id": self.capsule_id}) + "\n")
+        get_entity_store(self.DATABASE_FILE_PATH).append({"id": self.id, "tube_id": self.tube_id, "coil_ids_to_positions": self.coil_ids_to_positions, "capsule_id": self.capsule_id})
+
+
+    def get_coils(self) -> dict[int, Coil]:
+        """
+        Resolve all coils of the system in one bulk lookup, keyed by coil ID in coil_ids_to_positions order.
+        The result is kept on the instance so validation, result formatting and the engine share it.
+        """
+        if self._coils is None:
+            self._coils = get_coils_by_ids(list(self.coil_ids_to_positions.keys()))
+
+        return self._coils
 
 
     def validate_coil_ids(self):
         if not Coil.DATABASE_FILE_PATH.exists():
             raise ValueError(f"Coil database file not found")
 
+        coils = self.get_coils()
         for coil_id in self.coil_ids_to_positions.keys():
-            if not get_coil_by_id(coil_id):
+            if coil_id not in coils:
                 raise ValueError(f"Coil with id {coil_id} not found")
 
 
@@ -61,9 +73,10 @@ class System:
 
     def get_coil_ranges(self):
         coil_ranges = []
+        coils = self.get_coils()
         
         for coil_id, position in self.coil_ids_to_positions.items():
-            coil = get_coil_by_id(coil_id)
+            coil = coils.get(coil_id)
             if coil:
                 start = position
                 end = position + coil.length
@@ -74,18 +87,19 @@ class System:
         return coil_ranges
 
 
-    def verify_coil_within_tube_range(self, coil_ranges):
-        tube = get_tube_by_id(self.tube_id)
-
+    @staticmethod
+    def verify_coil_within_tube_range(coil_ranges, tube_length: float):
         for coil_range in coil_ranges:
-            if coil_range[2] > tube.length:
+            if coil_range[2] > tube_length:
                 raise ValueError(f"Coil {coil_range[0]} is out of the tube range.")
 
 
-    def validate_coil_overlaps(self, coil_ranges):
+    @staticmethod
+    def validate_coil_overlaps(coil_ranges):
         """
         Validate that no coils overlap based on their position and length.
         The position + length of one coil should not be within the position + length of another coil.
+        Coil ranges must be sorted by start position.
         """
         for i in range(len(coil_ranges) - 1):
             current_coil_range = coil_ranges[i]
@@ -103,7 +117,7 @@ class System:
 
         coil_ranges = self.get_coil_ranges()
 
-        self.verify_coil_within_tube_range(coil_ranges)
+        self.verify_coil_within_tube_range(coil_ranges, get_tube_by_id(self.tube_id).length)
         self.validate_coil_overlaps(coil_ranges)
 
 
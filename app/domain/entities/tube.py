@@ -1,5 +1,5 @@
-import json
 from pathlib import Path
+from app.data_access.jsonl_entity_store import get_entity_store
 
 
 class Tube:
@@ -20,8 +20,7 @@ class Tube:
     
 
     def save_to_file(self):
-        with open(self.DATABASE_FILE_PATH, "a", encoding="utf-8") as f:
-             f.write(json.dumps({"id": self.id, "length": self.length}) + "\n")
+        get_entity_store(self.DATABASE_FILE_PATH).append({"id": self.id, "length": self.length})
 
 
     def __str__(self):
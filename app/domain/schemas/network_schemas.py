@@ -0,0 +1,61 @@
+from pydantic import BaseModel, Field
+from typing import List
+
+from app.domain.schemas.simulation_schemas import CapsuleData
+
+
+class NetworkConnection(BaseModel):
+    from_system_id: int = Field(gt=0, description="Valid system ID whose tube end leads into the next system")
+    to_system_id: int = Field(gt=0, description="Valid system ID whose tube beginning follows the first system")
+
+
+class NetworkCreate(BaseModel):
+    connections: list[NetworkConnection] = Field(min_length=1, description="List of connections between systems")
+
+
+class NetworkResponse(BaseModel):
+    id: int
+    connections: list[NetworkConnection]
+
+
+class NetworkUpdate(BaseModel):
+    connections: list[NetworkConnection] = Field(min_length=1, description="List of connections between systems")
+
+
+class NetworksListResponse(BaseModel):
+    entities: list[NetworkResponse]
+
+
+class RouteRequest(BaseModel):
+    system_ids: List[int] = Field(min_length=1, description="Systems traversed in order, each connected to the next in the network")
+    capsule: CapsuleData | None = Field(default=None, description="Capsule entering the first system; defaults to the first system's capsule")
+
+
+class NetworkSimulationRequest(BaseModel):
+    routes: List[RouteRequest] = Field(min_length=1, description="Routes to evaluate; tubes shared by several routes are simulated once per entry velocity")
+
+
+class RouteLeg(BaseModel):
+    system_id: int
+    start_time_s: float = Field(description="Time the capsule enters the system's tube, since the start of the route (seconds)")
+    start_position_m: float = Field(description="Distance along the route where the system's tube begins (m)")
+    travel_time_s: float = Field(description="Time to traverse the system's tube (seconds)")
+    entry_velocity_mps: float = Field(description="Velocity entering the tube, the exit velocity of the previous system (m/s)")
+    exit_velocity_mps: float = Field(description="Velocity leaving the tube (m/s)")
+    energy_consumed_j: float = Field(description="Energy consumed in the tube (J)")
+    cached: bool = Field(description="True when the tube's result was reused from the simulation cache")
+
+
+class RouteSimulationResult(BaseModel):
+    system_ids: List[int]
+    capsule: CapsuleData = Field(description="Capsule entering the first system")
+    total_travel_time_s: float = Field(description="Total time to traverse the route (seconds)")
+    final_velocity_mps: float = Field(description="Velocity at the end of the last tube (m/s)")
+    total_energy_consumed_j: float = Field(description="Total energy consumed along the route (J)")
+    legs: List[RouteLeg] = Field(description="One leg per system of the route, in order")
+    segment_table: dict[str, List[float | int]] = Field(description="Segment table columns of the whole route, times and positions measured from the route's start, with the system_id of each row")
+
+
+class NetworkSimulationResult(BaseModel):
+    network_id: int
+    routes: List[RouteSimulationResult] = Field(description="Results in the order of the requested routes")
@@ -1,7 +1,38 @@
+from datetime import datetime
+from enum import Enum
 from pydantic import BaseModel, Field
 from typing import List
 
 
+class SimulationEngine(str, Enum):
+    LOOP = "loop"
+    VECTORIZED = "vectorized"
+
+
+class StreamFormat(str, Enum):
+    JSON = "json"
+    NDJSON = "ndjson"
+
+
+class ContentEncoding(str, Enum):
+    GZIP = "gzip"
+    DEFLATE = "deflate"
+    IDENTITY = "identity"
+
+
+class ExportFormat(str, Enum):
+    JSON = "json"
+    ARROW = "arrow"
+    PARQUET = "parquet"
+    NPZ = "npz"
+
+
+class TrajectoryFormat(str, Enum):
+    POINTS = "points"
+    COLUMNAR = "columnar"
+    QUANTIZED = "quantized"
+
+
 class CoilData(BaseModel):
     length: float = Field(gt=0, description="Length must be positive")
     force_applied: float
@@ -21,6 +52,13 @@ class CompleteFlowRequest(BaseModel):
     tube: TubeData = Field(description="Tube data with length")
     capsule: CapsuleData = Field(description="Capsule data with mass and initial_velocity") 
     coils: List[CoilData] = Field(description="List of coils with their properties and positions")
+    engine: SimulationEngine = Field(default=SimulationEngine.LOOP, description="Simulation engine: 'loop' (per-segment reference) or 'vectorized' (batched NumPy)")
+    stream: bool = Field(default=False, description="Stream the result as it is computed, with trajectories split into columnar chunks")
+    stream_format: StreamFormat = Field(default=StreamFormat.JSON, description="Framing of a streamed result: 'json' (one document) or 'ndjson' (one line per part)")
+    trajectory_format: TrajectoryFormat = Field(default=TrajectoryFormat.POINTS, description="Trajectory layout: 'points' (one object per point), 'columnar' (one shared t_s array plus one array per metric) or 'quantized' (columnar fixed-point integers, time, position and energy delta encoded)")
+    trajectory_quanta: dict[str, float] | None = Field(default=None, description="Quantum of each channel of a quantized trajectory, overriding the defaults, e.g. {\"t_s\": 1e-6}")
+    include_sensitivities: bool = Field(default=False, description="Add the exact derivatives of travel time, final velocity and energy with respect to each coil's force, length and position")
+    export_format: ExportFormat | None = Field(default=None, description="Result format: 'json', or the segment table as 'arrow' (IPC stream), 'parquet' or 'npz'. Unset negotiates it from the Accept header, defaulting to 'json'")
 
 
 class PositionVsTimePoint(BaseModel):
@@ -50,6 +88,26 @@ class TotalEnergyConsumedVsTimePoint(BaseModel):
 
 class SimulationRequest(BaseModel):
     system_id: int = Field(gt=0, description="Valid system ID to run simulation on")
+    engine: SimulationEngine = Field(default=SimulationEngine.LOOP, description="Simulation engine: 'loop' (per-segment reference) or 'vectorized' (batched NumPy)")
+    stream: bool = Field(default=False, description="Stream the result as it is computed, with trajectories split into columnar chunks")
+    stream_format: StreamFormat = Field(default=StreamFormat.JSON, description="Framing of a streamed result: 'json' (one document) or 'ndjson' (one line per part)")
+    trajectory_format: TrajectoryFormat = Field(default=TrajectoryFormat.POINTS, description="Trajectory layout: 'points' (one object per point), 'columnar' (one shared t_s array plus one array per metric) or 'quantized' (columnar fixed-point integers, time, position and energy delta encoded)")
+    trajectory_quanta: dict[str, float] | None = Field(default=None, description="Quantum of each channel of a quantized trajectory, overriding the defaults, e.g. {\"t_s\": 1e-6}")
+    include_sensitivities: bool = Field(default=False, description="Add the exact derivatives of travel time, final velocity and energy with respect to each coil's force, length and position")
+    export_format: ExportFormat | None = Field(default=None, description="Result format: 'json', or the segment table as 'arrow' (IPC stream), 'parquet' or 'npz'. Unset negotiates it from the Accept header, defaulting to 'json'")
+
+
+class OutputSensitivities(BaseModel):
+    total_travel_time_s: float = Field(description="Derivative of the total travel time")
+    final_velocity_mps: float = Field(description="Derivative of the final velocity")
+    total_energy_consumed_j: float = Field(description="Derivative of the total energy consumed")
+
+
+class CoilSensitivity(BaseModel):
+    coil_id: int
+    force_applied: OutputSensitivities = Field(description="Derivatives with respect to the coil's force (per N)")
+    length: OutputSensitivities = Field(description="Derivatives with respect to the coil's length (per m)")
+    position: OutputSensitivities = Field(description="Derivatives with respect to the coil's position (per m)")
 
 
 class SimulationResult(BaseModel):
@@ -64,4 +122,184 @@ class SimulationResult(BaseModel):
     acceleration_vs_time_trajectory: List[AccelerationVsTimePoint] = Field(description="Capsule acceleration vs time trajectory")
     force_applied_vs_time_trajectory: List[ForceAppliedVsTimePoint] = Field(description="Force applied vs time trajectory")
     total_energy_consumed_vs_time_trajectory: List[TotalEnergyConsumedVsTimePoint] = Field(description="Total energy consumed vs time trajectory")
-    coil_engagement_logs: list[dict[str, float | int | str]] = Field(description="Logs of coil engagement")
\ No newline at end of file
+    coil_engagement_logs: list[dict[str, float | int | str]] = Field(description="Logs of coil engagement")
+    sensitivities: List[CoilSensitivity] | None = Field(default=None, description="Per-coil derivatives of the results, in order of position, when requested")
+
+
+class ColumnarTrajectories(BaseModel):
+    t_s: List[float] = Field(description="Time of each point in seconds, shared by every metric")
+    position_m: List[float] = Field(description="Capsule position at each time (m)")
+    velocity_mps: List[float] = Field(description="Capsule velocity at each time (m/s)")
+    acceleration_mps2: List[float] = Field(description="Capsule acceleration at each time (m/s²)")
+    force_applied_n: List[float] = Field(description="Force applied at each time (N)")
+    total_energy_consumed_j: List[float] = Field(description="Total energy consumed up to each time (J)")
+
+
+class QuantizedTrajectories(BaseModel):
+    quanta: dict[str, float] = Field(description="Quantum of each channel: a value is its integer times the quantum")
+    delta_encoded: List[str] = Field(description="Channels holding differences to the previous integer (the first one to 0) instead of the integers")
+    t_s: List[int] = Field(description="Quantized time of each point")
+    position_m: List[int] = Field(description="Quantized capsule position at each time")
+    velocity_mps: List[int] = Field(description="Quantized capsule velocity at each time")
+    acceleration_mps2: List[int] = Field(description="Quantized capsule acceleration at each time")
+    force_applied_n: List[int] = Field(description="Quantized force applied at each time")
+    total_energy_consumed_j: List[int] = Field(description="Quantized total energy consumed up to each time")
+
+
+class SimulationColumnarResult(BaseModel):
+    simulation_id: str
+    system_id: int
+    system_details: dict[str, float | int | str | dict | list] = Field(description="Details of the system")
+    total_travel_time_s: float = Field(ge=0, description="Total time to traverse tube (seconds)")
+    final_velocity_mps: float = Field(ge=0, description="Final velocity at tube end (m/s)")
+    total_energy_consumed_j: float = Field(ge=0, description="Total energy consumed (J)")
+    trajectories: ColumnarTrajectories | QuantizedTrajectories = Field(description="Capsule trajectories, one array per metric")
+    coil_engagement_logs: list[dict[str, float | int | str]] = Field(description="Logs of coil engagement")
+    sensitivities: List[CoilSensitivity] | None = Field(default=None, description="Per-coil derivatives of the results, in order of position, when requested")
+
+
+class SimulationJobResponse(BaseModel):
+    job_id: str
+    status: str = Field(description="pending, running, completed or failed")
+    submitted_at: datetime
+    completed_at: datetime | None = None
+    error: str | None = Field(default=None, description="Error message when the job failed")
+
+
+class SweepRange(BaseModel):
+    values: List[float] | None = Field(default=None, description="Explicit values to sweep, instead of start/stop/num")
+    start: float | None = Field(default=None, description="First value of an evenly spaced range")
+    stop: float | None = Field(default=None, description="Last value of an evenly spaced range (inclusive)")
+    num: int | None = Field(default=None, ge=1, description="Number of values in the evenly spaced range")
+
+
+class CoilForceSweep(BaseModel):
+    coil_index: int = Field(ge=0, description="Index of the coil in the base request's coils list")
+    force_applied: SweepRange = Field(description="Forces to sweep for this coil (N)")
+
+
+class SimulationSweepRequest(BaseModel):
+    base: CompleteFlowRequest = Field(description="Base configuration; swept parameters replace its values")
+    mass: SweepRange | None = Field(default=None, description="Capsule masses to sweep (kg)")
+    initial_velocity: SweepRange | None = Field(default=None, description="Capsule initial velocities to sweep (m/s)")
+    coil_forces: List[CoilForceSweep] = Field(default=[], description="Coil forces to sweep")
+
+
+class SimulationSweepResponse(BaseModel):
+    point_count: int = Field(description="Number of grid points, the cartesian product of all axes")
+    axes: dict[str, List[float]] = Field(description="Values of each parameter axis, in grid order (the last axis varies fastest)")
+    columns: dict[str, List[float | bool | None]] = Field(description="One value per grid point for each parameter and summary metric; metrics are null where the capsule stops inside a coil")
+
+
+class OptimizationCoil(BaseModel):
+    length: float = Field(gt=0, description="Length must be positive")
+    force_applied_min: float = Field(description="Smallest force the coil may apply (N)")
+    force_applied_max: float = Field(description="Largest force the coil may apply (N)")
+    position: float | None = Field(default=None, ge=0, description="Fixed position in the tube, required when positions are not optimized")
+
+
+class SimulationOptimizationRequest(BaseModel):
+    tube: TubeData = Field(description="Tube data with length")
+    capsule: CapsuleData = Field(description="Capsule data with mass and initial_velocity")
+    coils: List[OptimizationCoil] = Field(min_length=1, description="Candidate coils; when positions are optimized they are placed along the tube in this order")
+    optimize_positions: bool = Field(default=True, description="Search the coil positions too, not only their forces")
+    target_travel_time_s: float | None = Field(default=None, gt=0, description="Minimize energy among layouts reaching the tube's end within this time")
+    max_energy_j: float | None = Field(default=None, description="Minimize travel time among layouts consuming at most this energy")
+    iterations: int = Field(default=20, ge=1, description="Number of search iterations")
+    candidates_per_iteration: int = Field(default=2000, ge=10, description="Candidates evaluated at once by the batched engine in each iteration")
+    seed: int | None = Field(default=None, description="Seed of the random search, for reproducible results")
+    max_front_size: int = Field(default=100, ge=1, description="Largest number of Pareto front candidates returned, evenly spread along the front")
+
+
+class OptimizationCandidate(BaseModel):
+    positions: List[float] = Field(description="Position of each coil, in the order of the requested coils (m)")
+    forces_applied: List[float] = Field(description="Force applied by each coil, in the order of the requested coils (N)")
+    total_travel_time_s: float = Field(description="Total time to traverse tube (seconds)")
+    final_velocity_mps: float = Field(description="Final velocity at tube end (m/s)")
+    total_energy_consumed_j: float = Field(description="Total energy consumed (J)")
+
+
+class SimulationOptimizationResult(BaseModel):
+    evaluated_candidates: int = Field(description="Number of candidates evaluated")
+    feasible_candidates: int = Field(description="Candidates reaching the tube's end within the requested time or energy")
+    candidates_per_second: float = Field(description="Evaluation throughput of the search")
+    best: OptimizationCandidate | None = Field(default=None, description="Best feasible candidate, null when none meets the constraint")
+    pareto_front: List[OptimizationCandidate] = Field(description="Candidates no other candidate beats on both travel time and energy, by increasing travel time")
+
+
+class CapsuleBatchRequest(BaseModel):
+    system_id: int = Field(gt=0, description="Valid system ID whose tube and coils every capsule runs through")
+    capsules: List[CapsuleData] = Field(min_length=1, description="Capsules to evaluate, each with its own mass and initial_velocity")
+    include_trajectories: bool = Field(default=False, description="Include the full trajectories of every capsule, not only its summary")
+
+
+class CapsuleBatchItem(BaseModel):
+    mass: float = Field(description="Mass of the capsule (kg)")
+    initial_velocity: float = Field(description="Initial velocity of the capsule (m/s)")
+    completed: bool = Field(description="False when the capsule comes to a stop inside a coil; its metrics are then null")
+    total_travel_time_s: float | None = Field(default=None, description="Total time to traverse tube (seconds)")
+    final_velocity_mps: float | None = Field(default=None, description="Final velocity at tube end (m/s)")
+    total_energy_consumed_j: float | None = Field(default=None, description="Total energy consumed (J)")
+    position_vs_time_trajectory: List[PositionVsTimePoint] | None = Field(default=None, description="Capsule position vs time trajectory")
+    velocity_vs_time_trajectory: List[VelocityVsTimePoint] | None = Field(default=None, description="Capsule velocity vs time trajectory")
+    acceleration_vs_time_trajectory: List[AccelerationVsTimePoint] | None = Field(default=None, description="Capsule acceleration vs time trajectory")
+    force_applied_vs_time_trajectory: List[ForceAppliedVsTimePoint] | None = Field(default=None, description="Force applied vs time trajectory")
+    total_energy_consumed_vs_time_trajectory: List[TotalEnergyConsumedVsTimePoint] | None = Field(default=None, description="Total energy consumed vs time trajectory")
+
+
+class CapsuleBatchResult(BaseModel):
+    system_id: int
+    system_details: dict[str, float | int | str | dict | list] = Field(description="Details of the system; its own capsule is replaced by each capsule of the batch")
+    capsules: List[CapsuleBatchItem] = Field(description="Results in the order of the requested capsules")
+
+
+class TrafficCapsuleData(CapsuleData):
+    launch_time: float = Field(ge=0, description="Time the capsule enters the tube, in seconds since the start of the run")
+
+
+class TrafficSimulationRequest(BaseModel):
+    system_id: int = Field(gt=0, description="Valid system ID whose tube and coils every capsule runs through")
+    capsules: List[TrafficCapsuleData] = Field(min_length=1, description="Capsules to launch, each with its own launch time, mass and initial_velocity")
+    include_trajectories: bool = Field(default=False, description="Include the columnar trajectory of every capsule, on the run's clock")
+
+
+class TrafficCapsuleItem(BaseModel):
+    launch_time_s: float = Field(description="Time the capsule enters the tube (seconds)")
+    mass: float = Field(description="Mass of the capsule (kg)")
+    initial_velocity: float = Field(description="Initial velocity of the capsule (m/s)")
+    arrival_time_s: float = Field(description="Time the capsule reaches the tube's end (seconds)")
+    total_travel_time_s: float = Field(description="Total time to traverse tube (seconds)")
+    final_velocity_mps: float = Field(description="Final velocity at tube end (m/s)")
+    total_energy_consumed_j: float = Field(description="Total energy consumed (J)")
+    minimum_separation_m: float | None = Field(default=None, description="Smallest distance to the capsule launched just before, up to catching up with it (then 0), null when they are never in the tube together")
+    catch_up_time_s: float | None = Field(default=None, description="Time the capsule catches up with the capsule launched just before, null when it does not (seconds)")
+    catch_up_position_m: float | None = Field(default=None, description="Position where the capsule catches up with the capsule launched just before, null when it does not (m)")
+    trajectories: ColumnarTrajectories | None = Field(default=None, description="Columnar trajectory of the capsule, times on the run's clock")
+
+
+class TrafficSeparation(BaseModel):
+    leading_capsule: int = Field(description="Index of the leading capsule in the request")
+    trailing_capsule: int = Field(description="Index of the trailing capsule in the request")
+    separation_m: float = Field(ge=0, description="Smallest distance between the two capsules up to the trailing one catching up, 0 when it does (m)")
+    time_s: float = Field(description="Time the separation is reached, the catch-up time when the trailing capsule catches up (seconds)")
+    position_m: float = Field(description="Position of the trailing capsule at that time (m)")
+    caught_up: bool = Field(description="True when the trailing capsule catches up with the leading one")
+
+
+class TrafficSimulationResult(BaseModel):
+    system_id: int
+    system_details: dict[str, float | int | str | dict | list] = Field(description="Details of the system; its own capsule is replaced by the launched capsules")
+    event_count: int = Field(description="Number of launch, coil enter, midpoint, exit and arrival events processed")
+    minimum_separation: TrafficSeparation | None = Field(default=None, description="Closest approach of any two consecutive capsules (the earliest catch-up when any capsule catches up), null when no two capsules are in the tube together")
+    catch_up_count: int = Field(default=0, description="Number of capsules catching up with the capsule launched just before")
+    minimum_arrival_headway_s: float | None = Field(default=None, description="Smallest time between two consecutive arrivals, null for a single capsule")
+    throughput_capsules_per_s: float | None = Field(default=None, description="Capsules delivered per second between the first launch and the last arrival")
+    capsules: List[TrafficCapsuleItem] = Field(description="Results in the order of the requested capsules")
+
+
+class StateAtTimesRequest(BaseModel):
+    times: List[float] = Field(description="Times to query, in seconds since the start of the run")
+
+
+class StateAtPositionsRequest(BaseModel):
+    positions: List[float] = Field(description="Positions to query, in meters from the beginning of the tube")
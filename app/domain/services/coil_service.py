@@ -1,109 +1,43 @@
+from app.data_access.jsonl_entity_store import get_entity_store
 from app.domain.entities.coil import Coil
-import os, json
-from pathlib import Path
-import tempfile
 
 from app.domain.schemas.system_schemas import CoilPosition
 
 
 def read_all_coils():
-    coils = []
-    try:
-        with open(Coil.DATABASE_FILE_PATH, "r", encoding="utf-8") as f:
-            for line in f:
-                if line.strip():
-                    coils.append(json.loads(line))
-    except FileNotFoundError:
-        pass
-    return coils
+    return get_entity_store(Coil.DATABASE_FILE_PATH).all()
 
 
 def delete_coil_by_id(coil_id: int) -> bool:
-    if not Coil.DATABASE_FILE_PATH.exists():
-        return False
+    return get_entity_store(Coil.DATABASE_FILE_PATH).delete(coil_id)
 
-    found = False
-    lines_to_keep = []
 
-    with open(Coil.DATABASE_FILE_PATH, "r", encoding="utf-8") as f:
-        for line in f:
-            if not line.strip():
-                continue
-            record = json.loads(line)
-            if record.get("id") == coil_id:
-                found = True
-                continue  # skip adding this one
-            lines_to_keep.append(line)
-
-    if found:
-        with open(Coil.DATABASE_FILE_PATH, "w", encoding="utf-8") as f:
-            f.writelines(lines_to_keep)
+def get_coil_by_id(coil_id: int) -> Coil | None:
+    record = get_entity_store(Coil.DATABASE_FILE_PATH).get(coil_id)
+    if record is None:
+        return None
 
-    return found
+    return Coil(coil_id=record["id"], length=record["length"], force_applied=record["force_applied"], save_to_file=False)
 
 
-def get_coil_by_id(coil_id: int) -> Coil | None:
-    if not Coil.DATABASE_FILE_PATH.exists():
-        return None
+def get_coils_by_ids(coil_ids: list[int]) -> dict[int, Coil]:
+    """Resolve many coils in one pass over the index. Coils that are not found are left out."""
+    records = get_entity_store(Coil.DATABASE_FILE_PATH).get_many(coil_ids)
 
-    with open(Coil.DATABASE_FILE_PATH, "r", encoding="utf-8") as f:
-        for line in f:
-            s = line.strip()
-            if not s:
-                continue
-            try:
-                record = json.loads(s)
-            except json.JSONDecodeError:
-                continue
-            if record.get("id") == coil_id:
-                return Coil(coil_id=record["id"], length=record["length"], force_applied=record["force_applied"], save_to_file=False)
-    return None
+    return {
+        coil_id: Coil(coil_id=record["id"], length=record["length"], force_applied=record["force_applied"], save_to_file=False)
+        for coil_id, record in records.items()
+    }
 
 
 def update_coil_by_id(coil_id: int, new_length: float, new_force_applied: float) -> Coil | None:
     """
     Replace the record with id == coil_id. Returns the updated Coil or None if not found.
-    Uses an atomic write (temp file + replace) to avoid corruption.
     """
-    if not Coil.DATABASE_FILE_PATH.exists():
+    updated_record = get_entity_store(Coil.DATABASE_FILE_PATH).update(coil_id, {"length": new_length, "force_applied": new_force_applied})
+    if updated_record is None:
         return None
 
-    found = False
-    updated_record = None
-
-    Coil.DATABASE_FILE_PATH.parent.mkdir(parents=True, exist_ok=True)
-    with tempfile.NamedTemporaryFile("w", delete=False, dir=str(Coil.DATABASE_FILE_PATH.parent), encoding="utf-8") as tmp:
-        tmp_path = Path(tmp.name)
-        with open(Coil.DATABASE_FILE_PATH, "r", encoding="utf-8") as src:
-            for line in src:
-                s = line.strip()
-                if not s:
-                    continue
-                try:
-                    rec = json.loads(s)
-                except json.JSONDecodeError:
-                    # keep malformed lines as-is to avoid data loss
-                    tmp.write(line)
-                    continue
-
-                if rec.get("id") == coil_id:
-                    rec["length"] = new_length
-                    rec["force_applied"] = new_force_applied
-                    found = True
-                    updated_record = rec
-
-                tmp.write(json.dumps(rec, ensure_ascii=False) + "\n")
-
-    if not found:
-        # no change; remove temp file
-        try:
-            tmp_path.unlink(missing_ok=True)
-        finally:
-            return None
-
-    # atomic replace
-    os.replace(tmp_path, Coil.DATABASE_FILE_PATH)
-
     return Coil(coil_id=updated_record["id"], length=updated_record["length"], force_applied=updated_record["force_applied"], save_to_file=False)
 
 
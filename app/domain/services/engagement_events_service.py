@@ -2,36 +2,60 @@ from app.data_access.engagement_events_da import EngagementEventsDataAccess
 from app.database.config import SessionLocal
 from sqlalchemy.orm import Session
 from app.database.models import EngagementEvent
+from app.domain.entities.simulation_context import SimulationContext
 
-_current_simulation_id: str | None = None
-_engagement_events_data_access: EngagementEventsDataAccess | None = None
-_current_system_id: int | None = None
 
-def engagement_event_log(timestamp_s: float, event: str, **kv) -> None:
+def engagement_event_log(context: SimulationContext | None, timestamp_s: float, event: str, **kv) -> None:
     """
-    Log a simulation event to the PostgreSQL database.
+    Buffer a simulation event in the run's context; buffered events are written to PostgreSQL by flush_engagement_events.
     
     Args:
+        context: Context of the run the event belongs to, None to skip logging
         timestamp_s: Time in seconds
         event: Event type/name
         **kv: Additional event data as key-value pairs
     """
-    global _current_system_id, _engagement_events_data_access
-    
-    if not _engagement_events_data_access:
+    if context is None:
         return
     
-    try:
-        _engagement_events_data_access.log_event(
-            simulation_id=_current_simulation_id,
-            system_id=_current_system_id,
+    context.engagement_events.append(
+        EngagementEventsDataAccess.build_event_row(
+            simulation_id=context.simulation_id,
+            system_id=context.system_id,
             timestamp_s=timestamp_s,
             event=event,
             **kv
         )
+    )
+
+
+def replay_engagement_events(context: SimulationContext | None, events: list[dict[str, float | int | str | None]]) -> None:
+    """Buffer events recorded by an earlier run as events of this run"""
+    if context is None:
+        return
+
+    context.engagement_events.extend(
+        {**event, "simulation_id": context.simulation_id, "system_id": context.system_id}
+        for event in events
+    )
+
+
+def flush_engagement_events(context: SimulationContext) -> list[dict[str, float | int | str | None]]:
+    """
+    Write all buffered events of the run with a single bulk insert.
+    Returns the flushed rows so callers can use them without reading them back.
+    """
+    rows = context.engagement_events
+    context.engagement_events = []
+
+    try:
+        EngagementEventsDataAccess(context.db).bulk_insert_events(rows)
     except Exception as e:
+        context.db.rollback()
         print(f"Database logging failed: {e}")
 
+    return rows
+
 
 def get_engagement_events(simulation_id: str, event: str | None = None, coil_id: int | None = None, db: Session | None = None) -> list[EngagementEvent]:
     if db is None:
@@ -44,16 +68,4 @@ def get_engagement_events(simulation_id: str, event: str | None = None, coil_id:
     elif coil_id:
         return engagement_events_data_access.get_events_by_coil_id(simulation_id, coil_id)
     else:
-        return engagement_events_data_access.get_events(simulation_id)
-
-
-def initialize_engagement_events(simulation_id: str, system_id: int) -> EngagementEventsDataAccess:
-    """Create a new log data access instance"""
-    global _engagement_events_data_access, _current_simulation_id
-    
-    db = SessionLocal()
-    _engagement_events_data_access = EngagementEventsDataAccess(db)
-    _current_simulation_id = simulation_id
-    _current_system_id = system_id
-
-    return _engagement_events_data_access
\ No newline at end of file
+        return engagement_events_data_access.get_events(simulation_id)
\ No newline at end of file
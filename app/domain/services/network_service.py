@@ -0,0 +1,58 @@
+from enum import Enum
+from app.data_access.jsonl_entity_store import get_entity_store
+from app.domain.entities.network import Network
+
+from app.domain.schemas.network_schemas import NetworkConnection
+
+
+class UpdateNetworkStatus(Enum):
+    SUCCESS = "success"
+    INVALID_NETWORK = "invalid_network"
+    NOT_FOUND = "not_found"
+
+
+def read_all_networks():
+    return get_entity_store(Network.DATABASE_FILE_PATH).all()
+
+
+def delete_network_by_id(network_id: int) -> bool:
+    return get_entity_store(Network.DATABASE_FILE_PATH).delete(network_id)
+
+
+def get_network_by_id(network_id: int) -> Network | None:
+    record = get_entity_store(Network.DATABASE_FILE_PATH).get(network_id)
+    if record is None:
+        return None
+
+    return Network(network_id=record["id"], connections=[tuple(connection) for connection in record["connections"]], save_to_file=False)
+
+
+def update_network_by_id(network_id: int, new_connections: list[tuple[int, int]]) -> tuple[UpdateNetworkStatus, str | None]:
+    """
+    Replace the record with id == network_id. Returns the update status and, for invalid networks, the validation error.
+    """
+    if get_network_by_id(network_id) is None:
+        return UpdateNetworkStatus.NOT_FOUND, None
+
+    new_network = Network(network_id=network_id, connections=new_connections, save_to_file=False)
+    try:
+        new_network.is_network_valid()
+    except ValueError as e:
+        return UpdateNetworkStatus.INVALID_NETWORK, e.args[0]
+
+    updated_record = get_entity_store(Network.DATABASE_FILE_PATH).update(network_id, {"connections": [list(connection) for connection in new_connections]})
+
+    if updated_record is None:
+        return UpdateNetworkStatus.NOT_FOUND, None
+
+    return UpdateNetworkStatus.SUCCESS, None
+
+
+def convert_network_connections_to_tuples(connections: list[NetworkConnection]) -> list[tuple[int, int]]:
+    """Convert list of NetworkConnection objects to the (from, to) pairs expected by Network entity"""
+    return [(connection.from_system_id, connection.to_system_id) for connection in connections]
+
+
+def convert_tuples_to_network_connections(connections: list[tuple[int, int] | list[int]]) -> list[NetworkConnection]:
+    """Convert (from, to) pairs to list of NetworkConnection objects for API responses"""
+    return [NetworkConnection(from_system_id=from_system_id, to_system_id=to_system_id) for from_system_id, to_system_id in connections]
@@ -0,0 +1,166 @@
+import numpy as np
+
+from app.domain.entities.capsule import Capsule
+from app.domain.entities.coil import Coil
+from app.domain.entities.segment_table import SegmentTable
+from app.domain.entities.simulation_context import SimulationContext
+from app.domain.entities.system import System
+from app.domain.entities.system_coil import SystemCoil
+from app.domain.entities.tube import Tube
+from app.domain.schemas.network_schemas import NetworkSimulationRequest, NetworkSimulationResult, RouteLeg, RouteRequest, RouteSimulationResult
+from app.domain.schemas.simulation_schemas import CapsuleData, SimulationEngine
+from app.domain.services.capsule_service import get_capsules_by_ids
+from app.domain.services.coil_service import get_coils_by_ids
+from app.domain.services.network_service import get_network_by_id
+from app.domain.services.simulation_cache_service import cache_simulation, get_cached_simulation, get_system_fingerprint, restore_cached_segment_table
+from app.domain.services.system_service import get_systems_by_ids
+from app.domain.services.tube_service import get_tubes_by_ids
+from app.domain.utils.vectorized_segments_utils import run_vectorized_segments
+
+
+def run_network_simulation(network_id: int, network_simulation_request: NetworkSimulationRequest) -> NetworkSimulationResult:
+    """
+    Simulate routes through a network of systems connected end to end: the capsule enters each tube with the velocity
+    it left the previous one with. Every system, tube, coil and capsule of the routes is resolved in one bulk lookup
+    per entity file, and each tube runs on the vectorized engine through the simulation cache, so routes sharing a
+    tube at the same entry velocity reuse its result. Nothing is persisted.
+    """
+    network = get_network_by_id(network_id)
+
+    if network is None:
+        raise ValueError(f"Network with id {network_id} not found")
+
+    routes = network_simulation_request.routes
+    for route in routes:
+        network.validate_route(route.system_ids)
+
+    system_ids = list(dict.fromkeys(system_id for route in routes for system_id in route.system_ids))
+    systems = get_systems_by_ids(system_ids)
+    for system_id in system_ids:
+        if system_id not in systems:
+            raise ValueError(f"System with id {system_id} not found")
+
+    tubes = get_tubes_by_ids(list(dict.fromkeys(system.tube_id for system in systems.values())))
+    coils = get_coils_by_ids(list(dict.fromkeys(coil_id for system in systems.values() for coil_id in system.coil_ids_to_positions)))
+    capsules = get_capsules_by_ids(list(dict.fromkeys(systems[route.system_ids[0]].capsule_id for route in routes if route.capsule is None)))
+
+    system_layouts = {system_id: get_system_layout(system, tubes, coils) for system_id, system in systems.items()}
+
+    route_results = []
+    for route in routes:
+        capsule = route.capsule or get_route_capsule(route, systems, capsules)
+        route_results.append(run_route(route.system_ids, capsule, system_layouts))
+
+    return NetworkSimulationResult.model_construct(network_id=network.id, routes=route_results)
+
+
+def get_system_layout(system: System, tubes: dict[int, Tube], coils: dict[int, Coil]) -> tuple[System, Tube, list[SystemCoil]]:
+    """Tube and coils (sorted by ascending position) of a system, from the bulk-resolved entities"""
+    if system.tube_id not in tubes:
+        raise ValueError(f"Tube with id {system.tube_id} not found")
+
+    for coil_id in system.coil_ids_to_positions:
+        if coil_id not in coils:
+            raise ValueError(f"Coil with id {coil_id} not found")
+
+    system_coils = [
+        SystemCoil(coil_id=coil_id, position=position, coil=coils[coil_id])
+        for coil_id, position in sorted(system.coil_ids_to_positions.items(), key=lambda x: x[1])
+    ]
+
+    return system, tubes[system.tube_id], system_coils
+
+
+def get_route_capsule(route: RouteRequest, systems: dict[int, System], capsules: dict[int, Capsule]) -> CapsuleData:
+    capsule_id = systems[route.system_ids[0]].capsule_id
+
+    if capsule_id not in capsules:
+        raise ValueError(f"Capsule with id {capsule_id} not found")
+
+    capsule = capsules[capsule_id]
+
+    return CapsuleData(mass=capsule.mass, initial_velocity=capsule.initial_velocity)
+
+
+def run_route(system_ids: list[int], capsule: CapsuleData, system_layouts: dict[int, tuple[System, Tube, list[SystemCoil]]]) -> RouteSimulationResult:
+    """Run the capsule through each system of the route in turn, and join the tubes' segment tables into one"""
+    velocity = capsule.initial_velocity
+    start_time = start_position = 0.0
+    legs, segment_tables = [], []
+
+    for system_id in system_ids:
+        system, tube, system_coils = system_layouts[system_id]
+        segment_table, cached = simulate_tube(system, tube, system_coils, Capsule(capsule_id=None, mass=capsule.mass, initial_velocity=velocity, save_to_file=False))
+
+        legs.append(RouteLeg.model_construct(
+            system_id=system_id,
+            start_time_s=start_time,
+            start_position_m=start_position,
+            travel_time_s=segment_table.total_travel_time,
+            entry_velocity_mps=velocity,
+            exit_velocity_mps=segment_table.final_velocity,
+            energy_consumed_j=segment_table.total_energy_consumed,
+            cached=cached,
+        ))
+        segment_tables.append(segment_table)
+
+        velocity = segment_table.final_velocity
+        start_time += segment_table.total_travel_time
+        start_position += tube.length
+
+    return RouteSimulationResult.model_construct(
+        system_ids=system_ids,
+        capsule=capsule,
+        total_travel_time_s=start_time,
+        final_velocity_mps=velocity,
+        total_energy_consumed_j=sum(leg.energy_consumed_j for leg in legs),
+        legs=legs,
+        segment_table={name: column.tolist() for name, column in join_segment_tables(legs, segment_tables).items()},
+    )
+
+
+def simulate_tube(system: System, tube: Tube, system_coils: list[SystemCoil], capsule: Capsule) -> tuple[SegmentTable, bool]:
+    """
+    Segment table of the capsule through one tube, from the simulation cache when a run with the same fingerprint
+    exists. Returns the table and whether it was cached. Fresh results are cached with their engagement events,
+    so they serve regular simulation runs of identical systems too.
+    """
+    system_details = {
+        "tube": {"id": tube.id, "length": tube.length},
+        "capsule": {"id": capsule.id, "mass": capsule.mass, "initial_velocity": capsule.initial_velocity},
+        "coils": [
+            {"id": system_coil.coil_id, "length": system_coil.coil.length, "force_applied": system_coil.coil.force_applied, "position": system_coil.position}
+            for system_coil in system_coils
+        ],
+    }
+    fingerprint = get_system_fingerprint(system_details, SimulationEngine.VECTORIZED)
+    coil_ids_by_position = np.array([system_coil.coil_id for system_coil in system_coils], dtype=np.int64)
+
+    cached_simulation = get_cached_simulation(fingerprint)
+    if cached_simulation is not None:
+        return restore_cached_segment_table(cached_simulation, coil_ids_by_position), True
+
+    # A context without a database session: the events are only collected for the cache entry
+    context = SimulationContext(simulation_id=None, system_id=system.id, db=None)
+    segment_table = run_vectorized_segments(context, system_coils, capsule, tube)
+    cache_simulation(fingerprint, segment_table, context.engagement_events, coil_ids_by_position)
+
+    return segment_table, False
+
+
+def join_segment_tables(legs: list[RouteLeg], segment_tables: list[SegmentTable]) -> dict[str, np.ndarray]:
+    """
+    Concatenate the tubes' segment tables, shifting times and positions by where each tube starts on the route.
+    The zero-duration row marking the end of each tube is only kept for the last one.
+    """
+    parts = []
+    for i, (leg, segment_table) in enumerate(zip(legs, segment_tables)):
+        rows = len(segment_table) - 1 if i < len(legs) - 1 and segment_table.traverse_time[-1] == 0 else len(segment_table)
+
+        columns = {name: getattr(segment_table, name)[:rows] for name in SegmentTable.COLUMNS}
+        columns["start_time"] = columns["start_time"] + leg.start_time_s
+        columns["starting_position"] = columns["starting_position"] + leg.start_position_m
+        columns["system_id"] = np.full(rows, leg.system_id, dtype=np.int64)
+        parts.append(columns)
+
+    return {name: np.concatenate([columns[name] for columns in parts]) for name in parts[0]}
@@ -0,0 +1,34 @@
+import os
+import threading
+from collections import OrderedDict
+
+from app.database.models import SimulationRun
+from app.domain.entities.segment_index import SegmentIndex
+from app.domain.services.segments_service import rebuild_segment_table
+
+# Segment index configuration with environment variable support
+SEGMENT_INDEX_CACHE_SIZE = int(os.getenv("SEGMENT_INDEX_CACHE_SIZE", 64))
+
+# Recorded runs never change, so their indexes are kept per process without invalidation
+_segment_indexes: OrderedDict[str, SegmentIndex] = OrderedDict()
+_segment_indexes_lock = threading.Lock()
+
+
+def get_segment_index(simulation_run: SimulationRun) -> SegmentIndex:
+    """Segment index of a recorded run, rebuilt from its system details on first use"""
+    with _segment_indexes_lock:
+        segment_index = _segment_indexes.get(simulation_run.id)
+        if segment_index is not None:
+            _segment_indexes.move_to_end(simulation_run.id)
+            return segment_index
+
+    segment_index = SegmentIndex(rebuild_segment_table(simulation_run.system_details))
+
+    with _segment_indexes_lock:
+        _segment_indexes[simulation_run.id] = segment_index
+        _segment_indexes.move_to_end(simulation_run.id)
+
+        while len(_segment_indexes) > SEGMENT_INDEX_CACHE_SIZE:
+            _segment_indexes.popitem(last=False)
+
+    return segment_index
@@ -1,11 +1,21 @@
+from itertools import islice
+from typing import Iterator
+
 from app.domain.entities.segment import Segment
+from app.domain.entities.segment_table import SegmentTable
+from app.domain.entities.simulation_checkpoint import SimulationCheckpoint
+from app.domain.entities.simulation_context import SimulationContext
 from app.domain.entities.system import System
 from app.domain.services.capsule_service import get_capsule_by_id
 from app.domain.services.system_service import get_system_coils
 from app.domain.entities.coil import Coil
 from app.domain.entities.system_coil import SystemCoil
+from app.domain.entities.capsule import Capsule
+from app.domain.entities.tube import Tube
+from app.domain.schemas.simulation_schemas import SimulationEngine
 from app.domain.services.tube_service import get_tube_by_id
 from app.domain.utils.segments_utils import run_first_segment, run_constant_velocity_segment, run_acceleration_segment, run_last_segment
+from app.domain.utils.vectorized_segments_utils import iter_vectorized_segments, resume_vectorized_segments, run_vectorized_segments
 
 # The tube is treated as being divided into segments based on coil positions.
 # If the tube contains no coils, it is treated as a single constant velocity segment from start to end.
@@ -15,15 +25,52 @@ from app.domain.utils.segments_utils import run_first_segment, run_constant_velo
 #   •	Acceleration segment: From the coil's midpoint to the coil's end, where the capsule accelerates due to the coil's force.
 #   •	Constant velocity segment: From the coil’s end to either the midpoint of the next coil (if it exists) or to the tube’s end (for the last coil).
 
-def run_simulation_and_get_segments(system: System) -> list[Segment]:
+def run_simulation_and_get_segments(system: System, context: SimulationContext | None, engine: SimulationEngine = SimulationEngine.LOOP, checkpoint: SimulationCheckpoint | None = None) -> SegmentTable:
+    """Run the engine on the system. With the vectorized engine, a checkpoint of the system's previous run lets it resume from the first changed coil."""
     capsule = get_capsule_by_id(system.capsule_id)
     system_coils = get_system_coils_by_asc_position(system)
     tube = get_tube_by_id(system.tube_id)
 
-    segments = []
+    if engine == SimulationEngine.VECTORIZED:
+        if checkpoint is not None:
+            return resume_vectorized_segments(context, system_coils, capsule, tube, checkpoint)
+
+        return run_vectorized_segments(context, system_coils, capsule, tube)
+
+    segments = run_loop_segments(context, system_coils, capsule, tube)
+
+    return SegmentTable.from_segments(segments, {system_coil.coil_id: system_coil.coil for system_coil in system_coils})
+
+
+def iter_simulation_segment_tables(system: System, context: SimulationContext | None, engine: SimulationEngine, chunk_size: int) -> Iterator[SegmentTable]:
+    """
+    Run the engine on the system, yielding its segments in tables of chunk_size coils each as the run progresses,
+    so the whole run never has to be held in memory.
+    """
+    capsule = get_capsule_by_id(system.capsule_id)
+    system_coils = get_system_coils_by_asc_position(system)
+    tube = get_tube_by_id(system.tube_id)
 
-    first_segment = run_first_segment(system_coils, capsule, tube)
-    segments.append(first_segment)
+    if engine == SimulationEngine.VECTORIZED:
+        yield from iter_vectorized_segments(context, system_coils, capsule, tube, chunk_size)
+        return
+
+    coils = {system_coil.coil_id: system_coil.coil for system_coil in system_coils}
+    segments = iter_loop_segments(context, system_coils, capsule, tube)
+
+    # Each coil contributes two segments
+    while chunk := list(islice(segments, 2 * chunk_size)):
+        yield SegmentTable.from_segments(chunk, coils)
+
+
+def run_loop_segments(context: SimulationContext | None, system_coils: list[SystemCoil], capsule: Capsule, tube: Tube) -> list[Segment]:
+    """Reference engine: walks the coils one at a time, building one segment per step"""
+    return list(iter_loop_segments(context, system_coils, capsule, tube))
+
+
+def iter_loop_segments(context: SimulationContext | None, system_coils: list[SystemCoil], capsule: Capsule, tube: Tube) -> Iterator[Segment]:
+    first_segment = run_first_segment(context, system_coils, capsule, tube)
+    yield first_segment
 
     time_so_far = first_segment.traverse_time
     current_velocity = capsule.initial_velocity
@@ -32,13 +79,14 @@ def run_simulation_and_get_segments(system: System) -> list[Segment]:
     for i, coil in enumerate(system_coils):
         # 1) Acceleration segment
         accel_seg = run_acceleration_segment(
+            context,
             coil, 
             capsule, 
             current_velocity, 
             time_so_far, 
             seg_index
         )
-        segments.append(accel_seg)
+        yield accel_seg
 
         time_so_far += accel_seg.traverse_time
         current_velocity = accel_seg.final_velocity
@@ -47,6 +95,7 @@ def run_simulation_and_get_segments(system: System) -> list[Segment]:
         # 2) Constant-velocity segment
         next_coil = system_coils[i + 1] if i + 1 < len(system_coils) else None
         const_seg = run_constant_velocity_segment(
+            context,
             coil, 
             next_coil,
             tube,
@@ -55,16 +104,36 @@ def run_simulation_and_get_segments(system: System) -> list[Segment]:
             seg_index
         )
 
-        segments.append(const_seg)
+        yield const_seg
 
         time_so_far += const_seg.traverse_time
         seg_index += 1
 
     if len(system_coils) > 0:
-        last_segment = run_last_segment(system_coils[-1], tube, current_velocity, time_so_far, seg_index)
-        segments.append(last_segment)
+        yield run_last_segment(context, system_coils[-1], tube, current_velocity, time_so_far, seg_index)
+
+
+def rebuild_segment_table(system_details: dict[str, float | int | str | dict | list]) -> SegmentTable:
+    """
+    Recompute the segment table of a recorded run from the system details stored with it, without logging events.
+    The vectorized engine is used whatever engine ran originally; both agree up to floating point rounding.
+    """
+    tube = Tube(tube_id=system_details["tube"]["id"], length=system_details["tube"]["length"], save_to_file=False)
+    capsule = Capsule(
+        capsule_id=system_details["capsule"]["id"],
+        mass=system_details["capsule"]["mass"],
+        initial_velocity=system_details["capsule"]["initial_velocity"],
+        save_to_file=False,
+    )
+    system_coils = sorted(
+        (
+            SystemCoil(coil_id=coil["id"], position=coil["position"], coil=Coil(coil_id=coil["id"], length=coil["length"], force_applied=coil["force_applied"], save_to_file=False))
+            for coil in system_details["coils"]
+        ),
+        key=lambda system_coil: system_coil.position,
+    )
 
-    return segments
+    return run_vectorized_segments(None, system_coils, capsule, tube)
 
 
 def get_system_coils_by_asc_position(system: System) -> list[SystemCoil]:
@@ -0,0 +1,69 @@
+import numpy as np
+
+from app.domain.entities.segment_table import SegmentTable
+from app.domain.schemas.simulation_schemas import CapsuleBatchItem, CapsuleBatchRequest, CapsuleBatchResult
+from app.domain.services.segments_service import get_system_coils_by_asc_position
+from app.domain.services.simulation_service import format_system_details, get_simulation_results
+from app.domain.services.system_service import get_system_by_id
+from app.domain.services.tube_service import get_tube_by_id
+from app.domain.utils.vectorized_segments_utils import build_batch_segment_columns, compute_batch_coil_pass_arrays, get_coil_arrays
+
+
+def run_capsule_batch(capsule_batch_request: CapsuleBatchRequest) -> CapsuleBatchResult:
+    """
+    Run every capsule of the batch through the same system at once: the per-coil math is broadcast across capsules,
+    one row per capsule. Nothing is persisted, since the capsules are not entities of the system.
+    """
+    system = get_system_by_id(capsule_batch_request.system_id)
+
+    if system is None:
+        raise ValueError(f"System with id {capsule_batch_request.system_id} not found")
+
+    tube = get_tube_by_id(system.tube_id)
+    coil_ids, positions, lengths, forces_applied = get_coil_arrays(get_system_coils_by_asc_position(system))
+
+    capsules = capsule_batch_request.capsules
+    masses = np.array([capsule.mass for capsule in capsules], dtype=np.float64)
+    initial_velocities = np.array([capsule.initial_velocity for capsule in capsules], dtype=np.float64)
+
+    batch = compute_batch_coil_pass_arrays(positions, lengths, forces_applied, masses, initial_velocities, tube.length)
+    columns = build_batch_segment_columns(coil_ids, batch, tube) if capsule_batch_request.include_trajectories else None
+
+    completed = batch["completed"].tolist()
+    total_travel_times = batch["total_travel_times"].tolist()
+    final_velocities = batch["final_velocities"].tolist()
+    total_energies_consumed = batch["total_energies_consumed"].tolist()
+
+    items = []
+    for i, capsule in enumerate(capsules):
+        if not completed[i]:
+            items.append(CapsuleBatchItem.model_construct(mass=capsule.mass, initial_velocity=capsule.initial_velocity, completed=False))
+            continue
+
+        item = CapsuleBatchItem.model_construct(
+            mass=capsule.mass,
+            initial_velocity=capsule.initial_velocity,
+            completed=True,
+            total_travel_time_s=total_travel_times[i],
+            final_velocity_mps=final_velocities[i],
+            total_energy_consumed_j=total_energies_consumed[i],
+        )
+
+        if columns is not None:
+            segment_table = SegmentTable.from_columns({name: column[i] for name, column in columns.items()})
+            (
+                item.position_vs_time_trajectory,
+                item.velocity_vs_time_trajectory,
+                item.acceleration_vs_time_trajectory,
+                item.force_applied_vs_time_trajectory,
+                item.total_energy_consumed_vs_time_trajectory,
+                *_,
+            ) = get_simulation_results(segment_table)
+
+        items.append(item)
+
+    return CapsuleBatchResult.model_construct(
+        system_id=system.id,
+        system_details=format_system_details(system),
+        capsules=items,
+    )
@@ -0,0 +1,194 @@
+import hashlib
+import json
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+from pathlib import Path
+
+import numpy as np
+
+from app.domain.entities.cached_simulation import CachedSimulation
+from app.domain.entities.segment_table import NO_RELATED_COIL_ID, SegmentTable
+from app.domain.entities.simulation_context import SimulationContext
+from app.domain.schemas.simulation_schemas import SimulationEngine
+
+# Result cache configuration with environment variable support
+SIMULATION_CACHE_SIZE = int(os.getenv("SIMULATION_CACHE_SIZE", 256))
+SIMULATION_CACHE_DIR = os.getenv("SIMULATION_CACHE_DIR")  # unset keeps the cache in memory only
+
+# Each process (API or worker) keeps its own LRU; SIMULATION_CACHE_DIR is shared between them
+_cache: OrderedDict[str, CachedSimulation] = OrderedDict()
+_cache_lock = threading.Lock()
+
+EVENT_ID_FIELDS = ("simulation_id", "system_id")
+
+
+def get_system_fingerprint(system_details: dict[str, float | int | str | dict | list], engine: SimulationEngine) -> str:
+    """
+    Canonical hash of everything that determines a run's physics: tube length, capsule mass and velocity,
+    and each coil's length, force and position in ascending position order. Entity IDs are left out.
+    """
+    canonical = {
+        "engine": engine.value,
+        "tube_length": float(system_details["tube"]["length"]),
+        "capsule": [float(system_details["capsule"]["mass"]), float(system_details["capsule"]["initial_velocity"])],
+        "coils": sorted(
+            [float(coil["position"]), float(coil["length"]), float(coil["force_applied"])]
+            for coil in system_details["coils"]
+        ),
+    }
+
+    return hashlib.sha256(json.dumps(canonical, separators=(",", ":")).encode("utf-8")).hexdigest()
+
+
+def get_coil_ids_by_position(system_details: dict[str, float | int | str | dict | list]) -> np.ndarray:
+    coils = sorted(system_details["coils"], key=lambda coil: coil["position"])
+    return np.array([coil["id"] for coil in coils], dtype=np.int64)
+
+
+def get_cached_simulation(fingerprint: str) -> CachedSimulation | None:
+    with _cache_lock:
+        cached_simulation = _cache.get(fingerprint)
+        if cached_simulation is not None:
+            _cache.move_to_end(fingerprint)
+            return cached_simulation
+
+    cached_simulation = read_cached_simulation(fingerprint)
+    if cached_simulation is not None:
+        remember_cached_simulation(fingerprint, cached_simulation)
+
+    return cached_simulation
+
+
+def cache_simulation(fingerprint: str, segment_table: SegmentTable, engagement_events: list[dict[str, float | int | str | None]], coil_ids_by_position: np.ndarray) -> None:
+    cached_simulation = to_cached_simulation(segment_table, engagement_events, coil_ids_by_position)
+
+    remember_cached_simulation(fingerprint, cached_simulation)
+
+    try:
+        write_cached_simulation(fingerprint, cached_simulation)
+    except OSError as e:
+        print(f"Failed to persist cached simulation {fingerprint}: {e}")
+
+
+def remember_cached_simulation(fingerprint: str, cached_simulation: CachedSimulation) -> None:
+    with _cache_lock:
+        _cache[fingerprint] = cached_simulation
+        _cache.move_to_end(fingerprint)
+
+        while len(_cache) > SIMULATION_CACHE_SIZE:
+            _cache.popitem(last=False)
+
+
+def to_cached_simulation(segment_table: SegmentTable, engagement_events: list[dict[str, float | int | str | None]], coil_ids_by_position: np.ndarray) -> CachedSimulation:
+    """Detach a run's output from its entity IDs"""
+    coil_ranks = {int(coil_id): rank for rank, coil_id in enumerate(coil_ids_by_position.tolist(), start=1)}
+
+    columns = {name: getattr(segment_table, name).copy() for name in SegmentTable.COLUMNS}
+    columns["related_coil_id"] = np.array(
+        [coil_ranks.get(coil_id, NO_RELATED_COIL_ID) for coil_id in segment_table.related_coil_id.tolist()],
+        dtype=np.int64,
+    )
+    for column in columns.values():
+        column.flags.writeable = False
+
+    events = []
+    for row in engagement_events:
+        event = {field: value for field, value in row.items() if field not in EVENT_ID_FIELDS}
+        event["coil_id"] = coil_ranks.get(row["coil_id"]) if row["coil_id"] is not None else None
+        events.append(event)
+
+    return CachedSimulation(SegmentTable.from_columns(columns), events)
+
+
+def restore_cached_simulation(cached_simulation: CachedSimulation, context: SimulationContext, coil_ids_by_position: np.ndarray) -> SegmentTable:
+    """
+    Map a cached run back onto the coils of the simulated system.
+    Fills the context's engagement events and returns the segment table; unchanged columns are shared, not copied.
+    """
+    coil_ids = coil_ids_by_position.tolist()
+    context.engagement_events = [
+        {
+            **event,
+            "simulation_id": context.simulation_id,
+            "system_id": context.system_id,
+            "coil_id": coil_ids[event["coil_id"] - 1] if event["coil_id"] else None,
+        }
+        for event in cached_simulation.engagement_events
+    ]
+
+    return restore_cached_segment_table(cached_simulation, coil_ids_by_position)
+
+
+def restore_cached_segment_table(cached_simulation: CachedSimulation, coil_ids_by_position: np.ndarray) -> SegmentTable:
+    """Segment table of a cached run with the coils of the simulated system; unchanged columns are shared, not copied"""
+    columns = {name: getattr(cached_simulation.segment_table, name) for name in SegmentTable.COLUMNS}
+    # rank 0 (no coil) maps to NO_RELATED_COIL_ID
+    columns["related_coil_id"] = np.concatenate(([NO_RELATED_COIL_ID], coil_ids_by_position))[columns["related_coil_id"]]
+
+    return SegmentTable.from_columns(columns)
+
+
+def get_cache_file_path(fingerprint: str) -> Path | None:
+    if not SIMULATION_CACHE_DIR:
+        return None
+
+    return Path(SIMULATION_CACHE_DIR) / f"{fingerprint}.npz"
+
+
+def read_cached_simulation(fingerprint: str) -> CachedSimulation | None:
+    path = get_cache_file_path(fingerprint)
+    if path is None:
+        return None
+
+    simulation_file = read_simulation_file(path)
+    if simulation_file is None:
+        return None
+
+    arrays, engagement_events = simulation_file
+    return CachedSimulation(SegmentTable.from_columns(arrays), engagement_events)
+
+
+def write_cached_simulation(fingerprint: str, cached_simulation: CachedSimulation) -> None:
+    path = get_cache_file_path(fingerprint)
+    if path is None:
+        return
+
+    arrays = {name: getattr(cached_simulation.segment_table, name) for name in SegmentTable.COLUMNS}
+    write_simulation_file(path, arrays, cached_simulation.engagement_events)
+
+
+def read_simulation_file(path: Path) -> tuple[dict[str, np.ndarray], list[dict[str, float | int | str | None]]] | None:
+    """Read the arrays and engagement events of a persisted run. Arrays are returned read-only."""
+    if not path.exists():
+        return None
+
+    try:
+        with np.load(path, allow_pickle=False) as data:
+            arrays = {name: data[name] for name in data.files if name != "engagement_events"}
+            engagement_events = json.loads(str(data["engagement_events"]))
+    except (OSError, KeyError, ValueError) as e:
+        print(f"Failed to read simulation file {path}: {e}")
+        return None
+
+    for array in arrays.values():
+        array.flags.writeable = False
+
+    return arrays, engagement_events
+
+
+def write_simulation_file(path: Path, arrays: dict[str, np.ndarray], engagement_events: list[dict[str, float | int | str | None]]) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+
+    # atomic write (temp file + replace), so concurrent readers never see a partial file
+    with tempfile.NamedTemporaryFile("wb", delete=False, dir=str(path.parent), suffix=".npz") as tmp:
+        np.savez(tmp, engagement_events=np.array(json.dumps(engagement_events)), **arrays)
+
+    os.replace(tmp.name, path)
+
+
+def clear_simulation_cache() -> None:
+    """Forget the in-memory entries; persisted entries are left on disk"""
+    with _cache_lock:
+        _cache.clear()
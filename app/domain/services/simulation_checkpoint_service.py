@@ -0,0 +1,116 @@
+import os
+import threading
+from collections import OrderedDict
+from pathlib import Path
+
+import numpy as np
+
+from app.domain.entities.segment_table import SegmentTable
+from app.domain.entities.simulation_checkpoint import SimulationCheckpoint
+from app.domain.services.simulation_cache_service import SIMULATION_CACHE_DIR, EVENT_ID_FIELDS, read_simulation_file, write_simulation_file
+
+# Checkpoint configuration with environment variable support
+SIMULATION_CHECKPOINT_SIZE = int(os.getenv("SIMULATION_CHECKPOINT_SIZE", 256))
+
+# Like the result cache, checkpoints live in each process's memory and are shared through SIMULATION_CACHE_DIR
+_checkpoints: OrderedDict[int, SimulationCheckpoint] = OrderedDict()
+_checkpoints_lock = threading.Lock()
+
+
+def get_simulation_checkpoint(system_id: int) -> SimulationCheckpoint | None:
+    with _checkpoints_lock:
+        checkpoint = _checkpoints.get(system_id)
+        if checkpoint is not None:
+            _checkpoints.move_to_end(system_id)
+            return checkpoint
+
+    checkpoint = read_simulation_checkpoint(system_id)
+    if checkpoint is not None:
+        remember_simulation_checkpoint(system_id, checkpoint)
+
+    return checkpoint
+
+
+def save_simulation_checkpoint(system_id: int, system_details: dict[str, float | int | str | dict | list], segment_table: SegmentTable, engagement_events: list[dict[str, float | int | str | None]]) -> None:
+    """Checkpoint a finished run as the latest run of the system"""
+    coils = sorted(system_details["coils"], key=lambda coil: coil["position"])
+
+    checkpoint = SimulationCheckpoint(
+        mass=float(system_details["capsule"]["mass"]),
+        initial_velocity=float(system_details["capsule"]["initial_velocity"]),
+        tube_length=float(system_details["tube"]["length"]),
+        coil_ids=np.array([coil["id"] for coil in coils], dtype=np.int64),
+        positions=np.array([coil["position"] for coil in coils], dtype=np.float64),
+        lengths=np.array([coil["length"] for coil in coils], dtype=np.float64),
+        forces_applied=np.array([coil["force_applied"] for coil in coils], dtype=np.float64),
+        segment_table=segment_table,
+        engagement_events=[
+            {field: value for field, value in event.items() if field not in EVENT_ID_FIELDS}
+            for event in engagement_events
+        ],
+    )
+
+    remember_simulation_checkpoint(system_id, checkpoint)
+
+    try:
+        write_simulation_checkpoint(system_id, checkpoint)
+    except OSError as e:
+        print(f"Failed to persist simulation checkpoint of system {system_id}: {e}")
+
+
+def remember_simulation_checkpoint(system_id: int, checkpoint: SimulationCheckpoint) -> None:
+    with _checkpoints_lock:
+        _checkpoints[system_id] = checkpoint
+        _checkpoints.move_to_end(system_id)
+
+        while len(_checkpoints) > SIMULATION_CHECKPOINT_SIZE:
+            _checkpoints.popitem(last=False)
+
+
+def get_checkpoint_file_path(system_id: int) -> Path | None:
+    if not SIMULATION_CACHE_DIR:
+        return None
+
+    return Path(SIMULATION_CACHE_DIR) / "checkpoints" / f"system_{system_id}.npz"
+
+
+def read_simulation_checkpoint(system_id: int) -> SimulationCheckpoint | None:
+    path = get_checkpoint_file_path(system_id)
+    if path is None:
+        return None
+
+    simulation_file = read_simulation_file(path)
+    if simulation_file is None:
+        return None
+
+    arrays, engagement_events = simulation_file
+    mass, initial_velocity, tube_length = arrays["run_parameters"].tolist()
+
+    return SimulationCheckpoint(
+        mass=mass,
+        initial_velocity=initial_velocity,
+        tube_length=tube_length,
+        coil_ids=arrays["coil_ids"],
+        positions=arrays["coil_positions"],
+        lengths=arrays["coil_lengths"],
+        forces_applied=arrays["coil_forces_applied"],
+        segment_table=SegmentTable.from_columns(arrays),
+        engagement_events=engagement_events,
+    )
+
+
+def write_simulation_checkpoint(system_id: int, checkpoint: SimulationCheckpoint) -> None:
+    path = get_checkpoint_file_path(system_id)
+    if path is None:
+        return
+
+    arrays = {name: getattr(checkpoint.segment_table, name) for name in SegmentTable.COLUMNS}
+    arrays.update({
+        "run_parameters": np.array([checkpoint.mass, checkpoint.initial_velocity, checkpoint.tube_length]),
+        "coil_ids": checkpoint.coil_ids,
+        "coil_positions": checkpoint.positions,
+        "coil_lengths": checkpoint.lengths,
+        "coil_forces_applied": checkpoint.forces_applied,
+    })
+
+    write_simulation_file(path, arrays, checkpoint.engagement_events)
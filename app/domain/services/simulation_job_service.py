@@ -0,0 +1,162 @@
+import multiprocessing
+import os
+import threading
+import uuid
+from concurrent.futures import Future, ProcessPoolExecutor
+from datetime import datetime, timedelta, timezone
+
+from app.domain.entities.simulation_job import SimulationJob
+import numpy as np
+
+from app.domain.schemas.network_schemas import NetworkSimulationRequest
+from app.domain.schemas.simulation_schemas import CapsuleBatchRequest, CompleteFlowRequest, ContentEncoding, ExportFormat, SimulationOptimizationRequest, SimulationRequest, SimulationSweepRequest, TrafficSimulationRequest
+from app.domain.services.network_simulation_service import run_network_simulation
+from app.domain.services.simulation_batch_service import run_capsule_batch
+from app.domain.services.simulation_optimization_service import run_simulation_optimization
+from app.domain.services.simulation_service import create_all_simulation_entities, export_simulation, export_simulation_by_system_id, run_simulation, run_simulation_by_system_id
+from app.domain.services.simulation_sweep_service import execute_sweep_chunk
+from app.domain.services.traffic_simulation_service import run_traffic_simulation
+from app.domain.utils.compress_json import compress_json
+
+# Worker pool configuration with environment variable support
+SIMULATION_WORKERS = int(os.getenv("SIMULATION_WORKERS", os.cpu_count() or 1))
+SIMULATION_JOB_TTL_S = int(os.getenv("SIMULATION_JOB_TTL_S", 3600))
+
+# Jobs are tracked in the memory of the API process that accepted them
+_jobs: dict[str, SimulationJob] = {}
+_jobs_lock = threading.Lock()
+_executor: ProcessPoolExecutor | None = None
+
+
+def execute_simulation_job(simulation_request: SimulationRequest, export_format: ExportFormat = ExportFormat.JSON, encoding: ContentEncoding | None = None, compression_level: int | None = None) -> tuple[bytes, dict]:
+    """Worker entry point: run the simulation and compress or export its result inside the worker process"""
+    if export_format != ExportFormat.JSON:
+        return export_simulation_by_system_id(simulation_request.system_id, simulation_request.engine, export_format)
+
+    simulation_response = run_simulation_by_system_id(simulation_request.system_id, simulation_request.engine, simulation_request.trajectory_format, simulation_request.trajectory_quanta, simulation_request.include_sensitivities)
+
+    return compress_json(simulation_response, encoding, compression_level)
+
+
+def execute_complete_flow_job(complete_flow_request: CompleteFlowRequest, export_format: ExportFormat = ExportFormat.JSON, encoding: ContentEncoding | None = None, compression_level: int | None = None) -> tuple[bytes, dict]:
+    """Worker entry point: create all entities of the request, then run and compress or export the simulation"""
+    system = create_all_simulation_entities(complete_flow_request)
+
+    if export_format != ExportFormat.JSON:
+        return export_simulation(system, complete_flow_request.engine, export_format)
+
+    simulation_response = run_simulation(system, complete_flow_request.engine, complete_flow_request.trajectory_format, complete_flow_request.trajectory_quanta, complete_flow_request.include_sensitivities)
+
+    return compress_json(simulation_response, encoding, compression_level)
+
+
+def execute_capsule_batch_job(capsule_batch_request: CapsuleBatchRequest, encoding: ContentEncoding | None = None, compression_level: int | None = None) -> tuple[bytes, dict]:
+    """Worker entry point: run and compress a capsule batch"""
+    return compress_json(run_capsule_batch(capsule_batch_request), encoding, compression_level)
+
+
+def execute_traffic_simulation_job(traffic_simulation_request: TrafficSimulationRequest, encoding: ContentEncoding | None = None, compression_level: int | None = None) -> tuple[bytes, dict]:
+    """Worker entry point: run and compress a traffic simulation"""
+    return compress_json(run_traffic_simulation(traffic_simulation_request), encoding, compression_level)
+
+
+def execute_network_simulation_job(network_id: int, network_simulation_request: NetworkSimulationRequest, encoding: ContentEncoding | None = None, compression_level: int | None = None) -> tuple[bytes, dict]:
+    """Worker entry point: run and compress the routes of a network simulation"""
+    return compress_json(run_network_simulation(network_id, network_simulation_request), encoding, compression_level)
+
+
+def execute_simulation_optimization_job(optimization_request: SimulationOptimizationRequest, encoding: ContentEncoding | None = None, compression_level: int | None = None) -> tuple[bytes, dict]:
+    """Worker entry point: run and compress a coil layout optimization"""
+    return compress_json(run_simulation_optimization(optimization_request), encoding, compression_level)
+
+
+def get_simulation_job_pool() -> ProcessPoolExecutor:
+    global _executor
+
+    with _jobs_lock:
+        if _executor is None:
+            # Spawned workers build their own database engine instead of inheriting the parent's connections
+            _executor = ProcessPoolExecutor(max_workers=SIMULATION_WORKERS, mp_context=multiprocessing.get_context("spawn"))
+
+    return _executor
+
+
+def shutdown_simulation_job_pool() -> None:
+    global _executor
+
+    with _jobs_lock:
+        if _executor is not None:
+            _executor.shutdown(wait=False, cancel_futures=True)
+            _executor = None
+
+
+def submit_simulation_run(simulation_request: SimulationRequest, export_format: ExportFormat = ExportFormat.JSON, encoding: ContentEncoding | None = None, compression_level: int | None = None) -> Future:
+    """Run a simulation on the worker pool for a caller awaiting it; untracked, so nothing outlives the request"""
+    return get_simulation_job_pool().submit(execute_simulation_job, simulation_request, export_format, encoding, compression_level)
+
+
+def submit_complete_flow_run(complete_flow_request: CompleteFlowRequest, export_format: ExportFormat = ExportFormat.JSON, encoding: ContentEncoding | None = None, compression_level: int | None = None) -> Future:
+    """Create the entities and run the simulation on the worker pool for a caller awaiting it; untracked"""
+    return get_simulation_job_pool().submit(execute_complete_flow_job, complete_flow_request, export_format, encoding, compression_level)
+
+
+def submit_simulation_job(simulation_request: SimulationRequest, export_format: ExportFormat = ExportFormat.JSON, compression_level: int | None = None) -> SimulationJob:
+    """Run a simulation as a tracked job. JSON results are kept uncompressed and encoded for each download."""
+    future = submit_simulation_run(simulation_request, export_format, ContentEncoding.IDENTITY)
+
+    return register_simulation_job(SimulationJob(job_id=uuid.uuid4().hex, future=future, export_format=export_format, compression_level=compression_level))
+
+
+def submit_complete_flow_job(complete_flow_request: CompleteFlowRequest, export_format: ExportFormat = ExportFormat.JSON, compression_level: int | None = None) -> SimulationJob:
+    """Create the entities and run the simulation as a tracked job. JSON results are kept uncompressed and encoded for each download."""
+    future = submit_complete_flow_run(complete_flow_request, export_format, ContentEncoding.IDENTITY)
+
+    return register_simulation_job(SimulationJob(job_id=uuid.uuid4().hex, future=future, export_format=export_format, compression_level=compression_level))
+
+
+def submit_capsule_batch(capsule_batch_request: CapsuleBatchRequest, encoding: ContentEncoding | None = None, compression_level: int | None = None) -> Future:
+    return get_simulation_job_pool().submit(execute_capsule_batch_job, capsule_batch_request, encoding, compression_level)
+
+
+def submit_traffic_simulation(traffic_simulation_request: TrafficSimulationRequest, encoding: ContentEncoding | None = None, compression_level: int | None = None) -> Future:
+    return get_simulation_job_pool().submit(execute_traffic_simulation_job, traffic_simulation_request, encoding, compression_level)
+
+
+def submit_network_simulation(network_id: int, network_simulation_request: NetworkSimulationRequest, encoding: ContentEncoding | None = None, compression_level: int | None = None) -> Future:
+    return get_simulation_job_pool().submit(execute_network_simulation_job, network_id, network_simulation_request, encoding, compression_level)
+
+
+def submit_simulation_optimization(optimization_request: SimulationOptimizationRequest, encoding: ContentEncoding | None = None, compression_level: int | None = None) -> Future:
+    return get_simulation_job_pool().submit(execute_simulation_optimization_job, optimization_request, encoding, compression_level)
+
+
+def submit_sweep_chunks(sweep_request: SimulationSweepRequest, axes: dict[str, np.ndarray], chunks: list[tuple[int, int]]) -> list[Future]:
+    """Spread the grid chunks of a sweep over the worker pool. Sweeps are not tracked as jobs."""
+    pool = get_simulation_job_pool()
+
+    return [pool.submit(execute_sweep_chunk, sweep_request, axes, start, stop) for start, stop in chunks]
+
+
+def register_simulation_job(job: SimulationJob) -> SimulationJob:
+    with _jobs_lock:
+        purge_expired_simulation_jobs()
+        _jobs[job.id] = job
+
+    return job
+
+
+def purge_expired_simulation_jobs() -> None:
+    """Forget finished jobs older than SIMULATION_JOB_TTL_S, together with their results. Caller holds _jobs_lock."""
+    expiry = datetime.now(timezone.utc) - timedelta(seconds=SIMULATION_JOB_TTL_S)
+    expired_job_ids = [
+        job_id for job_id, job in _jobs.items()
+        if job.completed_at is not None and job.completed_at < expiry
+    ]
+
+    for job_id in expired_job_ids:
+        del _jobs[job_id]
+
+
+def get_simulation_job(job_id: str) -> SimulationJob | None:
+    with _jobs_lock:
+        return _jobs.get(job_id)
@@ -0,0 +1,220 @@
+import math
+import os
+import time
+
+import numpy as np
+
+from app.domain.entities.system import System
+from app.domain.schemas.simulation_schemas import OptimizationCandidate, SimulationOptimizationRequest, SimulationOptimizationResult
+from app.domain.utils.vectorized_segments_utils import compute_batch_coil_pass_arrays
+
+# Optimization configuration with environment variable support
+SIMULATION_OPTIMIZATION_MAX_CANDIDATES = int(os.getenv("SIMULATION_OPTIMIZATION_MAX_CANDIDATES", 1_000_000))
+
+# Share of each iteration's candidates the next iteration's sampling distribution is fitted to
+OPTIMIZATION_ELITE_FRACTION = 0.1
+# Smallest spread of the sampling distribution, in units of each parameter's range, so the search keeps exploring
+OPTIMIZATION_MIN_SPREAD = 0.01
+
+
+def run_simulation_optimization(optimization_request: SimulationOptimizationRequest) -> SimulationOptimizationResult:
+    """
+    Search coil forces (and positions) minimizing energy for a target travel time, or travel time for an energy budget.
+
+    Cross-entropy search: every iteration samples candidates_per_iteration layouts at once, evaluates them all in one
+    call of the batched engine, and fits the next iteration's sampling distribution to the best of them. Each
+    candidate is a point of the unit cube: one coordinate per coil force, scaled to its bounds, plus, when positions
+    are optimized, one weight per gap between coils (and before the first and after the last one) sharing the tube's
+    free length, so every sampled layout keeps the coils in order, inside the tube and without overlaps.
+    Every evaluated candidate that completes the run feeds the time / energy Pareto front. Nothing is persisted.
+    """
+    validate_optimization(optimization_request)
+
+    tube_length = optimization_request.tube.length
+    coils = optimization_request.coils
+    coil_count = len(coils)
+    candidate_count = optimization_request.candidates_per_iteration
+
+    lengths = np.array([coil.length for coil in coils], dtype=np.float64)
+    force_minimums = np.array([coil.force_applied_min for coil in coils], dtype=np.float64)
+    force_ranges = np.array([coil.force_applied_max for coil in coils], dtype=np.float64) - force_minimums
+
+    if optimization_request.optimize_positions:
+        coil_order = np.arange(coil_count)
+        fixed_positions = None
+    else:
+        fixed_positions = np.array([coil.position for coil in coils], dtype=np.float64)
+        coil_order = np.argsort(fixed_positions, kind="stable")
+
+    masses = np.full(candidate_count, optimization_request.capsule.mass)
+    initial_velocities = np.full(candidate_count, optimization_request.capsule.initial_velocity)
+
+    rng = np.random.default_rng(optimization_request.seed)
+    dimension_count = coil_count + (coil_count + 1 if optimization_request.optimize_positions else 0)
+    elite_count = max(1, math.ceil(OPTIMIZATION_ELITE_FRACTION * candidate_count))
+    mean = spread = None
+
+    front = best = None
+    feasible_count = 0
+    started_at = time.perf_counter()
+
+    for _ in range(optimization_request.iterations):
+        if mean is None:
+            samples = rng.uniform(size=(candidate_count, dimension_count))
+        else:
+            samples = np.clip(rng.normal(mean, spread, size=(candidate_count, dimension_count)), 0, 1)
+
+        forces_applied = force_minimums + samples[:, :coil_count] * force_ranges
+        if fixed_positions is None:
+            positions = get_gap_positions(samples[:, coil_count:], lengths, tube_length)
+        else:
+            positions = np.broadcast_to(fixed_positions, (candidate_count, coil_count))
+
+        batch = compute_batch_coil_pass_arrays(positions[:, coil_order], lengths[coil_order], forces_applied[:, coil_order], masses, initial_velocities, tube_length)
+        candidates = {
+            "positions": positions,
+            "forces_applied": forces_applied,
+            "total_travel_time_s": batch["total_travel_times"],
+            "final_velocity_mps": batch["final_velocities"],
+            "total_energy_consumed_j": batch["total_energies_consumed"],
+        }
+
+        objectives, violations = get_objectives_and_violations(optimization_request, candidates, batch["completed"])
+        feasible = violations == 0
+        feasible_count += int(feasible.sum())
+
+        if feasible.any():
+            index = np.flatnonzero(feasible)[np.argmin(objectives[feasible])]
+            if best is None or objectives[index] < best[0]:
+                best = (objectives[index], {name: values[index] for name, values in candidates.items()})
+
+        front = merge_pareto_front(front, {name: values[batch["completed"]] for name, values in candidates.items()})
+
+        # Feasible candidates first by objective, then the others by how far they miss the constraint
+        elites = samples[np.lexsort((objectives, violations))[:elite_count]]
+        mean = elites.mean(axis=0)
+        spread = np.maximum(elites.std(axis=0), OPTIMIZATION_MIN_SPREAD)
+
+    elapsed = time.perf_counter() - started_at
+    evaluated_count = optimization_request.iterations * candidate_count
+
+    front = thin_pareto_front(front, optimization_request.max_front_size)
+    front_candidates = [to_optimization_candidate({name: values[i] for name, values in front.items()}, lengths, tube_length) for i in range(len(front["total_travel_time_s"]))]
+
+    return SimulationOptimizationResult.model_construct(
+        evaluated_candidates=evaluated_count,
+        feasible_candidates=feasible_count,
+        candidates_per_second=evaluated_count / elapsed if elapsed > 0 else float(evaluated_count),
+        best=to_optimization_candidate(best[1], lengths, tube_length) if best is not None else None,
+        pareto_front=front_candidates,
+    )
+
+
+def validate_optimization(optimization_request: SimulationOptimizationRequest) -> None:
+    """Validate the search without evaluating any candidate, with the same layout rules as a stored system"""
+    if (optimization_request.target_travel_time_s is None) == (optimization_request.max_energy_j is None):
+        raise ValueError("Give exactly one of target_travel_time_s or max_energy_j")
+
+    coils = optimization_request.coils
+    for coil_index, coil in enumerate(coils):
+        if coil.force_applied_min > coil.force_applied_max:
+            raise ValueError(f"Coil #{coil_index} has force_applied_min above force_applied_max")
+
+    lengths = np.array([coil.length for coil in coils], dtype=np.float64)
+
+    if optimization_request.optimize_positions:
+        # Coils packed from the tube's beginning: if they do not fit that way, no placement fits
+        positions = np.concatenate(([0.0], np.cumsum(lengths)[:-1]))
+    else:
+        if any(coil.position is None for coil in coils):
+            raise ValueError("Every coil needs a position when positions are not optimized")
+
+        positions = np.array([coil.position for coil in coils], dtype=np.float64)
+
+    validate_coil_layout(positions, lengths, optimization_request.tube.length)
+
+    candidate_count = optimization_request.iterations * optimization_request.candidates_per_iteration
+    if candidate_count > SIMULATION_OPTIMIZATION_MAX_CANDIDATES:
+        raise ValueError(f"Optimization would evaluate {candidate_count} candidates, the limit is {SIMULATION_OPTIMIZATION_MAX_CANDIDATES}")
+
+
+def validate_coil_layout(positions: np.ndarray, lengths: np.ndarray, tube_length: float) -> None:
+    coil_ranges = sorted(
+        ((f"#{coil_index}", position, position + length) for coil_index, (position, length) in enumerate(zip(positions.tolist(), lengths.tolist()))),
+        key=lambda coil_range: coil_range[1],
+    )
+    System.verify_coil_within_tube_range(coil_ranges, tube_length)
+    System.validate_coil_overlaps(coil_ranges)
+
+
+def get_gap_positions(gap_weights: np.ndarray, lengths: np.ndarray, tube_length: float) -> np.ndarray:
+    """
+    Positions of coils laid out in order, the tube's free length shared between the gaps in proportion to gap_weights:
+    one gap before each coil and one after the last. Gaps are floored to the micrometre, so rounding never pushes a
+    coil into the next one or past the tube's end.
+    """
+    candidate_count, coil_count = len(gap_weights), len(lengths)
+    free_length = tube_length - lengths.sum()
+
+    weights = np.maximum(gap_weights, 1e-12)
+    gaps = np.floor(weights / weights.sum(axis=1, keepdims=True) * free_length * 1e6) / 1e6
+
+    # One running sum over [gap_0, length_0, gap_1, length_1, ...] gives each start as the previous end plus a gap
+    steps = np.stack((gaps[:, :coil_count], np.broadcast_to(lengths, (candidate_count, coil_count))), axis=-1).reshape(candidate_count, 2 * coil_count)
+
+    return np.cumsum(steps, axis=1)[:, 0::2]
+
+
+def get_objectives_and_violations(optimization_request: SimulationOptimizationRequest, candidates: dict[str, np.ndarray], completed: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """Objective to minimize and constraint violation (0 when met, inf when the capsule stops) of each candidate"""
+    travel_times = candidates["total_travel_time_s"]
+    energies = candidates["total_energy_consumed_j"]
+
+    if optimization_request.target_travel_time_s is not None:
+        objectives, violations = energies, np.maximum(travel_times - optimization_request.target_travel_time_s, 0)
+    else:
+        objectives, violations = travel_times, np.maximum(energies - optimization_request.max_energy_j, 0)
+
+    return np.where(completed, objectives, np.inf), np.where(completed, violations, np.inf)
+
+
+def get_pareto_front_indices(travel_times: np.ndarray, energies: np.ndarray) -> np.ndarray:
+    """Indices of the points no other point beats on both travel time and energy, by increasing travel time"""
+    order = np.lexsort((energies, travel_times))
+    sorted_energies = energies[order]
+    lowest_energies_before = np.minimum.accumulate(np.concatenate(([np.inf], sorted_energies[:-1])))
+
+    return order[sorted_energies < lowest_energies_before]
+
+
+def merge_pareto_front(front: dict[str, np.ndarray] | None, candidates: dict[str, np.ndarray]) -> dict[str, np.ndarray]:
+    if front is not None:
+        candidates = {name: np.concatenate((front[name], values)) for name, values in candidates.items()}
+
+    indices = get_pareto_front_indices(candidates["total_travel_time_s"], candidates["total_energy_consumed_j"])
+
+    return {name: values[indices] for name, values in candidates.items()}
+
+
+def thin_pareto_front(front: dict[str, np.ndarray], max_front_size: int) -> dict[str, np.ndarray]:
+    """At most max_front_size points evenly spread along the front, its two ends included"""
+    point_count = len(front["total_travel_time_s"])
+    if point_count <= max_front_size:
+        return front
+
+    indices = np.unique(np.linspace(0, point_count - 1, max_front_size).round().astype(np.int64))
+
+    return {name: values[indices] for name, values in front.items()}
+
+
+def to_optimization_candidate(candidate: dict[str, np.ndarray], lengths: np.ndarray, tube_length: float) -> OptimizationCandidate:
+    # Returned layouts go through the same checks as a stored system
+    validate_coil_layout(candidate["positions"], lengths, tube_length)
+
+    return OptimizationCandidate.model_construct(
+        positions=candidate["positions"].tolist(),
+        forces_applied=candidate["forces_applied"].tolist(),
+        total_travel_time_s=float(candidate["total_travel_time_s"]),
+        final_velocity_mps=float(candidate["final_velocity_mps"]),
+        total_energy_consumed_j=float(candidate["total_energy_consumed_j"]),
+    )
@@ -1,133 +1,352 @@
+import json
+import os
+from contextlib import closing
+from typing import Iterator
+
+import numpy as np
 from app.data_access.simulation_da import SimulationRunDataAccess
 from app.database.config import SessionLocal
 from sqlalchemy.orm import Session
 from app.database.models import SimulationRun
 from app.domain.entities.coil import Coil
-from app.domain.services.engagement_events_service import initialize_engagement_events, get_engagement_events
-from app.domain.services.segments_service import run_simulation_and_get_segments
+from app.domain.services.engagement_events_service import flush_engagement_events
+from app.domain.services.segments_service import iter_simulation_segment_tables, run_simulation_and_get_segments
+from app.domain.services.simulation_checkpoint_service import get_simulation_checkpoint, save_simulation_checkpoint
+from app.domain.services.simulation_cache_service import cache_simulation, get_cached_simulation, get_coil_ids_by_position, get_system_fingerprint, restore_cached_simulation
 from app.domain.services.system_service import get_system_by_id, get_system_coils
 from app.domain.services.tube_service import get_tube_by_id
 from app.domain.services.capsule_service import get_capsule_by_id
-from app.domain.schemas.simulation_schemas import SimulationResult, PositionVsTimePoint, VelocityVsTimePoint, AccelerationVsTimePoint, ForceAppliedVsTimePoint, TotalEnergyConsumedVsTimePoint
-from app.domain.entities.acceleration_segment import AccelerationSegment
-from app.domain.entities.segment import Segment
+from app.domain.schemas.simulation_schemas import CoilSensitivity, ColumnarTrajectories, OutputSensitivities, QuantizedTrajectories, SimulationColumnarResult, SimulationResult, PositionVsTimePoint, VelocityVsTimePoint, AccelerationVsTimePoint, ForceAppliedVsTimePoint, TotalEnergyConsumedVsTimePoint
+from app.domain.entities.segment_table import SegmentTable
+from app.domain.entities.simulation_context import SimulationContext
 from app.domain.entities.system import System
 from app.domain.entities.capsule import Capsule
 from app.domain.entities.tube import Tube
-from app.domain.schemas.simulation_schemas import CompleteFlowRequest
-from app.domain.utils.get_next_id import get_next_id
+from app.domain.schemas.simulation_schemas import CompleteFlowRequest, ExportFormat, SimulationEngine, StreamFormat, TrajectoryFormat
+from app.domain.utils.export_columns import export_columns
+from app.domain.utils.get_next_id import get_next_id, reserve_ids
+from app.domain.utils.quantize_trajectories import get_trajectory_quanta, quantize_trajectories
+from app.domain.utils.vectorized_physics_utils import get_coil_sensitivities as get_vectorized_coil_sensitivities
+
+# Streaming configuration with environment variable support
+SIMULATION_STREAM_CHUNK_COILS = int(os.getenv("SIMULATION_STREAM_CHUNK_COILS", 10000))
 
-_current_system_id: int | None = None
-_simulation_run_data_access: SimulationRunDataAccess | None = None
+COMPACT_JSON_SEPARATORS = (",", ":")
 
 
-def run_simulation_by_system_id(system_id: int) -> SimulationResult:
+def run_simulation_by_system_id(system_id: int, engine: SimulationEngine = SimulationEngine.LOOP, trajectory_format: TrajectoryFormat = TrajectoryFormat.POINTS, trajectory_quanta: dict[str, float] | None = None, include_sensitivities: bool = False) -> SimulationResult | SimulationColumnarResult:
     system = get_system_by_id(system_id)
 
     if system is None:
         raise ValueError(f"System with id {system_id} not found")
-    
-    system_details = format_system_details(system)
-    simulation_id = simulation_start(system, system_details)
 
-    try:
-        initialize_engagement_events(simulation_id, system_id)
+    return run_simulation(system, engine, trajectory_format, trajectory_quanta, include_sensitivities)
 
-        segments = run_simulation_and_get_segments(system)
 
-        coils = get_system_coils(system)
-        position_vs_time_trajectory, velocity_vs_time_trajectory, acceleration_vs_time_trajectory, force_applied_vs_time, total_energy_consumed_metrics, total_travel_time_s, final_velocity_mps, total_energy_consumed_j = get_simulation_results(segments, coils)
+def run_simulation(system: System, engine: SimulationEngine = SimulationEngine.LOOP, trajectory_format: TrajectoryFormat = TrajectoryFormat.POINTS, trajectory_quanta: dict[str, float] | None = None, include_sensitivities: bool = False) -> SimulationResult | SimulationColumnarResult:
+    """
+    Run a simulation on an already loaded system and build its result.
+    The columnar trajectory format returns one array per metric instead of one object per point,
+    the quantized format the same arrays as fixed-point integers, quantized with trajectory_quanta.
+    With include_sensitivities, the result also carries each coil's exact derivatives, from the same segment table.
+    """
+    if trajectory_format == TrajectoryFormat.QUANTIZED:
+        # Fail on invalid quanta before a run is recorded
+        get_trajectory_quanta(trajectory_quanta)
 
-        update_simulation_run_to_completed(
-            simulation_id=simulation_id,
-            total_travel_time_s=total_travel_time_s,
-            final_velocity_mps=final_velocity_mps,
-            total_energy_consumed_j=total_energy_consumed_j
-        )
-    
-        coil_engagement_logs = get_coil_engagement_logs(simulation_id)
+    simulation_id, system_details, segment_table, engagement_events = simulate_system(system, engine)
+    coil_engagement_logs = get_coil_engagement_logs(engagement_events)
+    sensitivities = get_coil_sensitivities(segment_table, system_details["capsule"]["mass"]) if include_sensitivities else None
 
-        return SimulationResult(
+    if trajectory_format != TrajectoryFormat.POINTS:
+        if trajectory_format == TrajectoryFormat.QUANTIZED:
+            trajectories = QuantizedTrajectories.model_construct(**quantize_trajectories(get_trajectory_columns(segment_table), trajectory_quanta))
+        else:
+            trajectories = get_columnar_trajectories(segment_table)
+
+        return SimulationColumnarResult.model_construct(
             simulation_id=simulation_id,
-            system_id=system_id,
+            system_id=system.id,
             system_details=system_details,
-            total_travel_time_s=total_travel_time_s,
-            final_velocity_mps=final_velocity_mps,
-            total_energy_consumed_j=total_energy_consumed_j,
-            position_vs_time_trajectory=position_vs_time_trajectory,
-            velocity_vs_time_trajectory=velocity_vs_time_trajectory,
-            acceleration_vs_time_trajectory=acceleration_vs_time_trajectory,
-            force_applied_vs_time_trajectory=force_applied_vs_time,
-            total_energy_consumed_vs_time_trajectory=total_energy_consumed_metrics,
+            total_travel_time_s=segment_table.total_travel_time,
+            final_velocity_mps=segment_table.final_velocity,
+            total_energy_consumed_j=segment_table.total_energy_consumed,
+            trajectories=trajectories,
             coil_engagement_logs=coil_engagement_logs,
+            sensitivities=sensitivities,
+        )
+
+    position_vs_time_trajectory, velocity_vs_time_trajectory, acceleration_vs_time_trajectory, force_applied_vs_time, total_energy_consumed_metrics, total_travel_time_s, final_velocity_mps, total_energy_consumed_j = get_simulation_results(segment_table)
+
+    return SimulationResult(
+        simulation_id=simulation_id,
+        system_id=system.id,
+        system_details=system_details,
+        total_travel_time_s=total_travel_time_s,
+        final_velocity_mps=final_velocity_mps,
+        total_energy_consumed_j=total_energy_consumed_j,
+        position_vs_time_trajectory=position_vs_time_trajectory,
+        velocity_vs_time_trajectory=velocity_vs_time_trajectory,
+        acceleration_vs_time_trajectory=acceleration_vs_time_trajectory,
+        force_applied_vs_time_trajectory=force_applied_vs_time,
+        total_energy_consumed_vs_time_trajectory=total_energy_consumed_metrics,
+        coil_engagement_logs=coil_engagement_logs,
+        sensitivities=sensitivities,
+    )
+
+
+def export_simulation_by_system_id(system_id: int, engine: SimulationEngine, export_format: ExportFormat) -> tuple[bytes, dict]:
+    system = get_system_by_id(system_id)
+
+    if system is None:
+        raise ValueError(f"System with id {system_id} not found")
+
+    return export_simulation(system, engine, export_format)
+
+
+def export_simulation(system: System, engine: SimulationEngine, export_format: ExportFormat) -> tuple[bytes, dict]:
+    """
+    Run a simulation and export its segment table in a binary format, straight from the table columns.
+    The run's identifiers and summary metrics travel as metadata of the exported table.
+    """
+    simulation_id, system_details, segment_table, _ = simulate_system(system, engine)
+
+    columns = {name: getattr(segment_table, name) for name in SegmentTable.COLUMNS}
+    columns["total_energy_consumed"] = np.cumsum(segment_table.energy)
+
+    metadata = {
+        "simulation_id": simulation_id,
+        "system_id": system.id,
+        "system_details": json.dumps(system_details),
+        "total_travel_time_s": segment_table.total_travel_time,
+        "final_velocity_mps": segment_table.final_velocity,
+        "total_energy_consumed_j": segment_table.total_energy_consumed,
+    }
+
+    return export_columns(columns, export_format, metadata)
+
+
+def simulate_system(system: System, engine: SimulationEngine) -> tuple[str, dict[str, float | int | str | dict | list], SegmentTable, list[dict[str, float | int | str | None]]]:
+    """
+    Run the engine on an already loaded system, reusing the coils it resolved during validation, and record the run.
+    Systems with the same fingerprint reuse the cached engine output; a new simulation run is recorded either way.
+    Otherwise the vectorized engine resumes from the checkpoint of the system's previous run, when it has one.
+    Returns the simulation ID, the system details, the segment table and the engagement events of the run.
+    """
+    system_details = format_system_details(system)
+    fingerprint = get_system_fingerprint(system_details, engine)
+    coil_ids_by_position = get_coil_ids_by_position(system_details)
+    context = simulation_start(system, system_details)
+
+    try:
+        cached_simulation = get_cached_simulation(fingerprint)
+
+        if cached_simulation is not None:
+            segment_table = restore_cached_simulation(cached_simulation, context, coil_ids_by_position)
+        else:
+            checkpoint = get_simulation_checkpoint(system.id) if engine == SimulationEngine.VECTORIZED else None
+            segment_table = run_simulation_and_get_segments(system, context, engine, checkpoint)
+            cache_simulation(fingerprint, segment_table, context.engagement_events, coil_ids_by_position)
+
+        engagement_events = flush_engagement_events(context)
+
+        if engine == SimulationEngine.VECTORIZED:
+            save_simulation_checkpoint(system.id, system_details, segment_table, engagement_events)
+
+        update_simulation_run_to_completed(
+            context=context,
+            total_travel_time_s=segment_table.total_travel_time,
+            final_velocity_mps=segment_table.final_velocity,
+            total_energy_consumed_j=segment_table.total_energy_consumed
         )
 
+        return context.simulation_id, system_details, segment_table, engagement_events
+
     except Exception as e:
-        update_simulation_run_to_failed(simulation_id)
+        update_simulation_run_to_failed(context)
         raise e
 
+    finally:
+        context.close()
 
-def get_simulation_results(segments: list[Segment], coils: dict[int, Coil]):
-    position_vs_time_trajectory = []
-    velocity_vs_time_trajectory = []
-    acceleration_vs_time_trajectory = []
-    force_applied_vs_time = []
-    total_energy_consumed_metrics = []
-    total_energy_consumed_j = 0
-    
-    for segment in segments:
-        is_accel = isinstance(segment, AccelerationSegment)
-        coil = coils[segment.related_coil_id] if segment.related_coil_id else None
-
-        position_vs_time_trajectory.append(
-            PositionVsTimePoint(
-                time=segment.start_time,
-                position=segment.starting_position
-            )
-        )
 
-        velocity_vs_time_trajectory.append(
-            VelocityVsTimePoint(
-                time=segment.start_time,
-                velocity=segment.final_velocity if is_accel else segment.velocity
-            )
-        )
+def stream_simulation_by_system_id(system_id: int, engine: SimulationEngine = SimulationEngine.LOOP, stream_format: StreamFormat = StreamFormat.JSON) -> Iterator[str]:
+    """Validate the system up front, so errors surface before any result is streamed"""
+    system = get_system_by_id(system_id)
 
-        acceleration_vs_time_trajectory.append(
-            AccelerationVsTimePoint(
-                time=segment.start_time,
-                acceleration=segment.acceleration if is_accel else 0
-            )
-        )
+    if system is None:
+        raise ValueError(f"System with id {system_id} not found")
+
+    return stream_simulation(system, engine, stream_format)
+
+
+def stream_simulation(system: System, engine: SimulationEngine = SimulationEngine.LOOP, stream_format: StreamFormat = StreamFormat.JSON, chunk_size: int = SIMULATION_STREAM_CHUNK_COILS) -> Iterator[str]:
+    """
+    Run a simulation and yield its result as consecutive text fragments while the engine progresses.
+
+    JSON: one document with the header fields, a "chunks" array and the summary fields last.
+    NDJSON: one line per part, each tagged with its "type": "header", then one "chunk" line per chunk, then "summary".
+    """
+    parts = iter_simulation_stream(system, engine, chunk_size)
+
+    if stream_format == StreamFormat.NDJSON:
+        return iter_ndjson_lines(parts)
+
+    return iter_json_document_fragments(parts)
 
-        force_applied_vs_time.append(
-            ForceAppliedVsTimePoint(
-                time=segment.start_time,
-                force_applied=coil.force_applied if is_accel and coil else 0
-            )
-        )
 
-        total_energy_consumed_j += segment.energy_consumed if is_accel else 0
+def iter_simulation_stream(system: System, engine: SimulationEngine, chunk_size: int) -> Iterator[tuple[str, dict]]:
+    """
+    Run a simulation and yield its result in parts: ("header", ...), one ("chunk", ...) per chunk_size coils, ("summary", ...).
+    Each chunk holds columnar time, position, velocity, acceleration, force and cumulative energy arrays
+    with the engagement logs of the chunk. Only the current chunk is held in memory.
+    Streamed runs bypass the result cache and checkpoints.
+    """
+    system_details = format_system_details(system)
+    context = simulation_start(system, system_details)
+
+    try:
+        yield "header", {"simulation_id": context.simulation_id, "system_id": system.id, "system_details": system_details}
+
+        total_energy_consumed_j = 0.0
+        for segment_table in iter_simulation_segment_tables(system, context, engine, chunk_size):
+            # Events are written per chunk, so they never pile up either
+            engagement_events = flush_engagement_events(context)
+            total_energy_consumed = total_energy_consumed_j + np.cumsum(segment_table.energy)
+            total_energy_consumed_j = float(total_energy_consumed[-1])
+
+            yield "chunk", {
+                "time": segment_table.start_time.tolist(),
+                "position": segment_table.starting_position.tolist(),
+                "velocity": segment_table.velocity.tolist(),
+                "acceleration": segment_table.acceleration.tolist(),
+                "force_applied": segment_table.force_applied.tolist(),
+                "total_energy_consumed_j": total_energy_consumed.tolist(),
+                "coil_engagement_logs": get_coil_engagement_logs(engagement_events),
+            }
 
-        total_energy_consumed_metrics.append(
-            TotalEnergyConsumedVsTimePoint(
-                time=segment.start_time,
-                total_energy_consumed_j=total_energy_consumed_j
-            )
+        total_travel_time_s = float(segment_table.start_time[-1] + segment_table.traverse_time[-1])
+        final_velocity_mps = segment_table.final_velocity
+
+        update_simulation_run_to_completed(
+            context=context,
+            total_travel_time_s=total_travel_time_s,
+            final_velocity_mps=final_velocity_mps,
+            total_energy_consumed_j=total_energy_consumed_j
         )
 
-    total_travel_time_s = sum(segment.traverse_time for segment in segments)
-    final_velocity_mps = segments[-1].final_velocity if isinstance(segments[-1], AccelerationSegment) else segments[-1].velocity
-    total_energy_consumed_j = sum(
-        segment.energy_consumed for segment in segments 
-        if isinstance(segment, AccelerationSegment)
-    )
+        yield "summary", {"total_travel_time_s": total_travel_time_s, "final_velocity_mps": final_velocity_mps, "total_energy_consumed_j": total_energy_consumed_j}
+
+    except (Exception, GeneratorExit):
+        # GeneratorExit: the client went away before the run finished
+        update_simulation_run_to_failed(context)
+        raise
+
+    finally:
+        context.close()
+
+
+def iter_json_document_fragments(parts: Iterator[tuple[str, dict]]) -> Iterator[str]:
+    with closing(parts):
+        separator = ""
+        for part_type, part in parts:
+            if part_type == "header":
+                yield json.dumps(part, separators=COMPACT_JSON_SEPARATORS)[:-1] + ',"chunks":['
+            elif part_type == "chunk":
+                yield separator + json.dumps(part, separators=COMPACT_JSON_SEPARATORS)
+                separator = ","
+            else:
+                yield "]," + json.dumps(part, separators=COMPACT_JSON_SEPARATORS)[1:]
+
+
+def iter_ndjson_lines(parts: Iterator[tuple[str, dict]]) -> Iterator[str]:
+    with closing(parts):
+        for part_type, part in parts:
+            yield json.dumps({"type": part_type, **part}, separators=COMPACT_JSON_SEPARATORS) + "\n"
+
+
+def get_simulation_results(segment_table: SegmentTable):
+    times = segment_table.start_time.tolist()
+    total_energy_consumed = np.cumsum(segment_table.energy).tolist()
+
+    # Values come straight from the engine, so the points are built without re-validating each one
+    position_vs_time_trajectory = [
+        PositionVsTimePoint.model_construct(time=time, position=position)
+        for time, position in zip(times, segment_table.starting_position.tolist())
+    ]
+    velocity_vs_time_trajectory = [
+        VelocityVsTimePoint.model_construct(time=time, velocity=velocity)
+        for time, velocity in zip(times, segment_table.velocity.tolist())
+    ]
+    acceleration_vs_time_trajectory = [
+        AccelerationVsTimePoint.model_construct(time=time, acceleration=acceleration)
+        for time, acceleration in zip(times, segment_table.acceleration.tolist())
+    ]
+    force_applied_vs_time = [
+        ForceAppliedVsTimePoint.model_construct(time=time, force_applied=force_applied)
+        for time, force_applied in zip(times, segment_table.force_applied.tolist())
+    ]
+    total_energy_consumed_metrics = [
+        TotalEnergyConsumedVsTimePoint.model_construct(time=time, total_energy_consumed_j=energy)
+        for time, energy in zip(times, total_energy_consumed)
+    ]
+
+    total_travel_time_s = segment_table.total_travel_time
+    final_velocity_mps = segment_table.final_velocity
+    total_energy_consumed_j = segment_table.total_energy_consumed
 
     return position_vs_time_trajectory, velocity_vs_time_trajectory, acceleration_vs_time_trajectory, force_applied_vs_time, total_energy_consumed_metrics, total_travel_time_s, final_velocity_mps, total_energy_consumed_j
 
 
-def get_coil_engagement_logs(simulation_id: str) -> list[dict[str, float | int | str]]:
-    db_events = get_engagement_events(simulation_id)
+def get_columnar_trajectories(segment_table: SegmentTable) -> ColumnarTrajectories:
+    """One shared time array plus one array per metric, straight from the segment table columns"""
+    return ColumnarTrajectories.model_construct(**{
+        channel: values.tolist() for channel, values in get_trajectory_columns(segment_table).items()
+    })
+
+
+def get_trajectory_columns(segment_table: SegmentTable) -> dict[str, np.ndarray]:
+    return {
+        "t_s": segment_table.start_time,
+        "position_m": segment_table.starting_position,
+        "velocity_mps": segment_table.velocity,
+        "acceleration_mps2": segment_table.acceleration,
+        "force_applied_n": segment_table.force_applied,
+        "total_energy_consumed_j": np.cumsum(segment_table.energy),
+    }
+
+
+def get_coil_sensitivities(segment_table: SegmentTable, mass: float) -> list[CoilSensitivity]:
+    """
+    Derivatives of the run's results with respect to each coil's force, length and position, read off the segment
+    table: after the first constant velocity row, each coil has an acceleration row followed by a constant velocity one.
+    Computed from the table rather than inside an engine, so cached, checkpointed and loop runs get them too.
+    """
+    coil_count = (len(segment_table) - 1) // 2
+    if coil_count == 0:
+        return []
+
+    acceleration_rows = slice(1, 2 * coil_count, 2)
+    sensitivities = get_vectorized_coil_sensitivities(
+        entry_velocities=segment_table.velocity[0:2 * coil_count - 1:2],
+        exit_velocities=segment_table.velocity[acceleration_rows],
+        acceleration_lengths=segment_table.length[acceleration_rows],
+        constant_velocity_lengths=segment_table.length[2:2 * coil_count + 1:2],
+        forces_applied=segment_table.force_applied[acceleration_rows],
+        mass=mass,
+    )
+    columns = {parameter: {output: values.tolist() for output, values in outputs.items()} for parameter, outputs in sensitivities.items()}
+
+    return [
+        CoilSensitivity.model_construct(
+            coil_id=coil_id,
+            **{parameter: OutputSensitivities.model_construct(**{output: values[i] for output, values in outputs.items()}) for parameter, outputs in columns.items()},
+        )
+        for i, coil_id in enumerate(segment_table.related_coil_id[acceleration_rows].tolist())
+    ]
+
+
+def get_coil_engagement_logs(engagement_events: list[dict[str, float | int | str | None]]) -> list[dict[str, float | int | str]]:
     coil_engagement_logs = []
 
     fields = [
@@ -141,15 +360,15 @@ def get_coil_engagement_logs(simulation_id: str) -> list[dict[str, float | int |
         "energy_consumed_j"
     ]
 
-    for event in db_events:
+    for event in engagement_events:
         log_entry = {
-            "t_s": event.timestamp_s,
-            "event": event.event
+            "t_s": event["timestamp_s"],
+            "event": event["event"]
         }
         log_entry.update({
-            field: getattr(event, field)
+            field: event[field]
             for field in fields
-            if getattr(event, field) is not None
+            if event[field] is not None
         })
         coil_engagement_logs.append(log_entry)
 
@@ -183,7 +402,7 @@ def format_system_details(system: System) -> dict[str, float | int | str | dict
     }
 
 
-def create_all_simulation_entities(complete_flow_request: CompleteFlowRequest) -> int:
+def create_all_simulation_entities(complete_flow_request: CompleteFlowRequest) -> System:
     tube_id = get_next_id(Tube.DATABASE_FILE_PATH)
     Tube(
         tube_id=tube_id, 
@@ -198,8 +417,8 @@ def create_all_simulation_entities(complete_flow_request: CompleteFlowRequest) -
     )
     
     coil_ids_to_positions = {}
-    for coil_data in complete_flow_request.coils:
-        coil_id = get_next_id(Coil.DATABASE_FILE_PATH)
+    coil_ids = reserve_ids(Coil.DATABASE_FILE_PATH, len(complete_flow_request.coils))
+    for coil_id, coil_data in zip(coil_ids, complete_flow_request.coils):
         Coil(
             coil_id=coil_id,
             length=coil_data.length,
@@ -208,70 +427,60 @@ def create_all_simulation_entities(complete_flow_request: CompleteFlowRequest) -
         coil_ids_to_positions[coil_id] = coil_data.position
     
     system_id = get_next_id(System.DATABASE_FILE_PATH)
-    System(
+    return System(
         system_id=system_id,
         tube_id=tube_id,
         coil_ids_to_positions=coil_ids_to_positions,
         capsule_id=capsule_id
     )
 
-    return system_id
-
 
-def simulation_start(system: System, system_details: dict[str, float | int | str | dict | list]) -> str:
+def simulation_start(system: System, system_details: dict[str, float | int | str | dict | list]) -> SimulationContext:
     """
-    Initialize logging for a new simulation run.
-    Returns the simulation_id that should be used for all subsequent logs.
+    Insert a new simulation run and create the context that carries it through the engine.
+    The context owns its own database session, so concurrent runs never share one.
     """
-    global _current_system_id, _simulation_run_data_access
-    
-    _current_system_id = system.id
-
     db = SessionLocal()
-    _simulation_run_data_access = SimulationRunDataAccess(db)
-    
-    return _simulation_run_data_access.insert_simulation_run(system.id, system_details)
 
+    try:
+        simulation_id = SimulationRunDataAccess(db).insert_simulation_run(system.id, system_details)
+    except Exception:
+        db.close()
+        raise
 
-def update_simulation_run_to_completed(simulation_id: str, total_travel_time_s: float, final_velocity_mps: float, total_energy_consumed_j: float = None) -> SimulationRun | None:
-    """Complete the current simulation run with summary statistics"""
-    global _simulation_run_data_access
-    
-    if _simulation_run_data_access:
-        try:
-            simulation_run = _simulation_run_data_access.simulation_complete(
-                simulation_id=simulation_id,
-                total_travel_time_s=total_travel_time_s,
-                final_velocity_mps=final_velocity_mps,
-                total_energy_consumed_j=total_energy_consumed_j
-            )
-
-            return simulation_run
-        except Exception as e:
-            print(f"Failed to complete simulation logging: {e}")
-            return None
-    
+    return SimulationContext(simulation_id=simulation_id, system_id=system.id, db=db)
 
-def update_simulation_run_to_failed(simulation_id: str) -> SimulationRun | None:
-    """Fail the current simulation run with an error message"""
-    global _simulation_run_data_access
+
+def update_simulation_run_to_completed(context: SimulationContext, total_travel_time_s: float, final_velocity_mps: float, total_energy_consumed_j: float = None) -> SimulationRun | None:
+    """Complete the simulation run with summary statistics"""
+    try:
+        return SimulationRunDataAccess(context.db).simulation_complete(
+            simulation_id=context.simulation_id,
+            total_travel_time_s=total_travel_time_s,
+            final_velocity_mps=final_velocity_mps,
+            total_energy_consumed_j=total_energy_consumed_j
+        )
+    except Exception as e:
+        context.db.rollback()
+        print(f"Failed to complete simulation logging: {e}")
+        return None
     
-    if _simulation_run_data_access:
-        return _simulation_run_data_access.simulation_failed(simulation_id)
+
+def update_simulation_run_to_failed(context: SimulationContext) -> SimulationRun | None:
+    """Mark the simulation run as failed"""
+    context.db.rollback()
+
+    return SimulationRunDataAccess(context.db).simulation_failed(context.simulation_id)
     
 
-def get_simulation_run(simulation_id: str) -> SimulationRun | None:
+def get_simulation_run(simulation_id: str, db: Session) -> SimulationRun | None:
     """Get a simulation run by its ID"""
-    global _simulation_run_data_access
-    return _simulation_run_data_access.get_simulation_run_by_id(simulation_id)
+    return SimulationRunDataAccess(db).get_simulation_run_by_id(simulation_id)
 
 
 def get_valid_simulation_run(simulation_id: str, db: Session) -> SimulationRun:
     """Get a valid simulation run by its ID"""
-    global _simulation_run_data_access
-
-    _simulation_run_data_access = SimulationRunDataAccess(db)
-    simulation_run = _simulation_run_data_access.get_simulation_run_by_id(simulation_id)
+    simulation_run = get_simulation_run(simulation_id, db)
 
     if not simulation_run:
         raise ValueError(f"Simulation run with id {simulation_id} not found")
@@ -279,11 +488,4 @@ def get_valid_simulation_run(simulation_id: str, db: Session) -> SimulationRun:
     if simulation_run.status != "completed":
         raise ValueError(f"Simulation run with id {simulation_id} is not completed")
 
-    return simulation_run
-
-
-def get_current_system_id() -> int | None:
-    """Get the current system ID"""
-    global _current_system_id
-    
-    return _current_system_id
\ No newline at end of file
+    return simulation_run
\ No newline at end of file
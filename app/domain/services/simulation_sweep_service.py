@@ -0,0 +1,137 @@
+import os
+
+import numpy as np
+
+from app.domain.entities.system import System
+from app.domain.schemas.simulation_schemas import SimulationSweepRequest, SimulationSweepResponse, SweepRange
+from app.domain.utils.vectorized_segments_utils import compute_batch_coil_pass_arrays
+
+# Sweep configuration with environment variable support
+SIMULATION_SWEEP_MAX_POINTS = int(os.getenv("SIMULATION_SWEEP_MAX_POINTS", 1_000_000))
+SIMULATION_SWEEP_CHUNK_SIZE = int(os.getenv("SIMULATION_SWEEP_CHUNK_SIZE", 20_000))
+
+SWEEP_METRICS = ("total_travel_time_s", "final_velocity_mps", "total_energy_consumed_j")
+
+
+def expand_sweep_range(sweep_range: SweepRange, name: str) -> np.ndarray:
+    if sweep_range.values is not None:
+        if len(sweep_range.values) == 0:
+            raise ValueError(f"Sweep of {name} has no values")
+
+        return np.array(sweep_range.values, dtype=np.float64)
+
+    if sweep_range.start is None or sweep_range.stop is None or sweep_range.num is None:
+        raise ValueError(f"Sweep of {name} needs either values or start, stop and num")
+
+    return np.linspace(sweep_range.start, sweep_range.stop, sweep_range.num)
+
+
+def get_sweep_axes(sweep_request: SimulationSweepRequest) -> dict[str, np.ndarray]:
+    """
+    Values of every grid axis: capsule mass, capsule initial velocity, then each swept coil force.
+    Parameters that are not swept form a single-value axis holding the base value.
+    """
+    base = sweep_request.base
+
+    axes = {
+        "mass": expand_sweep_range(sweep_request.mass, "mass") if sweep_request.mass else np.array([base.capsule.mass]),
+        "initial_velocity": expand_sweep_range(sweep_request.initial_velocity, "initial_velocity") if sweep_request.initial_velocity else np.array([base.capsule.initial_velocity]),
+    }
+
+    for coil_force_sweep in sweep_request.coil_forces:
+        if coil_force_sweep.coil_index >= len(base.coils):
+            raise ValueError(f"Coil index {coil_force_sweep.coil_index} is out of range, the base request has {len(base.coils)} coils")
+
+        name = get_coil_force_axis_name(coil_force_sweep.coil_index)
+        if name in axes:
+            raise ValueError(f"Coil index {coil_force_sweep.coil_index} is swept more than once")
+
+        axes[name] = expand_sweep_range(coil_force_sweep.force_applied, name)
+
+    return axes
+
+
+def get_coil_force_axis_name(coil_index: int) -> str:
+    return f"coil_{coil_index}_force_applied"
+
+
+def validate_sweep(sweep_request: SimulationSweepRequest, axes: dict[str, np.ndarray]) -> int:
+    """Validate the swept configuration without persisting any entity. Returns the number of grid points."""
+    base = sweep_request.base
+
+    # The layout is shared by every grid point, so it is validated once, with the same rules as a stored system
+    coil_ranges = sorted(
+        ((f"#{coil_index}", coil.position, coil.position + coil.length) for coil_index, coil in enumerate(base.coils)),
+        key=lambda coil_range: coil_range[1],
+    )
+    System.verify_coil_within_tube_range(coil_ranges, base.tube.length)
+    System.validate_coil_overlaps(coil_ranges)
+
+    if np.any(axes["mass"] <= 0):
+        raise ValueError("Swept masses must be positive")
+
+    if np.any(axes["initial_velocity"] <= 0):
+        raise ValueError("Swept initial velocities must be positive")
+
+    point_count = int(np.prod([len(values) for values in axes.values()], dtype=np.int64))
+    if point_count > SIMULATION_SWEEP_MAX_POINTS:
+        raise ValueError(f"Sweep has {point_count} points, the limit is {SIMULATION_SWEEP_MAX_POINTS}")
+
+    return point_count
+
+
+def get_sweep_chunks(point_count: int) -> list[tuple[int, int]]:
+    return [(start, min(start + SIMULATION_SWEEP_CHUNK_SIZE, point_count)) for start in range(0, point_count, SIMULATION_SWEEP_CHUNK_SIZE)]
+
+
+def execute_sweep_chunk(sweep_request: SimulationSweepRequest, axes: dict[str, np.ndarray], start: int, stop: int) -> dict[str, np.ndarray]:
+    """
+    Worker entry point: evaluate the grid points [start, stop) with the batched engine.
+    Points are expanded from their flat index here, so only the axes travel to the worker.
+    """
+    base = sweep_request.base
+    grid_indices = np.unravel_index(np.arange(start, stop), tuple(len(values) for values in axes.values()))
+    parameters = {name: values[indices] for (name, values), indices in zip(axes.items(), grid_indices)}
+
+    coil_order = sorted(range(len(base.coils)), key=lambda coil_index: base.coils[coil_index].position)
+    positions = np.array([base.coils[coil_index].position for coil_index in coil_order], dtype=np.float64)
+    lengths = np.array([base.coils[coil_index].length for coil_index in coil_order], dtype=np.float64)
+
+    forces_applied = np.tile(np.array([base.coils[coil_index].force_applied for coil_index in coil_order], dtype=np.float64), (stop - start, 1))
+    for column, coil_index in enumerate(coil_order):
+        swept_forces = parameters.get(get_coil_force_axis_name(coil_index))
+        if swept_forces is not None:
+            forces_applied[:, column] = swept_forces
+
+    batch = compute_batch_coil_pass_arrays(positions, lengths, forces_applied, parameters["mass"], parameters["initial_velocity"], base.tube.length)
+
+    return {
+        **parameters,
+        "total_travel_time_s": batch["total_travel_times"],
+        "final_velocity_mps": batch["final_velocities"],
+        "total_energy_consumed_j": batch["total_energies_consumed"],
+        "completed": batch["completed"],
+    }
+
+
+def merge_sweep_chunks(axes: dict[str, np.ndarray], chunk_results: list[dict[str, np.ndarray]]) -> SimulationSweepResponse:
+    """Concatenate the chunks, in grid order, into one columnar table"""
+    columns = {name: np.concatenate([chunk[name] for chunk in chunk_results]) for name in chunk_results[0]}
+    stopped_points = np.flatnonzero(~columns["completed"])
+
+    table = {}
+    for name, values in columns.items():
+        values = values.tolist()
+
+        if name in SWEEP_METRICS:
+            for point in stopped_points.tolist():
+                values[point] = None
+
+        table[name] = values
+
+    # Values come straight from the engine, so the response is built without re-validating each one
+    return SimulationSweepResponse.model_construct(
+        point_count=len(columns["completed"]),
+        axes={name: values.tolist() for name, values in axes.items()},
+        columns=table,
+    )
@@ -1,11 +1,8 @@
 from enum import Enum
+from app.data_access.jsonl_entity_store import get_entity_store
 from app.domain.entities.system import System
-import os, json
-from pathlib import Path
-import tempfile
 from app.domain.entities.coil import Coil
 from app.domain.services.capsule_service import delete_capsule_by_id
-from app.domain.services.coil_service import get_coil_by_id
 from app.domain.services.coil_service import delete_coil_by_id
 from app.domain.services.tube_service import delete_tube_by_id
 
@@ -17,82 +14,55 @@ class UpdateSystemStatus(Enum):
 
 
 def read_all_systems():
-    systems = []
-    try:
-        with open(System.DATABASE_FILE_PATH, "r", encoding="utf-8") as f:
-            for line in f:
-                if line.strip():
-                    record = json.loads(line)
-                    # Convert string keys to integers for coil_ids_to_positions
-                    record["coil_ids_to_positions"] = {int(k): v for k, v in record["coil_ids_to_positions"].items()}
-                    systems.append(record)
-    except FileNotFoundError:
-        pass
+    systems = get_entity_store(System.DATABASE_FILE_PATH).all()
+
+    for record in systems:
+        # Convert string keys to integers for coil_ids_to_positions
+        record["coil_ids_to_positions"] = {int(k): v for k, v in record["coil_ids_to_positions"].items()}
+
     return systems
 
 
 def delete_system_by_id(system_id: int, force_delete_related_entities: bool = False) -> bool:
-    if not System.DATABASE_FILE_PATH.exists():
+    system = get_system_by_id(system_id)
+    if system is None:
         return False
 
-    found = False
-    lines_to_keep = []
+    found = get_entity_store(System.DATABASE_FILE_PATH).delete(system_id)
 
-    with open(System.DATABASE_FILE_PATH, "r", encoding="utf-8") as f:
-        for line in f:
-            if not line.strip():
-                continue
-            record = json.loads(line)
-            if record.get("id") == system_id:
-                found = True
-                continue
-            lines_to_keep.append(line)
+    if found and force_delete_related_entities:
+        for coil_id in system.coil_ids_to_positions.keys():
+            delete_coil_by_id(coil_id)
 
-    if found:
-        system = get_system_by_id(system_id)
-
-        with open(System.DATABASE_FILE_PATH, "w", encoding="utf-8") as f:
-            f.writelines(lines_to_keep)
-
-        if force_delete_related_entities:
-            for coil_id in system.coil_ids_to_positions.keys():
-                delete_coil_by_id(coil_id)
-
-            delete_capsule_by_id(system.capsule_id)
-            delete_tube_by_id(system.tube_id)
+        delete_capsule_by_id(system.capsule_id)
+        delete_tube_by_id(system.tube_id)
 
     return found
 
 
 def get_system_by_id(system_id: int) -> System | None:
-    if not System.DATABASE_FILE_PATH.exists():
+    record = get_entity_store(System.DATABASE_FILE_PATH).get(system_id)
+    if record is None:
         return None
 
-    with open(System.DATABASE_FILE_PATH, "r", encoding="utf-8") as f:
-        for line in f:
-            s = line.strip()
-            if not s:
-                continue
-            try:
-                record = json.loads(s)
-            except json.JSONDecodeError:
-                continue
-            if record.get("id") == system_id:
-                coil_ids_to_positions = {int(k): v for k, v in record["coil_ids_to_positions"].items()}
-                return System(system_id=record["id"], tube_id=record["tube_id"], coil_ids_to_positions=coil_ids_to_positions, capsule_id=record["capsule_id"], save_to_file=False)
-    return None
+    coil_ids_to_positions = {int(k): v for k, v in record["coil_ids_to_positions"].items()}
+    return System(system_id=record["id"], tube_id=record["tube_id"], coil_ids_to_positions=coil_ids_to_positions, capsule_id=record["capsule_id"], save_to_file=False)
+
+
+def get_systems_by_ids(system_ids: list[int]) -> dict[int, System]:
+    """Resolve many systems in one pass over the index. Systems that are not found are left out."""
+    records = get_entity_store(System.DATABASE_FILE_PATH).get_many(system_ids)
+
+    return {
+        system_id: System(system_id=record["id"], tube_id=record["tube_id"], coil_ids_to_positions={int(k): v for k, v in record["coil_ids_to_positions"].items()}, capsule_id=record["capsule_id"], save_to_file=False)
+        for system_id, record in records.items()
+    }
 
 
 def update_system_by_id(system_id: int, new_tube_id: int, new_coil_ids_to_positions: dict[int, float], new_capsule_id: int) -> tuple[UpdateSystemStatus, str | None]:
     """
-    Replace the record with id == system_id. Returns the updated System or None if not found.
-    Uses an atomic write (temp file + replace) to avoid corruption.
+    Replace the record with id == system_id. Returns the update status and, for invalid systems, the validation error.
     """
-    if not System.DATABASE_FILE_PATH.exists():
-        return UpdateSystemStatus.NOT_FOUND, None
-
-    found = False
-
     system = get_system_by_id(system_id)
     if system is None:
         return UpdateSystemStatus.NOT_FOUND, None
@@ -103,48 +73,17 @@ def update_system_by_id(system_id: int, new_tube_id: int, new_coil_ids_to_positi
     except ValueError as e:
         return UpdateSystemStatus.INVALID_SYSTEM, e.args[0]
     
-    with tempfile.NamedTemporaryFile("w", delete=False, dir=str(System.DATABASE_FILE_PATH.parent), encoding="utf-8") as tmp:
-        tmp_path = Path(tmp.name)
-        with open(System.DATABASE_FILE_PATH, "r", encoding="utf-8") as src:
-            for line in src:
-                s = line.strip()
-                if not s:
-                    continue
-                try:
-                    rec = json.loads(s)
-                except json.JSONDecodeError:
-                    # keep malformed lines as-is to avoid data loss
-                    tmp.write(line)
-                    continue
-
-                if rec.get("id") == system_id:
-                    rec["tube_id"] = new_tube_id
-                    rec["coil_ids_to_positions"] = new_coil_ids_to_positions
-                    rec["capsule_id"] = new_capsule_id
-                    found = True
-
-                tmp.write(json.dumps(rec, ensure_ascii=False) + "\n")
-
-    if not found:
-        # no change; remove temp file
-        try:
-            tmp_path.unlink(missing_ok=True)
-        finally:
-            return UpdateSystemStatus.NOT_FOUND, None
-
-    # atomic replace
-    os.replace(tmp_path, System.DATABASE_FILE_PATH)
+    updated_record = get_entity_store(System.DATABASE_FILE_PATH).update(system_id, {
+        "tube_id": new_tube_id,
+        "coil_ids_to_positions": new_coil_ids_to_positions,
+        "capsule_id": new_capsule_id,
+    })
+
+    if updated_record is None:
+        return UpdateSystemStatus.NOT_FOUND, None
 
     return UpdateSystemStatus.SUCCESS, None
 
 
 def get_system_coils(system: System) -> dict[int, Coil]:
-    coils = {}
-    
-    for coil_id in system.coil_ids_to_positions.keys():
-        coil = get_coil_by_id(coil_id)
-        
-        if coil:
-            coils[coil_id] = coil
-        
-    return coils
\ No newline at end of file
+    return system.get_coils()
\ No newline at end of file
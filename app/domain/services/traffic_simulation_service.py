@@ -0,0 +1,118 @@
+import numpy as np
+
+from app.domain.entities.segment_table import SegmentTable
+from app.domain.schemas.simulation_schemas import TrafficCapsuleItem, TrafficSeparation, TrafficSimulationRequest, TrafficSimulationResult
+from app.domain.services.segments_service import get_system_coils_by_asc_position
+from app.domain.services.simulation_service import format_system_details, get_columnar_trajectories
+from app.domain.services.system_service import get_system_by_id
+from app.domain.services.tube_service import get_tube_by_id
+from app.domain.utils.traffic_scheduler_utils import get_traffic_event_arrays, run_traffic_events
+from app.domain.utils.vectorized_segments_utils import build_batch_segment_columns, compute_batch_coil_pass_arrays, get_coil_arrays
+
+
+def run_traffic_simulation(traffic_simulation_request: TrafficSimulationRequest) -> TrafficSimulationResult:
+    """
+    Launch a stream of capsules into the same system and follow them together.
+    Capsules do not push on each other, so the coil passes of every capsule come from the batched engine; a
+    discrete-event scheduler then merges their launch, coil enter, midpoint, exit and arrival events in time order
+    to track the separation between consecutive capsules. Nothing is persisted.
+    """
+    system = get_system_by_id(traffic_simulation_request.system_id)
+
+    if system is None:
+        raise ValueError(f"System with id {traffic_simulation_request.system_id} not found")
+
+    tube = get_tube_by_id(system.tube_id)
+    coil_ids, positions, lengths, forces_applied = get_coil_arrays(get_system_coils_by_asc_position(system))
+
+    capsules = traffic_simulation_request.capsules
+    launch_times = np.array([capsule.launch_time for capsule in capsules], dtype=np.float64)
+    masses = np.array([capsule.mass for capsule in capsules], dtype=np.float64)
+    initial_velocities = np.array([capsule.initial_velocity for capsule in capsules], dtype=np.float64)
+
+    # Consecutive capsules in launch order are the pairs whose separation is tracked
+    order = np.argsort(launch_times, kind="stable")
+    launch_times, masses, initial_velocities = launch_times[order], masses[order], initial_velocities[order]
+
+    batch = compute_batch_coil_pass_arrays(positions, lengths, forces_applied, masses, initial_velocities, tube.length)
+
+    if not batch["completed"].all():
+        stopped = order[~batch["completed"]].tolist()
+        raise ValueError(f"Capsules {stopped} come to a stop inside a coil and would block the tube")
+
+    events = run_traffic_events(**get_traffic_event_arrays(batch, launch_times, initial_velocities))
+    columns = build_batch_segment_columns(coil_ids, batch, tube) if traffic_simulation_request.include_trajectories else None
+
+    arrival_times = launch_times + batch["total_travel_times"]
+    minimum_separations = [None if np.isnan(separation) else separation for separation in events["minimum_separations"].tolist()]
+    catch_up_times = [None if np.isnan(catch_up_time) else catch_up_time for catch_up_time in events["catch_up_times"].tolist()]
+    catch_up_positions = [None if np.isnan(catch_up_position) else catch_up_position for catch_up_position in events["catch_up_positions"].tolist()]
+
+    launch_time_list = launch_times.tolist()
+    arrival_time_list = arrival_times.tolist()
+    total_travel_times = batch["total_travel_times"].tolist()
+    final_velocities = batch["final_velocities"].tolist()
+    total_energies_consumed = batch["total_energies_consumed"].tolist()
+
+    items = [None] * len(capsules)
+    for rank, index in enumerate(order.tolist()):
+        capsule = capsules[index]
+        item = TrafficCapsuleItem.model_construct(
+            launch_time_s=launch_time_list[rank],
+            mass=capsule.mass,
+            initial_velocity=capsule.initial_velocity,
+            arrival_time_s=arrival_time_list[rank],
+            total_travel_time_s=total_travel_times[rank],
+            final_velocity_mps=final_velocities[rank],
+            total_energy_consumed_j=total_energies_consumed[rank],
+            minimum_separation_m=minimum_separations[rank],
+            catch_up_time_s=catch_up_times[rank],
+            catch_up_position_m=catch_up_positions[rank],
+        )
+
+        if columns is not None:
+            trajectories = get_columnar_trajectories(SegmentTable.from_columns({name: column[rank] for name, column in columns.items()}))
+            trajectories.t_s = (columns["start_time"][rank] + launch_times[rank]).tolist()
+            item.trajectories = trajectories
+
+        items[index] = item
+
+    return TrafficSimulationResult.model_construct(
+        system_id=system.id,
+        system_details=format_system_details(system),
+        event_count=events["event_count"],
+        minimum_separation=get_minimum_separation(order, events),
+        catch_up_count=int(np.count_nonzero(~np.isnan(events["catch_up_times"]))),
+        minimum_arrival_headway_s=float(np.diff(np.sort(arrival_times)).min()) if len(capsules) > 1 else None,
+        throughput_capsules_per_s=get_throughput(launch_times, arrival_times),
+        capsules=items,
+    )
+
+
+def get_minimum_separation(order: np.ndarray, events: dict[str, np.ndarray | int]) -> TrafficSeparation | None:
+    """
+    Closest approach over every pair of consecutive capsules, with capsules given by their index in the request.
+    Ties (every catch-up is a separation of 0) go to the earliest.
+    """
+    minimum_separations = events["minimum_separations"]
+    tracked = np.flatnonzero(~np.isnan(minimum_separations))
+
+    if len(tracked) == 0:
+        return None
+
+    trailing = int(tracked[np.lexsort((events["minimum_separation_times"][tracked], minimum_separations[tracked]))[0]])
+
+    return TrafficSeparation.model_construct(
+        leading_capsule=int(order[trailing - 1]),
+        trailing_capsule=int(order[trailing]),
+        separation_m=float(minimum_separations[trailing]),
+        time_s=float(events["minimum_separation_times"][trailing]),
+        position_m=float(events["minimum_separation_positions"][trailing]),
+        caught_up=bool(not np.isnan(events["catch_up_times"][trailing])),
+    )
+
+
+def get_throughput(launch_times: np.ndarray, arrival_times: np.ndarray) -> float | None:
+    duration = arrival_times.max() - launch_times.min()
+
+    return float(len(launch_times) / duration) if duration > 0 else None
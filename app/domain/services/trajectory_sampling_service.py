@@ -0,0 +1,40 @@
+import os
+
+import numpy as np
+
+from app.database.models import SimulationRun
+from app.domain.services.segments_service import rebuild_segment_table
+from app.domain.utils.trajectory_sampling_utils import TRAJECTORY_CHANNELS, evaluate_segment_table, get_lttb_indices, get_uniform_sample_times
+
+# Sampling configuration with environment variable support
+SIMULATION_SAMPLE_MAX_POINTS = int(os.getenv("SIMULATION_SAMPLE_MAX_POINTS", 1_000_000))
+
+
+def sample_simulation_run(simulation_run: SimulationRun, dt: float | None = None, points: int | None = None, max_points: int | None = None, lttb_channel: str = "velocity_mps") -> dict[str, np.ndarray]:
+    """
+    Columnar trajectory of a recorded run at the requested resolution, exactly one of:
+    - dt: a sample every dt seconds
+    - points: that many samples evenly spread over the run
+    - max_points: at most that many of the run's segment boundaries, picked by LTTB on lttb_channel
+    Every sample is evaluated in closed form within its segment, so positions inside acceleration segments are exact.
+    """
+    if sum(option is not None for option in (dt, points, max_points)) != 1:
+        raise ValueError("Give exactly one of dt, points or max_points")
+
+    if lttb_channel not in TRAJECTORY_CHANNELS:
+        raise ValueError(f"Unknown trajectory channel {lttb_channel}, expected one of {', '.join(TRAJECTORY_CHANNELS)}")
+
+    segment_table = rebuild_segment_table(simulation_run.system_details)
+    total_travel_time = float(segment_table.start_time[-1] + segment_table.traverse_time[-1])
+
+    if max_points is not None:
+        samples = evaluate_segment_table(segment_table, segment_table.start_time)
+        indices = get_lttb_indices(samples["t_s"], samples[lttb_channel], max_points)
+
+        return {channel: values[indices] for channel, values in samples.items()}
+
+    sample_count = int(total_travel_time // dt) + 2 if dt is not None else points
+    if sample_count > SIMULATION_SAMPLE_MAX_POINTS:
+        raise ValueError(f"Sampling would return {sample_count} points, the limit is {SIMULATION_SAMPLE_MAX_POINTS}")
+
+    return evaluate_segment_table(segment_table, get_uniform_sample_times(total_travel_time, dt, points))
@@ -1,104 +1,36 @@
+from app.data_access.jsonl_entity_store import get_entity_store
 from app.domain.entities.tube import Tube
-import os, json
-from pathlib import Path
-import tempfile
 
 
 def read_all_tubes():
-    tubes = []
-    try:
-        with open(Tube.DATABASE_FILE_PATH, "r", encoding="utf-8") as f:
-            for line in f:
-                if line.strip():
-                    tubes.append(json.loads(line))
-    except FileNotFoundError:
-        pass
-    return tubes
+    return get_entity_store(Tube.DATABASE_FILE_PATH).all()
 
 
 def delete_tube_by_id(tube_id: int) -> bool:
-    if not Tube.DATABASE_FILE_PATH.exists():
-        return False
+    return get_entity_store(Tube.DATABASE_FILE_PATH).delete(tube_id)
 
-    found = False
-    lines_to_keep = []
 
-    with open(Tube.DATABASE_FILE_PATH, "r", encoding="utf-8") as f:
-        for line in f:
-            if not line.strip():
-                continue
-            record = json.loads(line)
-            if record.get("id") == tube_id:
-                found = True
-                continue  # skip adding this one
-            lines_to_keep.append(line)
-
-    if found:
-        with open(Tube.DATABASE_FILE_PATH, "w", encoding="utf-8") as f:
-            f.writelines(lines_to_keep)
+def get_tube_by_id(tube_id: int) -> Tube | None:
+    record = get_entity_store(Tube.DATABASE_FILE_PATH).get(tube_id)
+    if record is None:
+        return None
 
-    return found
+    return Tube(tube_id=record["id"], length=record["length"], save_to_file=False)
 
 
-def get_tube_by_id(tube_id: int) -> Tube | None:
-    if not Tube.DATABASE_FILE_PATH.exists():
-        return None
+def get_tubes_by_ids(tube_ids: list[int]) -> dict[int, Tube]:
+    """Resolve many tubes in one pass over the index. Tubes that are not found are left out."""
+    records = get_entity_store(Tube.DATABASE_FILE_PATH).get_many(tube_ids)
 
-    with open(Tube.DATABASE_FILE_PATH, "r", encoding="utf-8") as f:
-        for line in f:
-            s = line.strip()
-            if not s:
-                continue
-            try:
-                record = json.loads(s)
-            except json.JSONDecodeError:
-                continue
-            if record.get("id") == tube_id:
-                return Tube(tube_id=record["id"], length=record["length"], save_to_file=False)
-    return None
+    return {tube_id: Tube(tube_id=record["id"], length=record["length"], save_to_file=False) for tube_id, record in records.items()}
 
 
 def update_tube_by_id(tube_id: int, new_length: float) -> Tube | None:
     """
     Replace the record with id == tube_id. Returns the updated Tube or None if not found.
-    Uses an atomic write (temp file + replace) to avoid corruption.
     """
-    if not Tube.DATABASE_FILE_PATH.exists():
+    updated_record = get_entity_store(Tube.DATABASE_FILE_PATH).update(tube_id, {"length": new_length})
+    if updated_record is None:
         return None
 
-    found = False
-    updated_record = None
-
-    Tube.DATABASE_FILE_PATH.parent.mkdir(parents=True, exist_ok=True)
-    with tempfile.NamedTemporaryFile("w", delete=False, dir=str(Tube.DATABASE_FILE_PATH.parent), encoding="utf-8") as tmp:
-        tmp_path = Path(tmp.name)
-        with open(Tube.DATABASE_FILE_PATH, "r", encoding="utf-8") as src:
-            for line in src:
-                s = line.strip()
-                if not s:
-                    continue
-                try:
-                    rec = json.loads(s)
-                except json.JSONDecodeError:
-                    # keep malformed lines as-is to avoid data loss
-                    tmp.write(line)
-                    continue
-
-                if rec.get("id") == tube_id:
-                    rec["length"] = new_length
-                    found = True
-                    updated_record = rec
-
-                tmp.write(json.dumps(rec, ensure_ascii=False) + "\n")
-
-    if not found:
-        # no change; remove temp file
-        try:
-            tmp_path.unlink(missing_ok=True)
-        finally:
-            return None
-
-    # atomic replace
-    os.replace(tmp_path, Tube.DATABASE_FILE_PATH)
-
-    return Tube(tube_id=updated_record["id"], length=updated_record["length"], save_to_file=False)
\ No newline at end of file
+    return Tube(tube_id=updated_record["id"], length=updated_record["length"], save_to_file=False)
@@ -1,17 +1,131 @@
-import gzip
+import os
+import zlib
 from datetime import datetime, timezone
+from typing import Iterable, Iterator
 
+from pydantic import BaseModel
 
-def compress_json(json_content: str) -> tuple[bytes, dict]:
-    json_content = json_content.model_dump_json(indent=2)
-    
+from app.domain.schemas.simulation_schemas import ContentEncoding
+
+# Compression configuration with environment variable support
+RESULT_COMPRESSION_LEVEL = int(os.getenv("RESULT_COMPRESSION_LEVEL", 6))
+
+# wbits=31 makes zlib write a gzip header and trailer, wbits=15 a zlib (HTTP "deflate") header and trailer
+ENCODING_WBITS = {
+    ContentEncoding.GZIP: 31,
+    ContentEncoding.DEFLATE: 15,
+}
+
+# Preferred encodings when the client accepts several with the same quality
+ENCODING_PREFERENCE = (ContentEncoding.GZIP, ContentEncoding.DEFLATE, ContentEncoding.IDENTITY)
+
+
+class EncodingNotAcceptableError(ValueError):
+    """The client's Accept-Encoding rules out every supported encoding"""
+
+
+def compress_json(model: BaseModel, encoding: ContentEncoding | None = None, compression_level: int | None = None) -> tuple[bytes, dict]:
+    """
+    Serialize a result as compact JSON and compress it.
+    Without a negotiated encoding the result is a gzip file attachment; with one, the body is sent with that
+    Content-Encoding, so HTTP clients decode it transparently.
+    """
+    return encode_json(model.model_dump_json().encode('utf-8'), encoding, compression_level)
+
+
+def encode_json(json_content: bytes, encoding: ContentEncoding | None = None, compression_level: int | None = None) -> tuple[bytes, dict]:
+    """Compress serialized JSON with the negotiated encoding (a gzip attachment without one), with its headers"""
+    compressor = get_compressor(encoding or ContentEncoding.GZIP, compression_level)
+    content = compressor.compress(json_content) + compressor.flush() if compressor else json_content
+
+    return content, get_result_file_headers(encoding=encoding)
+
+
+def compress_json_stream(json_fragments: Iterable[str], encoding: ContentEncoding | None = None, compression_level: int | None = None) -> Iterator[bytes]:
+    """
+    Compress a JSON document given as consecutive text fragments, yielding compressed bytes as each fragment arrives.
+    Every fragment is sync-flushed, so a reader can decompress everything received so far.
+    """
+    compressor = get_compressor(encoding or ContentEncoding.GZIP, compression_level)
+
+    for json_fragment in json_fragments:
+        if compressor:
+            yield compressor.compress(json_fragment.encode('utf-8')) + compressor.flush(zlib.Z_SYNC_FLUSH)
+        else:
+            yield json_fragment.encode('utf-8')
+
+    if compressor:
+        yield compressor.flush()
+
+
+def get_compressor(encoding: ContentEncoding, compression_level: int | None = None):
+    """zlib compressor writing the framing of the encoding, or None for identity"""
+    if encoding == ContentEncoding.IDENTITY:
+        return None
+
+    level = RESULT_COMPRESSION_LEVEL if compression_level is None else compression_level
+
+    return zlib.compressobj(level, zlib.DEFLATED, ENCODING_WBITS[encoding])
+
+
+def negotiate_content_encoding(accept_encoding: str | None) -> ContentEncoding | None:
+    """
+    Pick the encoding of a result from the Accept-Encoding header: the highest quality supported encoding,
+    ties following ENCODING_PREFERENCE. None when the header is absent, which keeps the
+    gzip attachment. Identity is acceptable unless the client rules it out.
+    """
+    if accept_encoding is None:
+        return None
+
+    qualities = {}
+    for coding in accept_encoding.split(","):
+        name, *parameters = [part.strip() for part in coding.split(";")]
+
+        quality = 1.0
+        for parameter in parameters:
+            key, _, value = parameter.partition("=")
+            if key.strip() == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+
+        if name:
+            qualities[name.lower()] = quality
+
+    wildcard_quality = qualities.get("*")
+    candidates = []
+    for preference, encoding in enumerate(ENCODING_PREFERENCE):
+        quality = qualities.get(encoding.value, wildcard_quality)
+        if quality is None and encoding == ContentEncoding.IDENTITY:
+            quality = 0.001  # identity is implicitly acceptable, at the lowest priority
+
+        if quality:
+            candidates.append((-quality, preference, encoding))
+
+    if not candidates:
+        raise EncodingNotAcceptableError(f"None of the accepted encodings is supported: {accept_encoding}")
+
+    return min(candidates)[2]
+
+
+def get_result_file_headers(extension: str = "json", encoding: ContentEncoding | None = None) -> dict:
     timestamp = datetime.now(timezone.utc).strftime('%Y-%m-%d_%H-%M-%S')
-    
-    compressed_content = gzip.compress(json_content.encode('utf-8'))
-    filename = f"simulation_result_{timestamp}.json.gz"
+
+    if encoding is None:
+        return {
+            "Content-Disposition": f'attachment; filename="simulation_result_{timestamp}.{extension}.gz"',
+            "Content-Type": "application/gzip",
+            "X-Result-Encoding": ContentEncoding.GZIP.value,
+        }
+
     headers = {
-        "Content-Disposition": f'attachment; filename="{filename}"',
-        "Content-Type": "application/gzip"
+        "Content-Disposition": f'attachment; filename="simulation_result_{timestamp}.{extension}"',
+        "Content-Type": "application/x-ndjson" if extension == "ndjson" else "application/json",
+        "X-Result-Encoding": encoding.value,
+        "Vary": "Accept-Encoding",
     }
+    if encoding != ContentEncoding.IDENTITY:
+        headers["Content-Encoding"] = encoding.value
 
-    return compressed_content, headers
\ No newline at end of file
+    return headers
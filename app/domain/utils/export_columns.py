@@ -0,0 +1,146 @@
+import io
+import json
+from datetime import datetime, timezone
+
+import numpy as np
+
+from app.domain.schemas.simulation_schemas import ExportFormat
+
+EXPORT_MEDIA_TYPES = {
+    ExportFormat.ARROW: "application/vnd.apache.arrow.stream",
+    ExportFormat.PARQUET: "application/vnd.apache.parquet",
+    ExportFormat.NPZ: "application/x-npz",
+}
+
+EXPORT_FILE_EXTENSIONS = {
+    ExportFormat.ARROW: "arrows",
+    ExportFormat.PARQUET: "parquet",
+    ExportFormat.NPZ: "npz",
+}
+
+# Media types that keep the default JSON result
+JSON_MEDIA_TYPES = ("application/json", "application/gzip", "*/*")
+
+PYARROW_FORMATS = (ExportFormat.ARROW, ExportFormat.PARQUET)
+
+
+def negotiate_export_format(requested_format: ExportFormat | None, accept: str | None) -> ExportFormat:
+    """
+    An explicitly requested format wins; otherwise the first supported media type of the Accept header,
+    by quality, is used. Anything else keeps the default JSON result.
+    """
+    if requested_format is not None:
+        if requested_format in PYARROW_FORMATS and not is_pyarrow_available():
+            raise ValueError(f"The {requested_format.value} format needs the optional pyarrow package, which is not installed")
+
+        return requested_format
+
+    for media_type in get_accepted_media_types(accept):
+        if media_type in JSON_MEDIA_TYPES:
+            return ExportFormat.JSON
+
+        for export_format, export_media_type in EXPORT_MEDIA_TYPES.items():
+            if media_type == export_media_type and (export_format not in PYARROW_FORMATS or is_pyarrow_available()):
+                return export_format
+
+    return ExportFormat.JSON
+
+
+def get_accepted_media_types(accept: str | None) -> list[str]:
+    """Media types of an Accept header, highest quality first; types with q=0 are left out"""
+    if not accept:
+        return []
+
+    weighted_media_types = []
+    for media_range in accept.split(","):
+        media_type, *parameters = [part.strip() for part in media_range.split(";")]
+
+        quality = 1.0
+        for parameter in parameters:
+            name, _, value = parameter.partition("=")
+            if name.strip() == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+
+        if media_type and quality > 0:
+            weighted_media_types.append((quality, media_type.lower()))
+
+    # sorted is stable, so equally weighted types keep the client's order
+    return [media_type for _, media_type in sorted(weighted_media_types, key=lambda weighted: -weighted[0])]
+
+
+def is_pyarrow_available() -> bool:
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        return False
+
+    return True
+
+
+def export_columns(columns: dict[str, np.ndarray | list], export_format: ExportFormat, metadata: dict[str, str | int | float]) -> tuple[bytes, dict]:
+    """
+    Write one columnar table in a binary format. Numeric columns are written as little-endian arrays without
+    going through text, so a client loads them without parsing. The metadata is stored with the table.
+    """
+    if export_format == ExportFormat.NPZ:
+        content = write_npz(columns, metadata)
+    elif export_format in PYARROW_FORMATS:
+        content = write_arrow(columns, export_format, metadata)
+    else:
+        raise ValueError(f"Unsupported export format: {export_format.value}")
+
+    return content, get_export_file_headers(export_format)
+
+
+def write_npz(columns: dict[str, np.ndarray | list], metadata: dict[str, str | int | float]) -> bytes:
+    """Uncompressed npz: one .npy member per column plus the metadata as a JSON string"""
+    arrays = {name: to_numpy_column(values) for name, values in columns.items()}
+
+    buffer = io.BytesIO()
+    np.savez(buffer, metadata=np.array(json.dumps(metadata)), **arrays)
+
+    return buffer.getvalue()
+
+
+def to_numpy_column(values: np.ndarray | list) -> np.ndarray:
+    """Little-endian array of a column; missing values of numeric columns become NaN"""
+    array = np.asarray(values)
+
+    if array.dtype == object:
+        array = np.array([np.nan if value is None else value for value in values], dtype=np.float64)
+
+    return array.astype(array.dtype.newbyteorder("<"), copy=False)
+
+
+def write_arrow(columns: dict[str, np.ndarray | list], export_format: ExportFormat, metadata: dict[str, str | int | float]) -> bytes:
+    """Arrow IPC stream or Parquet file of the columns; pyarrow is imported only when one of them is requested"""
+    import pyarrow as pa
+
+    table = pa.table(
+        {name: pa.array(values) for name, values in columns.items()},
+        metadata={name: str(value) for name, value in metadata.items()},
+    )
+
+    sink = pa.BufferOutputStream()
+
+    if export_format == ExportFormat.PARQUET:
+        import pyarrow.parquet as pq
+        pq.write_table(table, sink)
+    else:
+        with pa.ipc.new_stream(sink, table.schema) as writer:
+            writer.write_table(table)
+
+    return sink.getvalue().to_pybytes()
+
+
+def get_export_file_headers(export_format: ExportFormat) -> dict:
+    timestamp = datetime.now(timezone.utc).strftime('%Y-%m-%d_%H-%M-%S')
+    filename = f"simulation_result_{timestamp}.{EXPORT_FILE_EXTENSIONS[export_format]}"
+
+    return {
+        "Content-Disposition": f'attachment; filename="{filename}"',
+        "Content-Type": EXPORT_MEDIA_TYPES[export_format]
+    }
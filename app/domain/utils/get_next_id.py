@@ -1,27 +1,49 @@
-import json
+import os
 from pathlib import Path
 
+from app.data_access.jsonl_entity_store import entity_file_lock, read_max_id
+
 
 def get_next_id(path: Path) -> int:
     """
-    Get the next available ID by finding the maximum ID in the file and adding 1.
+    Allocate the next available ID for the entity file at path.
+    """
+    return reserve_ids(path, 1).start
+
+
+def reserve_ids(path: Path, count: int) -> range:
     """
+    Reserve a block of count consecutive IDs for the entity file at path.
+
+    The high-water mark is persisted next to the entity file (<file>.seq) and advanced under an exclusive
+    lock on <file>.lock, so allocation is O(1) and IDs are never handed out twice, across threads, processes
+    and uvicorn workers. IDs of deleted entities are not reused.
+    A missing mark is seeded once, under the same lock, from the highest id in the entity file; from then on
+    the mark alone is trusted.
+    """
+    sequence_path = path.with_name(path.name + ".seq")
+
+    with entity_file_lock(path):
+        high_water_mark = read_high_water_mark(sequence_path)
+        if high_water_mark is None:
+            # Read from the file directly: the store takes its own lock before the file lock, never after it
+            high_water_mark = read_max_id(path)
+
+        write_high_water_mark(sequence_path, high_water_mark + count)
+
+    return range(high_water_mark + 1, high_water_mark + 1 + count)
+
+
+def read_high_water_mark(sequence_path: Path) -> int | None:
+    """The persisted high-water mark, or None when there is none yet (or it is unreadable)"""
     try:
-        if not path.exists():
-            return 1
-            
-        max_id = 0
-        with open(path, "r", encoding="utf-8") as f:
-            for line in f:
-                line = line.strip()
-                if line:
-                    try:
-                        record = json.loads(line)
-                        if "id" in record and isinstance(record["id"], int):
-                            max_id = max(max_id, record["id"])
-                    except json.JSONDecodeError:
-                        continue  # Skip malformed lines
-        
-        return max_id + 1
-    except Exception:
-        return 1
\ No newline at end of file
+        return int(sequence_path.read_text(encoding="utf-8").strip())
+    except (FileNotFoundError, ValueError):
+        return None
+
+
+def write_high_water_mark(sequence_path: Path, high_water_mark: int) -> None:
+    # atomic replace, so a crash never leaves a truncated mark behind
+    tmp_path = sequence_path.with_name(sequence_path.name + ".tmp")
+    tmp_path.write_text(str(high_water_mark), encoding="utf-8")
+    os.replace(tmp_path, sequence_path)
@@ -0,0 +1,106 @@
+import math
+
+import numpy as np
+
+# Default quantum of each trajectory channel, well below the precision the physics inputs are given with
+DEFAULT_TRAJECTORY_QUANTA = {
+    "t_s": 1e-6,
+    "position_m": 1e-4,
+    "velocity_mps": 1e-4,
+    "acceleration_mps2": 1e-4,
+    "force_applied_n": 1e-3,
+    "total_energy_consumed_j": 1e-3,
+}
+
+# Monotonic channels, whose consecutive differences are small and repetitive
+DELTA_ENCODED_CHANNELS = ("t_s", "position_m", "total_energy_consumed_j")
+
+# Largest magnitude of an encoded integer: every integer up to 2**53 stays exact in JSON clients parsing numbers as doubles
+MAX_QUANTIZED_INTEGER = 2**53
+
+
+def get_trajectory_quanta(trajectory_quanta: dict[str, float] | None) -> dict[str, float]:
+    """Default quanta overridden by the requested ones"""
+    quanta = dict(DEFAULT_TRAJECTORY_QUANTA)
+
+    for channel, quantum in (trajectory_quanta or {}).items():
+        if channel not in DEFAULT_TRAJECTORY_QUANTA:
+            raise ValueError(f"Unknown trajectory channel {channel}, expected one of {', '.join(DEFAULT_TRAJECTORY_QUANTA)}")
+
+        if not quantum > 0 or not math.isfinite(quantum):
+            raise ValueError(f"Quantum of {channel} must be positive and finite")
+
+        quanta[channel] = float(quantum)
+
+    return quanta
+
+
+def parse_trajectory_quanta(trajectory_quanta: str | None) -> dict[str, float] | None:
+    """Parse quanta given as a query string of channel:quantum pairs, e.g. "t_s:1e-6,position_m:1e-3" """
+    if not trajectory_quanta:
+        return None
+
+    quanta = {}
+    for pair in trajectory_quanta.split(","):
+        channel, _, quantum = pair.partition(":")
+        try:
+            quanta[channel.strip()] = float(quantum)
+        except ValueError:
+            raise ValueError(f"Invalid trajectory quantum {pair!r}, expected channel:quantum")
+
+    return quanta
+
+
+def quantize_trajectories(columns: dict[str, np.ndarray | list], trajectory_quanta: dict[str, float] | None = None) -> dict[str, dict | list]:
+    """
+    Encode columnar trajectories as fixed-point integers: each value becomes round(value / quantum) of its channel,
+    so it is off by at most half a quantum. DELTA_ENCODED_CHANNELS are then replaced by the differences between
+    consecutive integers. Values are rounded before differencing, so decoding never accumulates rounding error.
+    Channels missing from the columns are left out of the quanta.
+    """
+    quanta = get_trajectory_quanta(trajectory_quanta)
+
+    encoded = {
+        "quanta": {channel: quanta[channel] for channel in columns},
+        "delta_encoded": [channel for channel in DELTA_ENCODED_CHANNELS if channel in columns],
+    }
+
+    for channel, values in columns.items():
+        scaled = np.rint(np.asarray(values, dtype=np.float64) / quanta[channel])
+        # Checked before the cast, which would silently wrap around (or turn NaN into garbage)
+        verify_quantized_integers(channel, scaled, quanta[channel])
+        integers = scaled.astype(np.int64)
+
+        if channel in DELTA_ENCODED_CHANNELS:
+            integers = np.diff(integers, prepend=0)
+            verify_quantized_integers(channel, integers, quanta[channel])
+
+        encoded[channel] = integers.tolist()
+
+    return encoded
+
+
+def verify_quantized_integers(channel: str, integers: np.ndarray, quantum: float) -> None:
+    if not np.all(np.isfinite(integers)):
+        raise ValueError(f"{channel} has values that are not finite, which cannot be quantized")
+
+    if not np.all(np.abs(integers) <= MAX_QUANTIZED_INTEGER):
+        raise ValueError(f"Quantum {quantum} of {channel} is too small for its values, which would exceed 2**53 quanta")
+
+
+def dequantize_trajectories(encoded: dict[str, dict | list]) -> dict[str, np.ndarray]:
+    """
+    Reference decoder of quantize_trajectories: a running sum restores the integers of delta encoded channels,
+    and each integer times the channel's quantum gives back the value.
+    """
+    columns = {}
+
+    for channel, quantum in encoded["quanta"].items():
+        integers = np.asarray(encoded[channel], dtype=np.int64)
+
+        if channel in encoded["delta_encoded"]:
+            integers = np.cumsum(integers)
+
+        columns[channel] = integers * quantum
+
+    return columns
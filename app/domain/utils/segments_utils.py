@@ -1,17 +1,18 @@
 from app.domain.entities.acceleration_segment import AccelerationSegment
 from app.domain.entities.capsule import Capsule
 from app.domain.entities.constant_velocity_segment import ConstantVelocitySegment
+from app.domain.entities.simulation_context import SimulationContext
 from app.domain.entities.tube import Tube
 from app.domain.entities.system_coil import SystemCoil
 from app.domain.utils.physics_utils import get_traverse_time_for_constant_velocity, get_acceleration, get_final_velocity, get_traverse_time_for_acceleration
 from app.domain.services.engagement_events_service import engagement_event_log
 
-def run_first_segment(system_coils: list[SystemCoil], capsule: Capsule, tube: Tube) -> ConstantVelocitySegment:
-    engagement_event_log(0.0, "run_start", velocity_mps=capsule.initial_velocity, position_m=0)
+def run_first_segment(context: SimulationContext | None, system_coils: list[SystemCoil], capsule: Capsule, tube: Tube) -> ConstantVelocitySegment:
+    engagement_event_log(context, 0.0, "run_start", velocity_mps=capsule.initial_velocity, position_m=0)
 
     if len(system_coils) == 0:
         return ConstantVelocitySegment(
-                id=1, 
+                segment_id=1, 
                 traverse_time=get_traverse_time_for_constant_velocity(capsule.initial_velocity, tube.length),
                 start_time=0, 
                 length=tube.length, 
@@ -27,7 +28,7 @@ def run_first_segment(system_coils: list[SystemCoil], capsule: Capsule, tube: Tu
 
         time_to_reach_first_coil = get_traverse_time_for_constant_velocity(capsule.initial_velocity, first_coil.position)
         
-        engagement_event_log(time_to_reach_first_coil, "coil_enter", coil_id=first_coil_id, position_m=first_coil.position, velocity_mps=capsule.initial_velocity)
+        engagement_event_log(context, time_to_reach_first_coil, "coil_enter", coil_id=first_coil_id, position_m=first_coil.position, velocity_mps=capsule.initial_velocity)
 
         return ConstantVelocitySegment(
                 segment_id=1, 
@@ -40,7 +41,7 @@ def run_first_segment(system_coils: list[SystemCoil], capsule: Capsule, tube: Tu
             )
 
 
-def run_constant_velocity_segment(acceleration_coil: SystemCoil, next_coil: SystemCoil | None, tube: Tube, current_velocity: float, time_so_far: float, segment_id: int) -> ConstantVelocitySegment:
+def run_constant_velocity_segment(context: SimulationContext | None, acceleration_coil: SystemCoil, next_coil: SystemCoil | None, tube: Tube, current_velocity: float, time_so_far: float, segment_id: int) -> ConstantVelocitySegment:
     prev_coil_end_position = acceleration_coil.position + acceleration_coil.coil.length
     seg_len = (
         next_coil.position + round(next_coil.coil.length / 2, 6) - prev_coil_end_position
@@ -62,12 +63,12 @@ def run_constant_velocity_segment(acceleration_coil: SystemCoil, next_coil: Syst
     if next_coil is not None:
         dist_to_next_coil = next_coil.position - prev_coil_end_position
         time_to_reach_next_coil = get_traverse_time_for_constant_velocity(current_velocity, dist_to_next_coil)
-        engagement_event_log(time_so_far + time_to_reach_next_coil, "coil_enter", coil_id=next_coil.coil_id, position_m=next_coil.position, velocity_mps=current_velocity)
+        engagement_event_log(context, time_so_far + time_to_reach_next_coil, "coil_enter", coil_id=next_coil.coil_id, position_m=next_coil.position, velocity_mps=current_velocity)
 
     return constant_velocity_segment
 
 
-def run_acceleration_segment(system_coil: SystemCoil, capsule: Capsule, current_velocity: float, time_so_far: float, segment_id: int) -> AccelerationSegment:
+def run_acceleration_segment(context: SimulationContext | None, system_coil: SystemCoil, capsule: Capsule, current_velocity: float, time_so_far: float, segment_id: int) -> AccelerationSegment:
     middle_coil_position = system_coil.position + round(system_coil.coil.length / 2, 6)
     end_coil_position = system_coil.position + system_coil.coil.length
 
@@ -77,8 +78,8 @@ def run_acceleration_segment(system_coil: SystemCoil, capsule: Capsule, current_
     traverse_time = get_traverse_time_for_acceleration(current_velocity, final_velocity, acceleration)
     energy_consumed = system_coil.coil.force_applied * acceleration_segment_length
 
-    engagement_event_log(time_so_far, "coil_midpoint_accel", coil_id=system_coil.coil_id, velocity_mps=current_velocity, acceleration_mps2=acceleration, force_applied_n=system_coil.coil.force_applied, position_m=middle_coil_position)
-    engagement_event_log(time_so_far + traverse_time, "coil_exit", coil_id=system_coil.coil_id, velocity_mps=final_velocity, acceleration_duration_s=traverse_time, acceleration_segment_length_m=acceleration_segment_length, energy_consumed_j=energy_consumed, position_m=end_coil_position)
+    engagement_event_log(context, time_so_far, "coil_midpoint_accel", coil_id=system_coil.coil_id, velocity_mps=current_velocity, acceleration_mps2=acceleration, force_applied_n=system_coil.coil.force_applied, position_m=middle_coil_position)
+    engagement_event_log(context, time_so_far + traverse_time, "coil_exit", coil_id=system_coil.coil_id, velocity_mps=final_velocity, acceleration_duration_s=traverse_time, acceleration_segment_length_m=acceleration_segment_length, energy_consumed_j=energy_consumed, position_m=end_coil_position)
 
     acceleration_segment = AccelerationSegment(
         segment_id=segment_id,
@@ -96,8 +97,8 @@ def run_acceleration_segment(system_coil: SystemCoil, capsule: Capsule, current_
     return acceleration_segment
 
 
-def run_last_segment(last_coil: SystemCoil, tube: Tube, current_velocity: float, time_so_far: float, segment_id: int) -> ConstantVelocitySegment:
-    engagement_event_log(time_so_far, "run_end", position_m=tube.length, velocity_mps=current_velocity)
+def run_last_segment(context: SimulationContext | None, last_coil: SystemCoil, tube: Tube, current_velocity: float, time_so_far: float, segment_id: int) -> ConstantVelocitySegment:
+    engagement_event_log(context, time_so_far, "run_end", position_m=tube.length, velocity_mps=current_velocity)
 
     constant_velocity_segment = ConstantVelocitySegment(
         segment_id=segment_id + 1,
@@ -0,0 +1,184 @@
+import heapq
+import math
+
+import numpy as np
+
+# Segment entered by an event: coil_enter events leave the capsule in its segment, arrival takes it out of the tube
+COIL_ENTER_EVENT = -1
+ARRIVAL_EVENT = -2
+
+
+def get_traffic_event_arrays(batch: dict[str, np.ndarray], launch_times: np.ndarray, initial_velocities: np.ndarray) -> dict[str, np.ndarray]:
+    """
+    Event timeline and motion segments of every capsule, from the output of compute_batch_coil_pass_arrays.
+    Each capsule has the events [launch, coil_enter_0, midpoint_0, exit_0, coil_enter_1, ..., arrival] on the run's clock,
+    and the segments [first, accel_0, const_0, accel_1, const_1, ...] started by its launch, midpoint and exit events.
+    """
+    capsule_count, coil_count = batch["exit_velocities"].shape
+
+    coil_event_times = np.stack((batch["coil_enter_times"], batch["acceleration_start_times"], batch["constant_velocity_start_times"]), axis=-1)
+    event_times = np.concatenate((
+        np.zeros((capsule_count, 1)),
+        coil_event_times.reshape(capsule_count, 3 * coil_count),
+        batch["total_travel_times"][:, None],
+    ), axis=1) + launch_times[:, None]
+
+    coil_event_segments = np.stack((np.full(coil_count, COIL_ENTER_EVENT), 2 * np.arange(coil_count) + 1, 2 * np.arange(coil_count) + 2), axis=-1)
+    event_segments = np.concatenate(([0], coil_event_segments.ravel(), [ARRIVAL_EVENT]))
+
+    segment_positions = np.concatenate(([0.0], np.stack((batch["middle_positions"], batch["end_positions"]), axis=-1).ravel()))
+    # Without coils the batch still carries the initial velocity as an entry velocity column
+    entry_velocities = np.concatenate((
+        initial_velocities[:, None],
+        np.stack((batch["entry_velocities"][:, :coil_count], batch["exit_velocities"]), axis=-1).reshape(capsule_count, 2 * coil_count),
+    ), axis=1)
+    accelerations = np.concatenate((
+        np.zeros((capsule_count, 1)),
+        np.stack((batch["accelerations"], np.zeros((capsule_count, coil_count))), axis=-1).reshape(capsule_count, 2 * coil_count),
+    ), axis=1)
+
+    return {
+        "event_times": event_times,
+        "event_segments": event_segments,
+        "segment_positions": segment_positions,
+        "entry_velocities": entry_velocities,
+        "accelerations": accelerations,
+    }
+
+
+def run_traffic_events(event_times: np.ndarray, event_segments: np.ndarray, segment_positions: np.ndarray, entry_velocities: np.ndarray, accelerations: np.ndarray) -> dict[str, np.ndarray | int]:
+    """
+    Discrete-event run of capsules sharing a tube, capsules sorted by launch time.
+    A heap holds the next event of every capsule, so each event costs O(log n). Capsule i follows capsule i - 1:
+    between two events of either of them, both move in a fixed segment, so their gap is a quadratic in time whose
+    minimum and first zero are found in closed form when one of them starts a new segment.
+
+    Capsules do not push on each other, so a trailing capsule that catches up would pass through the leading one.
+    A pair is followed until that catch-up only: its gap never goes negative.
+
+    Returns the event count and, for every capsule i > 0, the smallest gap to capsule i - 1 with its time and the
+    position of capsule i there (NaN when the two are never in the tube together), and the time and position at which
+    capsule i catches up with capsule i - 1 (NaN when it does not; the smallest gap is then 0, reached at the catch-up).
+    """
+    capsule_count, event_count = event_times.shape
+    event_segment_list = event_segments.tolist()
+    event_time = event_times.item
+
+    # Motion of each capsule in its current segment as (t0, x0, v0, a): x = x0 + v0·τ + a·τ²/2 with τ = t - t0,
+    # None while the capsule is outside the tube
+    motions = [None] * capsule_count
+
+    # Pair i is (capsule i - 1 leading, capsule i trailing); its gap has been checked up to pair_checked_until[i]
+    pair_checked_until = [0.0] * capsule_count
+    minimum_separations = [np.nan] * capsule_count
+    minimum_separation_times = [np.nan] * capsule_count
+    minimum_separation_positions = [np.nan] * capsule_count
+    catch_up_times = [np.nan] * capsule_count
+    catch_up_positions = [np.nan] * capsule_count
+
+    def check_pair(pair: int, time: float) -> None:
+        if not math.isnan(catch_up_times[pair]):
+            return  # caught up already, the pair is no longer followed
+
+        leading_motion, trailing_motion = motions[pair - 1], motions[pair]
+        since = pair_checked_until[pair]
+        pair_checked_until[pair] = time
+
+        # Trailing position, and the gap as gap + closing_velocity·τ + closing_acceleration·τ²/2 with τ = t - since
+        trailing_start_time, trailing_start_position, trailing_velocity, trailing_acceleration = trailing_motion
+        elapsed = since - trailing_start_time
+        trailing_position = trailing_start_position + trailing_velocity * elapsed + trailing_acceleration * elapsed * elapsed / 2
+        trailing_velocity += trailing_acceleration * elapsed
+
+        leading_start_time, leading_start_position, leading_velocity, leading_acceleration = leading_motion
+        elapsed = since - leading_start_time
+        # Up to the catch-up the gap is non-negative; anything below is rounding
+        gap = max(leading_start_position + leading_velocity * elapsed + leading_acceleration * elapsed * elapsed / 2 - trailing_position, 0.0)
+        closing_velocity = leading_velocity + leading_acceleration * elapsed - trailing_velocity
+        closing_acceleration = leading_acceleration - trailing_acceleration
+
+        interval = time - since
+        catch_up = get_catch_up_elapsed(gap, closing_velocity, closing_acceleration)
+        if catch_up is not None and catch_up <= interval:
+            interval = catch_up
+
+        candidates = (0.0, interval)
+        # The gap is convex when the leader accelerates harder; its vertex may fall inside the interval
+        if closing_acceleration > 0 and 0 < -closing_velocity / closing_acceleration < interval:
+            candidates += (-closing_velocity / closing_acceleration,)
+
+        for elapsed in candidates:
+            separation = gap + closing_velocity * elapsed + closing_acceleration * elapsed * elapsed / 2
+            if catch_up is not None and elapsed == catch_up:
+                separation = 0.0
+
+            if not separation >= minimum_separations[pair]:
+                minimum_separations[pair] = separation
+                minimum_separation_times[pair] = since + elapsed
+                minimum_separation_positions[pair] = trailing_position + trailing_velocity * elapsed + trailing_acceleration * elapsed * elapsed / 2
+
+        if interval == catch_up:
+            catch_up_times[pair] = since + catch_up
+            catch_up_positions[pair] = trailing_position + trailing_velocity * catch_up + trailing_acceleration * catch_up * catch_up / 2
+
+    heap = [(event_time(capsule, 0), capsule, 0) for capsule in range(capsule_count)]
+    heapq.heapify(heap)
+    last_event = event_count - 1
+    processed = 0
+
+    while heap:
+        time, capsule, event = heap[0]
+        segment = event_segment_list[event]
+        processed += 1
+
+        if segment != COIL_ENTER_EVENT:
+            # Close the gaps of both pairs of the capsule over the segment it is leaving
+            if motions[capsule] is not None:
+                if capsule > 0 and motions[capsule - 1] is not None:
+                    check_pair(capsule, time)
+                if capsule + 1 < capsule_count and motions[capsule + 1] is not None:
+                    check_pair(capsule + 1, time)
+
+            if segment == ARRIVAL_EVENT:
+                motions[capsule] = None
+            else:
+                motions[capsule] = (time, segment_positions.item(segment), entry_velocities.item(capsule, segment), accelerations.item(capsule, segment))
+
+                if segment == 0:
+                    pair_checked_until[capsule] = time
+                    if capsule + 1 < capsule_count:
+                        pair_checked_until[capsule + 1] = time
+
+        if event < last_event:
+            heapq.heapreplace(heap, (event_time(capsule, event + 1), capsule, event + 1))
+        else:
+            heapq.heappop(heap)
+
+    return {
+        "event_count": processed,
+        "minimum_separations": np.array(minimum_separations),
+        "minimum_separation_times": np.array(minimum_separation_times),
+        "minimum_separation_positions": np.array(minimum_separation_positions),
+        "catch_up_times": np.array(catch_up_times),
+        "catch_up_positions": np.array(catch_up_positions),
+    }
+
+
+def get_catch_up_elapsed(gap: float, closing_velocity: float, closing_acceleration: float) -> float | None:
+    """
+    First τ >= 0 at which the gap + closing_velocity·τ + closing_acceleration·τ²/2 of a pair reaches 0 on its way down,
+    gap >= 0, or None when it never does. Both branches avoid subtracting close numbers.
+    """
+    discriminant = closing_velocity * closing_velocity - 2 * closing_acceleration * gap
+    if discriminant < 0:
+        return None
+
+    root = math.sqrt(discriminant)
+    if closing_velocity >= 0:
+        # Opening or level: only a trailing capsule accelerating harder closes the gap
+        if closing_acceleration >= 0:
+            return None
+
+        return (-closing_velocity - root) / closing_acceleration
+
+    return 2 * gap / (root - closing_velocity)
@@ -0,0 +1,83 @@
+import numpy as np
+
+from app.domain.entities.segment_table import SegmentKind, SegmentTable
+
+TRAJECTORY_CHANNELS = ("position_m", "velocity_mps", "acceleration_mps2", "force_applied_n", "total_energy_consumed_j")
+
+
+def get_segment_entry_velocities(segment_table: SegmentTable) -> np.ndarray:
+    """Velocity of the capsule when entering each segment; the table stores the velocity at each segment's end"""
+    previous_velocities = np.concatenate((segment_table.velocity[:1], segment_table.velocity[:-1]))
+
+    return np.where(segment_table.kind == SegmentKind.ACCELERATION, previous_velocities, segment_table.velocity)
+
+
+def evaluate_segment_table(segment_table: SegmentTable, times: np.ndarray) -> dict[str, np.ndarray]:
+    """
+    State of the capsule at each of the given times, from the closed-form equations of the segment containing it:
+    x = x0 + v0·τ + a·τ²/2 and v = v0 + a·τ, with τ the time spent in the segment. The energy consumed grows with
+    the distance covered under force. Times outside the run are clamped to its start or end.
+    """
+    times = np.asarray(times, dtype=np.float64)
+
+    rows = np.clip(np.searchsorted(segment_table.start_time, times, side="right") - 1, 0, len(segment_table) - 1)
+    elapsed = np.clip(times - segment_table.start_time[rows], 0, segment_table.traverse_time[rows])
+
+    entry_velocities = get_segment_entry_velocities(segment_table)[rows]
+    accelerations = segment_table.acceleration[rows]
+    forces_applied = segment_table.force_applied[rows]
+    distances = entry_velocities * elapsed + accelerations * np.square(elapsed) / 2
+
+    # Energy consumed before each segment, then the work done within it so far
+    energies_before = np.cumsum(segment_table.energy) - segment_table.energy
+
+    return {
+        "t_s": segment_table.start_time[rows] + elapsed,
+        "position_m": segment_table.starting_position[rows] + distances,
+        "velocity_mps": entry_velocities + accelerations * elapsed,
+        "acceleration_mps2": accelerations,
+        "force_applied_n": forces_applied,
+        "total_energy_consumed_j": energies_before[rows] + forces_applied * distances,
+    }
+
+
+def get_uniform_sample_times(total_travel_time: float, dt: float | None = None, points: int | None = None) -> np.ndarray:
+    """Times every dt seconds (the end of the run included), or points times evenly spread over the run"""
+    if dt is not None:
+        times = np.arange(0, total_travel_time, dt)
+        return np.append(times, total_travel_time)
+
+    return np.linspace(0, total_travel_time, points)
+
+
+def get_lttb_indices(x: np.ndarray, y: np.ndarray, max_points: int) -> np.ndarray:
+    """
+    Largest-Triangle-Three-Buckets downsampling: indices of at most max_points points that keep the visual shape of y(x).
+    The first and last points are kept; every bucket in between contributes the point forming the largest triangle
+    with the point kept from the previous bucket and the average of the next bucket.
+    """
+    point_count = len(x)
+    if max_points >= point_count:
+        return np.arange(point_count)
+
+    bucket_edges = np.linspace(1, point_count - 1, max_points - 1).astype(np.int64)
+    indices = np.empty(max_points, dtype=np.int64)
+    indices[0] = 0
+    indices[-1] = point_count - 1
+
+    selected = 0
+    for bucket in range(max_points - 2):
+        start, stop = bucket_edges[bucket], bucket_edges[bucket + 1]
+        next_start, next_stop = stop, bucket_edges[bucket + 2] if bucket + 2 < len(bucket_edges) else point_count
+
+        average_x = x[next_start:next_stop].mean()
+        average_y = y[next_start:next_stop].mean()
+
+        areas = np.abs(
+            (x[selected] - average_x) * (y[start:stop] - y[selected])
+            - (x[selected] - x[start:stop]) * (average_y - y[selected])
+        )
+        selected = start + int(np.argmax(areas))
+        indices[bucket + 1] = selected
+
+    return indices
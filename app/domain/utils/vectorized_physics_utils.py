@@ -0,0 +1,73 @@
+import numpy as np
+
+
+def get_traverse_times_for_constant_velocity(velocities: np.ndarray, lengths: np.ndarray) -> np.ndarray:
+    return lengths / velocities
+
+
+def get_traverse_times_for_acceleration(initial_velocities: np.ndarray, final_velocities: np.ndarray, lengths: np.ndarray) -> np.ndarray:
+    # Equivalent to (v_f - v_i) / a since v_f² - v_i² = 2·a·L, but stays finite when a == 0
+    return 2 * lengths / (initial_velocities + final_velocities)
+
+
+def get_final_velocities(initial_velocity: float | np.ndarray, accelerations: np.ndarray, lengths: np.ndarray) -> np.ndarray:
+    """
+    Velocity after each acceleration segment, in order.
+    Each exit velocity only depends on v0² plus the running sum of 2·a·L, so all of them come from one prefix sum.
+    """
+    squared_velocities = get_final_velocity_squares(initial_velocity, accelerations, lengths)
+
+    if np.any(squared_velocities < 0):
+        raise ValueError("Capsule comes to a stop inside a coil")
+
+    return np.sqrt(squared_velocities)
+
+
+def get_final_velocity_squares(initial_velocity: float | np.ndarray, accelerations: np.ndarray, lengths: np.ndarray) -> np.ndarray:
+    """Squared velocity after each acceleration segment; negative where the capsule would stop inside a coil"""
+    return np.square(initial_velocity) + np.cumsum(2 * accelerations * lengths, axis=-1)
+
+
+def get_accelerations(forces_applied: np.ndarray, mass: float | np.ndarray) -> np.ndarray:
+    return forces_applied / mass
+
+
+def get_coil_sensitivities(entry_velocities: np.ndarray, exit_velocities: np.ndarray, acceleration_lengths: np.ndarray, constant_velocity_lengths: np.ndarray, forces_applied: np.ndarray, mass: float) -> dict[str, dict[str, np.ndarray]]:
+    """
+    Exact derivatives of total travel time, final velocity and total energy with respect to each coil's force, length
+    and position, coils in order of position. constant_velocity_lengths are the segments after each coil.
+
+    A coil shifts v² by the same amount everywhere after it, so travel time's response to a coil's v² shift is a sum
+    over the segments from that coil on: one reverse running sum gives it for every coil at once. A coil's length and
+    position also move the ends of the constant velocity segments around it, which adds a term local to the coil.
+    The acceleration length is taken as exactly half the coil's length.
+    """
+    final_velocity = exit_velocities[-1]
+    acceleration_times = get_traverse_times_for_acceleration(entry_velocities, exit_velocities, acceleration_lengths)
+    speed_sums = entry_velocities + exit_velocities
+
+    # d(travel time)/d(v²) of each segment, through its exit velocity and through the entry velocity of its coil
+    exit_responses = -acceleration_times / (2 * speed_sums * exit_velocities) - constant_velocity_lengths / (2 * exit_velocities**3)
+    entry_responses = -acceleration_times / (2 * speed_sums * entry_velocities)
+    # A coil's v² shift reaches its own exit velocity and everything after it, but not its own entry velocity
+    squared_velocity_responses = np.cumsum(exit_responses[::-1])[::-1] + np.append(np.cumsum(entry_responses[::-1])[::-1][1:], 0.0)
+
+    return {
+        "force_applied": {
+            "total_travel_time_s": squared_velocity_responses * 2 * acceleration_lengths / mass,
+            "final_velocity_mps": acceleration_lengths / (mass * final_velocity),
+            "total_energy_consumed_j": acceleration_lengths,
+        },
+        "length": {
+            # Half the extra length accelerates, the coil's middle and end move by a half and a whole length
+            "total_travel_time_s": squared_velocity_responses * forces_applied / mass + 1 / speed_sums + 1 / (2 * entry_velocities) - 1 / exit_velocities,
+            "final_velocity_mps": forces_applied / (2 * mass * final_velocity),
+            "total_energy_consumed_j": forces_applied / 2,
+        },
+        "position": {
+            # Moving a coil only trades constant velocity length before it for length after it
+            "total_travel_time_s": 1 / entry_velocities - 1 / exit_velocities,
+            "final_velocity_mps": np.zeros_like(exit_velocities),
+            "total_energy_consumed_j": np.zeros_like(exit_velocities),
+        },
+    }
@@ -0,0 +1,370 @@
+from typing import Iterator
+
+import numpy as np
+
+from app.domain.entities.capsule import Capsule
+from app.domain.entities.segment_table import SegmentKind, SegmentTable
+from app.domain.entities.simulation_checkpoint import SimulationCheckpoint
+from app.domain.entities.simulation_context import SimulationContext
+from app.domain.entities.system_coil import SystemCoil
+from app.domain.entities.tube import Tube
+from app.domain.utils.vectorized_physics_utils import get_accelerations, get_final_velocities, get_final_velocity_squares, get_traverse_times_for_acceleration, get_traverse_times_for_constant_velocity
+from app.domain.services.engagement_events_service import engagement_event_log, replay_engagement_events
+
+
+def get_coil_arrays(system_coils: list[SystemCoil]) -> tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """Split coils (sorted by ascending position) into id, position, length and force arrays"""
+    count = len(system_coils)
+
+    coil_ids = np.fromiter((system_coil.coil_id for system_coil in system_coils), dtype=np.int64, count=count)
+    positions = np.fromiter((system_coil.position for system_coil in system_coils), dtype=np.float64, count=count)
+    lengths = np.fromiter((system_coil.coil.length for system_coil in system_coils), dtype=np.float64, count=count)
+    forces_applied = np.fromiter((system_coil.coil.force_applied for system_coil in system_coils), dtype=np.float64, count=count)
+
+    return coil_ids, positions, lengths, forces_applied
+
+
+def compute_coil_pass_arrays(positions: np.ndarray, lengths: np.ndarray, forces_applied: np.ndarray, mass: float, initial_velocity: float, tube_length: float, start_position: float = 0.0, start_time: float = 0.0) -> dict[str, np.ndarray]:
+    """
+    Compute every per-coil quantity of a run in one batched pass.
+    Coils must be sorted by ascending position and there must be at least one coil.
+    The capsule starts at start_position at start_time with initial_velocity, which lets a run resume after a coil.
+    """
+    middle_positions = positions + np.round(lengths / 2, 6)
+    end_positions = positions + lengths
+    acceleration_lengths = np.round((end_positions - positions) / 2, 6)
+
+    accelerations = get_accelerations(forces_applied, mass)
+    exit_velocities = get_final_velocities(initial_velocity, accelerations, acceleration_lengths)
+    entry_velocities = np.concatenate(([initial_velocity], exit_velocities[:-1]))
+    acceleration_times = get_traverse_times_for_acceleration(entry_velocities, exit_velocities, acceleration_lengths)
+
+    # Constant velocity segments run from a coil's end to the next coil's midpoint, or to the tube's end for the last coil
+    constant_velocity_lengths = np.append(middle_positions[1:], tube_length) - end_positions
+    constant_velocity_times = get_traverse_times_for_constant_velocity(exit_velocities, constant_velocity_lengths)
+
+    # Interleave durations as [first, accel_0, const_0, accel_1, const_1, ...] so one prefix sum yields every start time
+    first_segment_time = (middle_positions[0] - start_position) / initial_velocity
+    durations = np.concatenate(([first_segment_time], np.column_stack((acceleration_times, constant_velocity_times)).ravel()))
+    segment_end_times = start_time + np.cumsum(durations)
+
+    acceleration_start_times = segment_end_times[0:-1:2]
+    constant_velocity_start_times = segment_end_times[1::2]
+
+    coil_enter_times = np.concatenate((
+        [start_time + (positions[0] - start_position) / initial_velocity],
+        constant_velocity_start_times[:-1] + (positions[1:] - end_positions[:-1]) / exit_velocities[:-1],
+    ))
+
+    return {
+        "start_position": start_position,
+        "start_time": start_time,
+        "middle_positions": middle_positions,
+        "end_positions": end_positions,
+        "acceleration_lengths": acceleration_lengths,
+        "accelerations": accelerations,
+        "entry_velocities": entry_velocities,
+        "exit_velocities": exit_velocities,
+        "acceleration_times": acceleration_times,
+        "acceleration_start_times": acceleration_start_times,
+        "constant_velocity_lengths": constant_velocity_lengths,
+        "constant_velocity_times": constant_velocity_times,
+        "constant_velocity_start_times": constant_velocity_start_times,
+        "coil_enter_times": coil_enter_times,
+        "energies_consumed": forces_applied * acceleration_lengths,
+        "first_segment_time": first_segment_time,
+        "total_travel_time": segment_end_times[-1],
+    }
+
+
+def compute_batch_coil_pass_arrays(positions: np.ndarray, lengths: np.ndarray, forces_applied: np.ndarray, masses: np.ndarray, initial_velocities: np.ndarray, tube_length: float) -> dict[str, np.ndarray]:
+    """
+    Batched compute_coil_pass_arrays for many capsules: one row per capsule, one column per coil.
+    Coils must be sorted by ascending position. positions and forces_applied are either shared (coils,) or per capsule
+    (capsules, coils); position-derived outputs keep the shape of positions.
+    Capsules that come to a stop inside a coil are flagged False in "completed" and their velocities and times are NaN.
+    """
+    capsule_count, coil_count = len(initial_velocities), positions.shape[-1]
+    forces_applied = np.broadcast_to(forces_applied, (capsule_count, coil_count))
+
+    middle_positions = positions + np.round(lengths / 2, 6)
+    end_positions = positions + lengths
+    acceleration_lengths = np.round((end_positions - positions) / 2, 6)
+    constant_velocity_lengths = np.concatenate((middle_positions[..., 1:], np.full(middle_positions.shape[:-1] + (1,), tube_length)), axis=-1) - end_positions
+
+    accelerations = get_accelerations(forces_applied, masses[:, None])
+    squared_velocities = get_final_velocity_squares(initial_velocities[:, None], accelerations, acceleration_lengths)
+    completed = np.all(squared_velocities > 0, axis=-1)
+    exit_velocities = np.sqrt(np.where(completed[:, None], squared_velocities, np.nan))
+    entry_velocities = np.concatenate((initial_velocities[:, None], exit_velocities[:, :-1]), axis=1)
+
+    acceleration_times = get_traverse_times_for_acceleration(entry_velocities, exit_velocities, acceleration_lengths)
+    constant_velocity_times = get_traverse_times_for_constant_velocity(exit_velocities, constant_velocity_lengths)
+
+    # Same interleaved prefix sum as the single-capsule pass, along each row
+    first_segment_times = (middle_positions[..., 0] if coil_count else tube_length) / initial_velocities
+    durations = np.concatenate((first_segment_times[:, None], np.stack((acceleration_times, constant_velocity_times), axis=-1).reshape(capsule_count, 2 * coil_count)), axis=1)
+    segment_end_times = np.cumsum(durations, axis=1)
+
+    acceleration_start_times = segment_end_times[:, 0:-1:2]
+    constant_velocity_start_times = segment_end_times[:, 1::2]
+    coil_enter_times = np.concatenate((
+        positions[..., :1] / initial_velocities[:, None],
+        constant_velocity_start_times[:, :-1] + (positions[..., 1:] - end_positions[..., :-1]) / exit_velocities[:, :-1],
+    ), axis=1)
+
+    energies_consumed = forces_applied * acceleration_lengths
+
+    return {
+        "middle_positions": middle_positions,
+        "end_positions": end_positions,
+        "acceleration_lengths": acceleration_lengths,
+        "constant_velocity_lengths": constant_velocity_lengths,
+        "forces_applied": forces_applied,
+        "accelerations": accelerations,
+        "entry_velocities": entry_velocities,
+        "exit_velocities": exit_velocities,
+        "acceleration_times": acceleration_times,
+        "acceleration_start_times": acceleration_start_times,
+        "constant_velocity_times": constant_velocity_times,
+        "constant_velocity_start_times": constant_velocity_start_times,
+        "coil_enter_times": coil_enter_times,
+        "energies_consumed": energies_consumed,
+        "first_segment_times": first_segment_times,
+        "total_travel_times": segment_end_times[:, -1],
+        "final_velocities": exit_velocities[:, -1] if coil_count else initial_velocities.astype(np.float64),
+        "total_energies_consumed": energies_consumed.sum(axis=1),
+        "completed": completed,
+    }
+
+
+def log_coil_pass_events(context: SimulationContext | None, coil_ids: np.ndarray, positions: np.ndarray, forces_applied: np.ndarray, coil_pass: dict[str, np.ndarray], tube: Tube, log_run_end: bool = True) -> None:
+    """
+    Log the same engagement events, in the same order, as the per-segment loop, from the first coil's entry to the run's end.
+    Without log_run_end, logging stops at the last coil's exit.
+    """
+    coil_ids = coil_ids.tolist()
+    positions = positions.tolist()
+    forces_applied = forces_applied.tolist()
+    middle_positions = coil_pass["middle_positions"].tolist()
+    end_positions = coil_pass["end_positions"].tolist()
+    acceleration_lengths = coil_pass["acceleration_lengths"].tolist()
+    accelerations = coil_pass["accelerations"].tolist()
+    entry_velocities = coil_pass["entry_velocities"].tolist()
+    exit_velocities = coil_pass["exit_velocities"].tolist()
+    acceleration_times = coil_pass["acceleration_times"].tolist()
+    acceleration_start_times = coil_pass["acceleration_start_times"].tolist()
+    energies_consumed = coil_pass["energies_consumed"].tolist()
+    coil_enter_times = coil_pass["coil_enter_times"].tolist()
+
+    engagement_event_log(context, coil_enter_times[0], "coil_enter", coil_id=coil_ids[0], position_m=positions[0], velocity_mps=entry_velocities[0])
+
+    for i, coil_id in enumerate(coil_ids):
+        engagement_event_log(context, acceleration_start_times[i], "coil_midpoint_accel", coil_id=coil_id, velocity_mps=entry_velocities[i], acceleration_mps2=accelerations[i], force_applied_n=forces_applied[i], position_m=middle_positions[i])
+        engagement_event_log(context, acceleration_start_times[i] + acceleration_times[i], "coil_exit", coil_id=coil_id, velocity_mps=exit_velocities[i], acceleration_duration_s=acceleration_times[i], acceleration_segment_length_m=acceleration_lengths[i], energy_consumed_j=energies_consumed[i], position_m=end_positions[i])
+
+        if i + 1 < len(coil_ids):
+            engagement_event_log(context, coil_enter_times[i + 1], "coil_enter", coil_id=coil_ids[i + 1], position_m=positions[i + 1], velocity_mps=exit_velocities[i])
+
+    if log_run_end:
+        engagement_event_log(context, float(coil_pass["total_travel_time"]), "run_end", position_m=tube.length, velocity_mps=exit_velocities[-1])
+
+
+def run_vectorized_segments(context: SimulationContext | None, system_coils: list[SystemCoil], capsule: Capsule, tube: Tube) -> SegmentTable:
+    if len(system_coils) == 0:
+        engagement_event_log(context, 0.0, "run_start", velocity_mps=capsule.initial_velocity, position_m=0)
+
+        table = SegmentTable(1)
+        table.traverse_time[0] = tube.length / capsule.initial_velocity
+        table.length[0] = tube.length
+        table.velocity[0] = capsule.initial_velocity
+
+        return table
+
+    coil_ids, positions, lengths, forces_applied = get_coil_arrays(system_coils)
+    coil_pass = compute_coil_pass_arrays(positions, lengths, forces_applied, capsule.mass, capsule.initial_velocity, tube.length)
+
+    engagement_event_log(context, 0.0, "run_start", velocity_mps=capsule.initial_velocity, position_m=0)
+    log_coil_pass_events(context, coil_ids, positions, forces_applied, coil_pass, tube)
+
+    return build_segment_table(coil_ids, forces_applied, coil_pass, tube)
+
+
+def iter_vectorized_segments(context: SimulationContext | None, system_coils: list[SystemCoil], capsule: Capsule, tube: Tube, chunk_size: int) -> Iterator[SegmentTable]:
+    """
+    Run the vectorized engine chunk_size coils at a time, yielding the segments of each chunk as soon as they are computed.
+    Concatenated, the chunks form the same table as run_vectorized_segments; each chunk after the first starts with
+    the constant velocity segment that leaves the previous chunk's last coil.
+    """
+    if len(system_coils) == 0:
+        yield run_vectorized_segments(context, system_coils, capsule, tube)
+        return
+
+    engagement_event_log(context, 0.0, "run_start", velocity_mps=capsule.initial_velocity, position_m=0)
+
+    start_position, start_time, velocity = 0.0, 0.0, capsule.initial_velocity
+    previous_coil_id = None
+
+    for chunk_start in range(0, len(system_coils), chunk_size):
+        is_last_chunk = chunk_start + chunk_size >= len(system_coils)
+        coil_ids, positions, lengths, forces_applied = get_coil_arrays(system_coils[chunk_start:chunk_start + chunk_size])
+
+        coil_pass = compute_coil_pass_arrays(positions, lengths, forces_applied, capsule.mass, velocity, tube.length, start_position=start_position, start_time=start_time)
+        log_coil_pass_events(context, coil_ids, positions, forces_applied, coil_pass, tube, log_run_end=is_last_chunk)
+
+        table = build_segment_table(coil_ids, forces_applied, coil_pass, tube)
+        if previous_coil_id is not None:
+            table.related_coil_id[0] = previous_coil_id
+
+        if is_last_chunk:
+            yield table
+            return
+
+        # The segment after the chunk's last coil leads into the next chunk, which computes it
+        yield SegmentTable.from_columns({name: getattr(table, name)[:2 * len(coil_ids)] for name in SegmentTable.COLUMNS})
+
+        start_position = float(coil_pass["end_positions"][-1])
+        start_time = float(coil_pass["constant_velocity_start_times"][-1])
+        velocity = float(coil_pass["exit_velocities"][-1])
+        previous_coil_id = coil_ids[-1]
+
+
+def resume_vectorized_segments(context: SimulationContext | None, system_coils: list[SystemCoil], capsule: Capsule, tube: Tube, checkpoint: SimulationCheckpoint) -> SegmentTable:
+    """
+    Run the vectorized engine, reusing the segments and events of the system's previous run up to the first changed coil,
+    so only the downstream part of the tube is recomputed.
+    """
+    coil_ids, positions, lengths, forces_applied = get_coil_arrays(system_coils)
+    resume_index = checkpoint.get_resume_coil_index(coil_ids, positions, lengths, forces_applied, capsule.mass, capsule.initial_velocity, tube.length)
+
+    if resume_index == 0:
+        return run_vectorized_segments(context, system_coils, capsule, tube)
+
+    previous_table = checkpoint.segment_table
+
+    if resume_index == len(coil_ids):
+        replay_engagement_events(context, checkpoint.engagement_events)
+        return SegmentTable.from_columns({name: getattr(previous_table, name).copy() for name in SegmentTable.COLUMNS})
+
+    # Reuse the first segment and the acceleration segments of the unchanged coils with the constant velocity segments
+    # between them, and the events up to the last unchanged coil's exit; the segment after that coil leads to a changed one
+    last_index = resume_index - 1
+    replay_engagement_events(context, checkpoint.engagement_events[:3 * resume_index + 1])
+
+    remaining = slice(resume_index, None)
+    coil_pass = compute_coil_pass_arrays(
+        positions[remaining], lengths[remaining], forces_applied[remaining], capsule.mass,
+        float(checkpoint.exit_velocities[last_index]), tube.length,
+        start_position=float(positions[last_index] + lengths[last_index]),
+        start_time=float(checkpoint.exit_times[last_index]),
+    )
+    log_coil_pass_events(context, coil_ids[remaining], positions[remaining], forces_applied[remaining], coil_pass, tube)
+
+    resumed_table = build_segment_table(coil_ids[remaining], forces_applied[remaining], coil_pass, tube)
+    resumed_table.related_coil_id[0] = coil_ids[last_index]
+
+    return SegmentTable.from_columns({
+        name: np.concatenate((getattr(previous_table, name)[:2 * resume_index], getattr(resumed_table, name)))
+        for name in SegmentTable.COLUMNS
+    })
+
+
+def build_segment_table(coil_ids: np.ndarray, forces_applied: np.ndarray, coil_pass: dict[str, np.ndarray], tube: Tube) -> SegmentTable:
+    """
+    Fill a segment table from the per-coil arrays.
+    Row 0 is the first constant velocity segment, then each coil contributes an acceleration row followed by
+    a constant velocity row, and the last row is the zero-duration marker at the tube's end.
+    """
+    table = SegmentTable(2 * len(coil_ids) + 2)
+    accel_rows = slice(1, -1, 2)
+    const_rows = slice(2, -1, 2)
+    exit_velocities = coil_pass["exit_velocities"]
+
+    table.start_time[accel_rows] = coil_pass["acceleration_start_times"]
+    table.start_time[const_rows] = coil_pass["constant_velocity_start_times"]
+    table.start_time[0] = coil_pass["start_time"]
+    table.start_time[-1] = coil_pass["total_travel_time"]
+
+    table.traverse_time[0] = coil_pass["first_segment_time"]
+    table.traverse_time[accel_rows] = coil_pass["acceleration_times"]
+    table.traverse_time[const_rows] = coil_pass["constant_velocity_times"]
+
+    table.starting_position[0] = coil_pass["start_position"]
+    table.starting_position[accel_rows] = coil_pass["middle_positions"]
+    table.starting_position[const_rows] = coil_pass["end_positions"]
+    table.starting_position[-1] = tube.length
+
+    table.length[0] = coil_pass["middle_positions"][0] - coil_pass["start_position"]
+    table.length[accel_rows] = coil_pass["acceleration_lengths"]
+    table.length[const_rows] = coil_pass["constant_velocity_lengths"]
+    table.length[-1] = tube.length
+
+    table.velocity[0] = coil_pass["entry_velocities"][0]
+    table.velocity[accel_rows] = exit_velocities
+    table.velocity[const_rows] = exit_velocities
+    table.velocity[-1] = exit_velocities[-1]
+
+    table.acceleration[accel_rows] = coil_pass["accelerations"]
+    table.force_applied[accel_rows] = forces_applied
+    table.energy[accel_rows] = coil_pass["energies_consumed"]
+
+    table.related_coil_id[0] = coil_ids[0]
+    table.related_coil_id[accel_rows] = coil_ids
+    table.related_coil_id[const_rows] = coil_ids
+
+    table.kind[accel_rows] = SegmentKind.ACCELERATION
+
+    return table
+
+
+def build_batch_segment_columns(coil_ids: np.ndarray, batch: dict[str, np.ndarray], tube: Tube) -> dict[str, np.ndarray]:
+    """
+    Segment table columns of every capsule of a batch, one row per capsule, laid out like build_segment_table.
+    Takes the output of compute_batch_coil_pass_arrays; row i of each column is the table of capsule i.
+    """
+    capsule_count, coil_count = batch["exit_velocities"].shape
+    columns = {name: np.zeros((capsule_count, 2 * coil_count + 2 if coil_count else 1), dtype=dtype) for name, dtype in SegmentTable.COLUMNS.items()}
+
+    if coil_count == 0:
+        columns["traverse_time"][:, 0] = batch["total_travel_times"]
+        columns["length"][:, 0] = tube.length
+        columns["velocity"][:, 0] = batch["final_velocities"]
+        return columns
+
+    accel_rows = slice(1, -1, 2)
+    const_rows = slice(2, -1, 2)
+    exit_velocities = batch["exit_velocities"]
+
+    columns["start_time"][:, accel_rows] = batch["acceleration_start_times"]
+    columns["start_time"][:, const_rows] = batch["constant_velocity_start_times"]
+    columns["start_time"][:, -1] = batch["total_travel_times"]
+
+    columns["traverse_time"][:, 0] = batch["first_segment_times"]
+    columns["traverse_time"][:, accel_rows] = batch["acceleration_times"]
+    columns["traverse_time"][:, const_rows] = batch["constant_velocity_times"]
+
+    columns["starting_position"][:, accel_rows] = batch["middle_positions"]
+    columns["starting_position"][:, const_rows] = batch["end_positions"]
+    columns["starting_position"][:, -1] = tube.length
+
+    columns["length"][:, 0] = batch["middle_positions"][0]
+    columns["length"][:, accel_rows] = batch["acceleration_lengths"]
+    columns["length"][:, const_rows] = batch["constant_velocity_lengths"]
+    columns["length"][:, -1] = tube.length
+
+    columns["velocity"][:, 0] = batch["entry_velocities"][:, 0]
+    columns["velocity"][:, accel_rows] = exit_velocities
+    columns["velocity"][:, const_rows] = exit_velocities
+    columns["velocity"][:, -1] = exit_velocities[:, -1]
+
+    columns["acceleration"][:, accel_rows] = batch["accelerations"]
+    columns["force_applied"][:, accel_rows] = batch["forces_applied"]
+    columns["energy"][:, accel_rows] = batch["energies_consumed"]
+
+    columns["related_coil_id"][:, 0] = coil_ids[0]
+    columns["related_coil_id"][:, accel_rows] = coil_ids
+    columns["related_coil_id"][:, const_rows] = coil_ids
+
+    columns["kind"][:, accel_rows] = SegmentKind.ACCELERATION
+
+    return columns
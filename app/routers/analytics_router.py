@@ -1,19 +1,48 @@
-from fastapi import APIRouter, Query, Depends
+from itertools import accumulate
+import numpy as np
+from fastapi import APIRouter, Header, HTTPException, Query, Depends, Response, status
 from sqlalchemy.orm import Session
 from app.database.config import get_db
+from app.database.models import EngagementEvent
+from app.domain.schemas.simulation_schemas import ExportFormat, StateAtPositionsRequest, StateAtTimesRequest, TrajectoryFormat
 
 from app.domain.services.engagement_events_service import get_engagement_events
+from app.domain.services.segment_index_service import get_segment_index
 from app.domain.services.simulation_service import get_valid_simulation_run
+from app.domain.services.trajectory_sampling_service import sample_simulation_run
+from app.domain.utils.export_columns import export_columns
+from app.domain.utils.quantize_trajectories import parse_trajectory_quanta, quantize_trajectories
+from app.routers.content_negotiation import get_valid_export_format
 
 router = APIRouter(prefix="/analytics", tags=["Analytics"])
 
+COLUMNAR_METRICS = ("position_m", "velocity_mps", "acceleration_mps2", "force_applied_n", "total_energy_consumed_j")
+
+ENGAGEMENT_EVENT_FIELDS = (
+    "timestamp_s",
+    "event",
+    "coil_id",
+    "position_m",
+    "velocity_mps",
+    "acceleration_mps2",
+    "acceleration_duration_s",
+    "acceleration_segment_length_m",
+    "force_applied_n",
+    "energy_consumed_j",
+)
+
 
 @router.get("/simulation-runs/{simulation_id}/engagement-events")
-async def get_simulation_engagement_events(simulation_id: str, event: str | None = Query(None, description="Filter by event type"), coil_id: int | None = Query(None, description="Filter by coil ID"), db: Session = Depends(get_db)):
+async def get_simulation_engagement_events(simulation_id: str, event: str | None = Query(None, description="Filter by event type"), coil_id: int | None = Query(None, description="Filter by coil ID"), export_format: ExportFormat | None = Query(None, description="'json', 'arrow', 'parquet' or 'npz'. Unset negotiates it from the Accept header, defaulting to 'json'"), accept: str | None = Header(None), db: Session = Depends(get_db)):
     """Get all events for a specific simulation run"""
+    export_format = get_valid_export_format(export_format, accept)
     get_valid_simulation_run(simulation_id, db)
 
     engagement_events = get_engagement_events(simulation_id, event, coil_id, db)
+
+    if export_format != ExportFormat.JSON:
+        columns = {field: [getattr(engagement_event, field) for engagement_event in engagement_events] for field in ENGAGEMENT_EVENT_FIELDS}
+        return to_export_response(simulation_id, columns, export_format)
     
     return [
         {
@@ -36,11 +65,18 @@ async def get_simulation_engagement_events(simulation_id: str, event: str | None
 
 
 @router.get("/simulation-runs/{simulation_id}/metrics")
-async def get_simulation_metrics(simulation_id: str, db: Session = Depends(get_db)):
+async def get_simulation_metrics(simulation_id: str, trajectory_format: TrajectoryFormat = Query(TrajectoryFormat.POINTS, description="Trajectory layout: 'points', 'columnar' (one shared t_s array plus one array per metric) or 'quantized' (columnar fixed-point integers)"), trajectory_quanta: str | None = Query(None, description="Quanta of a quantized trajectory as channel:quantum pairs, e.g. t_s:1e-6,position_m:1e-3"), export_format: ExportFormat | None = Query(None, description="'json', 'arrow', 'parquet' or 'npz'. Unset negotiates it from the Accept header, defaulting to 'json'"), accept: str | None = Header(None), db: Session = Depends(get_db)):
     """Get position, velocity, and acceleration trajectory for a simulation"""
+    export_format = get_valid_export_format(export_format, accept)
     get_valid_simulation_run(simulation_id, db)
 
     events = get_engagement_events(simulation_id, db=db)
+
+    if export_format != ExportFormat.JSON:
+        return to_export_response(simulation_id, get_columnar_metrics(events, COLUMNAR_METRICS), export_format)
+
+    if trajectory_format != TrajectoryFormat.POINTS:
+        return {"simulation_id": simulation_id, **get_formatted_metrics(events, COLUMNAR_METRICS, trajectory_format, trajectory_quanta)}
     
     position_trajectory = []    
     velocity_trajectory = []
@@ -92,11 +128,18 @@ async def get_simulation_metrics(simulation_id: str, db: Session = Depends(get_d
 
 
 @router.get("/simulation-runs/{simulation_id}/metrics/position-vs-time")
-async def get_simulation_position_vs_time(simulation_id: str, db: Session = Depends(get_db)):
+async def get_simulation_position_vs_time(simulation_id: str, trajectory_format: TrajectoryFormat = Query(TrajectoryFormat.POINTS, description="Trajectory layout: 'points', 'columnar' (one shared t_s array plus one array per metric) or 'quantized' (columnar fixed-point integers)"), trajectory_quanta: str | None = Query(None, description="Quanta of a quantized trajectory as channel:quantum pairs, e.g. t_s:1e-6,position_m:1e-3"), export_format: ExportFormat | None = Query(None, description="'json', 'arrow', 'parquet' or 'npz'. Unset negotiates it from the Accept header, defaulting to 'json'"), accept: str | None = Header(None), db: Session = Depends(get_db)):
     """Get position vs time trajectory for a simulation"""
+    export_format = get_valid_export_format(export_format, accept)
     get_valid_simulation_run(simulation_id, db)
 
     events = get_engagement_events(simulation_id, db=db)
+
+    if export_format != ExportFormat.JSON:
+        return to_export_response(simulation_id, get_columnar_metrics(events, ("position_m",)), export_format)
+
+    if trajectory_format != TrajectoryFormat.POINTS:
+        return {"simulation_id": simulation_id, **get_formatted_metrics(events, ("position_m",), trajectory_format, trajectory_quanta)}
     
     position_trajectory = []
 
@@ -113,11 +156,18 @@ async def get_simulation_position_vs_time(simulation_id: str, db: Session = Depe
 
 
 @router.get("/simulation-runs/{simulation_id}/metrics/velocity-vs-time")
-async def get_simulation_velocity_vs_time(simulation_id: str, db: Session = Depends(get_db)):
+async def get_simulation_velocity_vs_time(simulation_id: str, trajectory_format: TrajectoryFormat = Query(TrajectoryFormat.POINTS, description="Trajectory layout: 'points', 'columnar' (one shared t_s array plus one array per metric) or 'quantized' (columnar fixed-point integers)"), trajectory_quanta: str | None = Query(None, description="Quanta of a quantized trajectory as channel:quantum pairs, e.g. t_s:1e-6,position_m:1e-3"), export_format: ExportFormat | None = Query(None, description="'json', 'arrow', 'parquet' or 'npz'. Unset negotiates it from the Accept header, defaulting to 'json'"), accept: str | None = Header(None), db: Session = Depends(get_db)):
     """Get velocity vs time trajectory for a simulation"""
+    export_format = get_valid_export_format(export_format, accept)
     get_valid_simulation_run(simulation_id, db)
 
     events = get_engagement_events(simulation_id, db=db)
+
+    if export_format != ExportFormat.JSON:
+        return to_export_response(simulation_id, get_columnar_metrics(events, ("velocity_mps",)), export_format)
+
+    if trajectory_format != TrajectoryFormat.POINTS:
+        return {"simulation_id": simulation_id, **get_formatted_metrics(events, ("velocity_mps",), trajectory_format, trajectory_quanta)}
     
     velocity_trajectory = []
 
@@ -134,11 +184,18 @@ async def get_simulation_velocity_vs_time(simulation_id: str, db: Session = Depe
 
 
 @router.get("/simulation-runs/{simulation_id}/metrics/acceleration-vs-time")
-async def get_simulation_acceleration_vs_time(simulation_id: str, db: Session = Depends(get_db)):
+async def get_simulation_acceleration_vs_time(simulation_id: str, trajectory_format: TrajectoryFormat = Query(TrajectoryFormat.POINTS, description="Trajectory layout: 'points', 'columnar' (one shared t_s array plus one array per metric) or 'quantized' (columnar fixed-point integers)"), trajectory_quanta: str | None = Query(None, description="Quanta of a quantized trajectory as channel:quantum pairs, e.g. t_s:1e-6,position_m:1e-3"), export_format: ExportFormat | None = Query(None, description="'json', 'arrow', 'parquet' or 'npz'. Unset negotiates it from the Accept header, defaulting to 'json'"), accept: str | None = Header(None), db: Session = Depends(get_db)):
     """Get acceleration vs time trajectory for a simulation"""
+    export_format = get_valid_export_format(export_format, accept)
     get_valid_simulation_run(simulation_id, db)
 
     events = get_engagement_events(simulation_id, db=db)
+
+    if export_format != ExportFormat.JSON:
+        return to_export_response(simulation_id, get_columnar_metrics(events, ("acceleration_mps2",)), export_format)
+
+    if trajectory_format != TrajectoryFormat.POINTS:
+        return {"simulation_id": simulation_id, **get_formatted_metrics(events, ("acceleration_mps2",), trajectory_format, trajectory_quanta)}
     
     acceleration_trajectory = []
 
@@ -155,11 +212,18 @@ async def get_simulation_acceleration_vs_time(simulation_id: str, db: Session =
 
 
 @router.get("/simulation-runs/{simulation_id}/metrics/force-applied-vs-time")
-async def get_simulation_force_applied_vs_time(simulation_id: str, db: Session = Depends(get_db)):
+async def get_simulation_force_applied_vs_time(simulation_id: str, trajectory_format: TrajectoryFormat = Query(TrajectoryFormat.POINTS, description="Trajectory layout: 'points', 'columnar' (one shared t_s array plus one array per metric) or 'quantized' (columnar fixed-point integers)"), trajectory_quanta: str | None = Query(None, description="Quanta of a quantized trajectory as channel:quantum pairs, e.g. t_s:1e-6,position_m:1e-3"), export_format: ExportFormat | None = Query(None, description="'json', 'arrow', 'parquet' or 'npz'. Unset negotiates it from the Accept header, defaulting to 'json'"), accept: str | None = Header(None), db: Session = Depends(get_db)):
     """Get force applied vs time trajectory for a simulation"""
+    export_format = get_valid_export_format(export_format, accept)
     get_valid_simulation_run(simulation_id, db)
 
     events = get_engagement_events(simulation_id, db=db)
+
+    if export_format != ExportFormat.JSON:
+        return to_export_response(simulation_id, get_columnar_metrics(events, ("force_applied_n",)), export_format)
+
+    if trajectory_format != TrajectoryFormat.POINTS:
+        return {"simulation_id": simulation_id, **get_formatted_metrics(events, ("force_applied_n",), trajectory_format, trajectory_quanta)}
     
     force_applied_trajectory = []
 
@@ -176,11 +240,18 @@ async def get_simulation_force_applied_vs_time(simulation_id: str, db: Session =
 
 
 @router.get("/simulation-runs/{simulation_id}/metrics/total-energy-consumed-vs-time")
-async def get_simulation_total_energy_consumed_vs_time(simulation_id: str, db: Session = Depends(get_db)):
+async def get_simulation_total_energy_consumed_vs_time(simulation_id: str, trajectory_format: TrajectoryFormat = Query(TrajectoryFormat.POINTS, description="Trajectory layout: 'points', 'columnar' (one shared t_s array plus one array per metric) or 'quantized' (columnar fixed-point integers)"), trajectory_quanta: str | None = Query(None, description="Quanta of a quantized trajectory as channel:quantum pairs, e.g. t_s:1e-6,position_m:1e-3"), export_format: ExportFormat | None = Query(None, description="'json', 'arrow', 'parquet' or 'npz'. Unset negotiates it from the Accept header, defaulting to 'json'"), accept: str | None = Header(None), db: Session = Depends(get_db)):
     """Get total energy consumed vs time trajectory for a simulation"""
+    export_format = get_valid_export_format(export_format, accept)
     get_valid_simulation_run(simulation_id, db)
 
     events = get_engagement_events(simulation_id, db=db)
+
+    if export_format != ExportFormat.JSON:
+        return to_export_response(simulation_id, get_columnar_metrics(events, ("total_energy_consumed_j",)), export_format)
+
+    if trajectory_format != TrajectoryFormat.POINTS:
+        return {"simulation_id": simulation_id, **get_formatted_metrics(events, ("total_energy_consumed_j",), trajectory_format, trajectory_quanta)}
     
     total_energy_consumed_trajectory = []
     total_energy_consumed_j = 0
@@ -199,6 +270,48 @@ async def get_simulation_total_energy_consumed_vs_time(simulation_id: str, db: S
     }
 
 
+@router.get("/simulation-runs/{simulation_id}/samples")
+async def get_simulation_samples(simulation_id: str, dt: float | None = Query(None, gt=0, description="Sample every dt seconds"), points: int | None = Query(None, ge=2, description="Number of samples evenly spread over the run"), max_points: int | None = Query(None, ge=3, description="Downsample the run to at most this many points with LTTB"), lttb_channel: str = Query("velocity_mps", description="Channel whose shape LTTB preserves"), export_format: ExportFormat | None = Query(None, description="'json', 'arrow', 'parquet' or 'npz'. Unset negotiates it from the Accept header, defaulting to 'json'"), accept: str | None = Header(None), db: Session = Depends(get_db)):
+    """
+    Get the trajectory of a simulation at a chosen resolution, evaluated in closed form from the run's segments:
+    uniformly in time (dt or points), or downsampled to at most max_points representative points
+    """
+    export_format = get_valid_export_format(export_format, accept)
+    simulation_run = get_valid_simulation_run(simulation_id, db)
+
+    try:
+        samples = sample_simulation_run(simulation_run, dt, points, max_points, lttb_channel)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+    if export_format != ExportFormat.JSON:
+        return to_export_response(simulation_id, samples, export_format)
+
+    return {"simulation_id": simulation_id, **{channel: values.tolist() for channel, values in samples.items()}}
+
+
+@router.post("/simulation-runs/{simulation_id}/state-at-times")
+async def get_simulation_state_at_times(simulation_id: str, state_at_times_request: StateAtTimesRequest, export_format: ExportFormat | None = Query(None, description="'json', 'arrow', 'parquet' or 'npz'. Unset negotiates it from the Accept header, defaulting to 'json'"), accept: str | None = Header(None), db: Session = Depends(get_db)):
+    """Get where the capsule is, and its velocity, acceleration, force and total energy, at each of a batch of times"""
+    export_format = get_valid_export_format(export_format, accept)
+    simulation_run = get_valid_simulation_run(simulation_id, db)
+
+    state = get_segment_index(simulation_run).get_state_at_times(state_at_times_request.times)
+
+    return to_state_response(simulation_id, state, export_format)
+
+
+@router.post("/simulation-runs/{simulation_id}/state-at-positions")
+async def get_simulation_state_at_positions(simulation_id: str, state_at_positions_request: StateAtPositionsRequest, export_format: ExportFormat | None = Query(None, description="'json', 'arrow', 'parquet' or 'npz'. Unset negotiates it from the Accept header, defaulting to 'json'"), accept: str | None = Header(None), db: Session = Depends(get_db)):
+    """Get when the capsule reaches each of a batch of positions, and its velocity, acceleration, force and total energy there"""
+    export_format = get_valid_export_format(export_format, accept)
+    simulation_run = get_valid_simulation_run(simulation_id, db)
+
+    state = get_segment_index(simulation_run).get_state_at_positions(state_at_positions_request.positions)
+
+    return to_state_response(simulation_id, state, export_format)
+
+
 @router.get("/simulation-runs/{simulation_id}/energy-consumption")
 async def get_energy_consumption_analysis(simulation_id: str, db: Session = Depends(get_db)):
     """Get energy consumption analysis by coil"""
@@ -222,4 +335,46 @@ async def get_energy_consumption_analysis(simulation_id: str, db: Session = Depe
         "total_energy_consumed_j": total_energy,
         "energy_by_coil": coil_energy_consumption,
         "coil_count": len(coil_energy_consumption)
-    }
\ No newline at end of file
+    }
+
+
+def get_columnar_metrics(events: list[EngagementEvent], metrics: tuple[str, ...]) -> dict[str, list[float]]:
+    """One shared t_s array plus one array per requested metric, without building a dict per point"""
+    columns = {"t_s": [event.timestamp_s for event in events]}
+
+    for metric in metrics:
+        if metric == "total_energy_consumed_j":
+            columns[metric] = list(accumulate(event.energy_consumed_j for event in events))
+        else:
+            columns[metric] = [getattr(event, metric) for event in events]
+
+    return columns
+
+
+def get_formatted_metrics(events: list[EngagementEvent], metrics: tuple[str, ...], trajectory_format: TrajectoryFormat, trajectory_quanta: str | None) -> dict[str, dict | list]:
+    columns = get_columnar_metrics(events, metrics)
+
+    if trajectory_format != TrajectoryFormat.QUANTIZED:
+        return columns
+
+    try:
+        return quantize_trajectories(columns, parse_trajectory_quanta(trajectory_quanta))
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+
+def to_export_response(simulation_id: str, columns: dict[str, list | np.ndarray], export_format: ExportFormat) -> Response:
+    content, headers = export_columns(columns, export_format, {"simulation_id": simulation_id})
+
+    return Response(content=content, media_type=headers["Content-Type"], headers=headers)
+
+
+def to_state_response(simulation_id: str, state: dict[str, np.ndarray], export_format: ExportFormat) -> dict[str, str | list] | Response:
+    """Queries outside the run are NaN, which binary formats keep and JSON reports as null"""
+    if export_format != ExportFormat.JSON:
+        return to_export_response(simulation_id, state, export_format)
+
+    return {
+        "simulation_id": simulation_id,
+        **{channel: np.where(np.isnan(values), None, values).tolist() for channel, values in state.items()},
+    }
@@ -0,0 +1,21 @@
+from fastapi import HTTPException, status
+
+from app.domain.schemas.simulation_schemas import ContentEncoding, ExportFormat
+from app.domain.utils.compress_json import EncodingNotAcceptableError, negotiate_content_encoding
+from app.domain.utils.export_columns import negotiate_export_format
+
+
+def get_valid_content_encoding(accept_encoding: str | None) -> ContentEncoding | None:
+    """Negotiated result encoding, or 406 when the client accepts none of the supported encodings"""
+    try:
+        return negotiate_content_encoding(accept_encoding)
+    except EncodingNotAcceptableError as e:
+        raise HTTPException(status_code=status.HTTP_406_NOT_ACCEPTABLE, detail=str(e))
+
+
+def get_valid_export_format(requested_format: ExportFormat | None, accept: str | None) -> ExportFormat:
+    """Negotiated export format, or 400 when the requested one cannot be written here"""
+    try:
+        return negotiate_export_format(requested_format, accept)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
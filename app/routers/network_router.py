@@ -0,0 +1,105 @@
+import asyncio
+from fastapi import APIRouter, Header, HTTPException, Query, Response, status
+from app.domain.schemas.network_schemas import NetworkCreate, NetworkResponse, NetworkSimulationRequest, NetworksListResponse, NetworkUpdate
+from app.domain.services.network_service import UpdateNetworkStatus, read_all_networks, delete_network_by_id, get_network_by_id, update_network_by_id, convert_network_connections_to_tuples, convert_tuples_to_network_connections
+from app.domain.services.simulation_job_service import submit_network_simulation
+from app.domain.entities.network import Network
+from app.routers.content_negotiation import get_valid_content_encoding
+from app.domain.utils.get_next_id import get_next_id
+
+
+router = APIRouter(prefix="/networks", tags=["Networks"])
+
+
+@router.post("/", response_model=dict, status_code=status.HTTP_201_CREATED)
+async def create_network(network: NetworkCreate):
+    """Create new network entity"""
+
+    try:
+        network = Network(network_id=get_next_id(Network.DATABASE_FILE_PATH), connections=convert_network_connections_to_tuples(network.connections))
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+    return {"id": network.id}
+
+
+@router.get("/{network_id}", response_model=NetworkResponse, status_code=status.HTTP_200_OK)
+async def get_network(network_id: int):
+    """Get network entity by id"""
+    network = get_network_by_id(network_id)
+    if network is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Network not found"
+        )
+
+    return NetworkResponse(id=network.id, connections=convert_tuples_to_network_connections(network.connections))
+
+
+@router.get("/", response_model=NetworksListResponse, status_code=status.HTTP_200_OK)
+async def get_all_networks():
+    """Get all networks"""
+    networks_data = read_all_networks()  # returns list[dict]
+
+    entities = [
+        NetworkResponse(id=network["id"], connections=convert_tuples_to_network_connections(network["connections"]))
+        for network in networks_data
+    ]
+
+    return NetworksListResponse(entities=entities)
+
+
+@router.put("/{network_id}", status_code=status.HTTP_200_OK)
+async def update_network(network_id: int, network: NetworkUpdate):
+    """Update network (full replace)"""
+
+    updated_status = update_network_by_id(network_id=network_id, new_connections=convert_network_connections_to_tuples(network.connections))
+    if updated_status[0] == UpdateNetworkStatus.NOT_FOUND:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Network not found")
+    elif updated_status[0] == UpdateNetworkStatus.INVALID_NETWORK:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=updated_status[1])
+
+    network = get_network_by_id(network_id)
+
+    return NetworkResponse(id=network.id, connections=convert_tuples_to_network_connections(network.connections))
+
+
+@router.delete("/{network_id}", status_code=status.HTTP_204_NO_CONTENT)
+async def delete_network(network_id: int):
+    """Delete network by id"""
+    deleted = delete_network_by_id(network_id)
+    if not deleted:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Network not found"
+        )
+
+    return {}
+
+
+@router.post("/{network_id}/simulate", status_code=status.HTTP_200_OK)
+async def simulate_network_routes(network_id: int, network_simulation_request: NetworkSimulationRequest, accept_encoding: str | None = Header(None), compression_level: int | None = Query(None, ge=0, le=9, description="zlib compression level of the result, 0 (fastest) to 9 (smallest)")):
+    """
+    Run a capsule along each route of connected systems, the exit velocity of one tube feeding the next,
+    and download per-route legs and combined segment tables as compressed JSON
+    """
+    encoding = get_valid_content_encoding(accept_encoding)
+
+    try:
+        content, headers = await asyncio.wrap_future(submit_network_simulation(network_id, network_simulation_request, encoding, compression_level))
+
+        return Response(content=content, media_type=headers["Content-Type"], headers=headers)
+
+    except ValueError as e:
+        return Response(
+            content=f"Validation error: {str(e)}", 
+            status_code=400,
+            media_type="text/plain"
+        )
+    except Exception as e:
+        return Response(
+            content=f"Internal server error: {str(e)}", 
+            status_code=500,
+            media_type="text/plain"
+        )
+
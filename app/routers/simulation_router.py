@@ -1,25 +1,43 @@
-from fastapi import APIRouter, Depends, status, Response
+import asyncio
+from typing import Iterator
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, status, Response
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 from app.database.config import get_db
-from app.domain.schemas.simulation_schemas import CompleteFlowRequest, SimulationRequest
-from app.domain.services.simulation_service import create_all_simulation_entities, get_valid_simulation_run, run_simulation_by_system_id
-from app.domain.utils.compress_json import compress_json
+from app.domain.entities.simulation_job import SimulationJob, SimulationJobStatus
+from app.domain.schemas.simulation_schemas import CapsuleBatchRequest, CompleteFlowRequest, ContentEncoding, ExportFormat, SimulationJobResponse, SimulationOptimizationRequest, SimulationRequest, SimulationSweepRequest, StreamFormat, TrafficSimulationRequest
+from app.domain.services.simulation_job_service import get_simulation_job, submit_capsule_batch, submit_complete_flow_job, submit_complete_flow_run, submit_simulation_job, submit_simulation_run, submit_simulation_optimization, submit_sweep_chunks, submit_traffic_simulation
+from app.domain.services.simulation_service import create_all_simulation_entities, get_valid_simulation_run, stream_simulation, stream_simulation_by_system_id
+from app.domain.services.simulation_sweep_service import get_sweep_axes, get_sweep_chunks, merge_sweep_chunks, validate_sweep
+from app.domain.utils.compress_json import compress_json, compress_json_stream, encode_json, get_result_file_headers
+from app.domain.utils.export_columns import negotiate_export_format
+from app.routers.content_negotiation import get_valid_content_encoding, get_valid_export_format
 
 
 router = APIRouter(prefix="/simulation", tags=["Simulation"])
 
 
 @router.post("/complete-flow", status_code=status.HTTP_200_OK)
-async def run_complete_flow_simulation(complete_flow_request: CompleteFlowRequest):
-    """Create all entities from provided data and run simulation, returning results as compressed JSON"""
-    
+async def run_complete_flow_simulation(complete_flow_request: CompleteFlowRequest, accept: str | None = Header(None), accept_encoding: str | None = Header(None), compression_level: int | None = Query(None, ge=0, le=9, description="zlib compression level of the result, 0 (fastest) to 9 (smallest)")):
+    """
+    Create all entities from provided data and run simulation, returning results as compressed JSON,
+    or the segment table in the binary format requested by export_format or the Accept header
+    """
+    encoding = get_valid_content_encoding(accept_encoding)
+
     try:
-        system_id = create_all_simulation_entities(complete_flow_request)
-        
-        simulation_response = run_simulation_by_system_id(system_id)
-        compressed_content, headers = compress_json(simulation_response)
 
-        return Response(content=compressed_content, media_type="application/gzip", headers=headers)
+        if complete_flow_request.stream:
+            validate_streamed_export_format(complete_flow_request.export_format)
+            # Entities are created before streaming starts, so validation errors are still reported as errors
+            system = await asyncio.to_thread(create_all_simulation_entities, complete_flow_request)
+            json_fragments = stream_simulation(system, complete_flow_request.engine, complete_flow_request.stream_format)
+            return to_streaming_response(json_fragments, complete_flow_request.stream_format, encoding, compression_level)
+
+        export_format = negotiate_export_format(complete_flow_request.export_format, accept)
+        content, headers = await asyncio.wrap_future(submit_complete_flow_run(complete_flow_request, export_format, encoding, compression_level))
+
+        return Response(content=content, media_type=headers["Content-Type"], headers=headers)
         
     except ValueError as e:
         return Response(
@@ -36,14 +54,26 @@ async def run_complete_flow_simulation(complete_flow_request: CompleteFlowReques
 
 
 @router.post("/", status_code=status.HTTP_200_OK)
-async def run_simulation(simulation_request: SimulationRequest):
-    """Run simulation and download results as compressed JSON"""
-    
+async def run_simulation(simulation_request: SimulationRequest, accept: str | None = Header(None), accept_encoding: str | None = Header(None), compression_level: int | None = Query(None, ge=0, le=9, description="zlib compression level of the result, 0 (fastest) to 9 (smallest)")):
+    """
+    Run simulation and download results as compressed JSON,
+    or the segment table in the binary format requested by export_format or the Accept header
+    """
+    encoding = get_valid_content_encoding(accept_encoding)
+
     try:
-        simulation_response = run_simulation_by_system_id(simulation_request.system_id)
-        compressed_content, headers = compress_json(simulation_response)
 
-        return Response(content=compressed_content, media_type="application/gzip", headers=headers)
+        if simulation_request.stream:
+            validate_streamed_export_format(simulation_request.export_format)
+            # The system is looked up off the event loop, and before streaming starts so a missing one is still reported as an error.
+            # Streamed runs execute in the API's thread pool, so the response can start before the run finishes
+            json_fragments = await asyncio.to_thread(stream_simulation_by_system_id, simulation_request.system_id, simulation_request.engine, simulation_request.stream_format)
+            return to_streaming_response(json_fragments, simulation_request.stream_format, encoding, compression_level)
+
+        export_format = negotiate_export_format(simulation_request.export_format, accept)
+        content, headers = await asyncio.wrap_future(submit_simulation_run(simulation_request, export_format, encoding, compression_level))
+
+        return Response(content=content, media_type=headers["Content-Type"], headers=headers)
     
     except ValueError as e:
         return Response(
@@ -59,6 +89,217 @@ async def run_simulation(simulation_request: SimulationRequest):
         )
 
 
+def validate_streamed_export_format(export_format: ExportFormat | None) -> None:
+    if export_format not in (None, ExportFormat.JSON):
+        raise ValueError(f"Streamed results are only available as JSON, not {export_format.value}")
+
+
+def to_streaming_response(json_fragments: Iterator[str], stream_format: StreamFormat, encoding: ContentEncoding | None, compression_level: int | None) -> StreamingResponse:
+    """Compress the fragments as they are produced; the run executes in the API's thread pool while the response is sent"""
+    headers = get_result_file_headers(extension=stream_format.value, encoding=encoding)
+
+    return StreamingResponse(
+        compress_json_stream(json_fragments, encoding, compression_level),
+        media_type=headers["Content-Type"],
+        headers=headers,
+    )
+
+
+@router.post("/capsule-batch", status_code=status.HTTP_200_OK)
+async def run_capsule_batch_simulation(capsule_batch_request: CapsuleBatchRequest, accept_encoding: str | None = Header(None), compression_level: int | None = Query(None, ge=0, le=9, description="zlib compression level of the result, 0 (fastest) to 9 (smallest)")):
+    """Run many capsules through one system at once and download per-capsule results as compressed JSON"""
+    encoding = get_valid_content_encoding(accept_encoding)
+
+    try:
+        content, headers = await asyncio.wrap_future(submit_capsule_batch(capsule_batch_request, encoding, compression_level))
+
+        return Response(content=content, media_type=headers["Content-Type"], headers=headers)
+
+    except ValueError as e:
+        return Response(
+            content=f"Validation error: {str(e)}", 
+            status_code=400,
+            media_type="text/plain"
+        )
+    except Exception as e:
+        return Response(
+            content=f"Internal server error: {str(e)}", 
+            status_code=500,
+            media_type="text/plain"
+        )
+
+
+@router.post("/traffic", status_code=status.HTTP_200_OK)
+async def run_traffic_simulation(traffic_simulation_request: TrafficSimulationRequest, accept_encoding: str | None = Header(None), compression_level: int | None = Query(None, ge=0, le=9, description="zlib compression level of the result, 0 (fastest) to 9 (smallest)")):
+    """
+    Launch a stream of capsules into one system and download per-capsule results, the minimum separation
+    between consecutive capsules, arrival headway and throughput as compressed JSON. No entities are persisted.
+    """
+    encoding = get_valid_content_encoding(accept_encoding)
+
+    try:
+        content, headers = await asyncio.wrap_future(submit_traffic_simulation(traffic_simulation_request, encoding, compression_level))
+
+        return Response(content=content, media_type=headers["Content-Type"], headers=headers)
+
+    except ValueError as e:
+        return Response(
+            content=f"Validation error: {str(e)}", 
+            status_code=400,
+            media_type="text/plain"
+        )
+    except Exception as e:
+        return Response(
+            content=f"Internal server error: {str(e)}", 
+            status_code=500,
+            media_type="text/plain"
+        )
+
+
+@router.post("/optimize", status_code=status.HTTP_200_OK)
+async def run_simulation_optimization(optimization_request: SimulationOptimizationRequest, accept_encoding: str | None = Header(None), compression_level: int | None = Query(None, ge=0, le=9, description="zlib compression level of the result, 0 (fastest) to 9 (smallest)")):
+    """
+    Search coil forces and positions minimizing energy for a target travel time, or travel time for an energy budget,
+    with the batched engine, and download the best layout and the time / energy Pareto front as compressed JSON.
+    No entities are persisted.
+    """
+    encoding = get_valid_content_encoding(accept_encoding)
+
+    try:
+        content, headers = await asyncio.wrap_future(submit_simulation_optimization(optimization_request, encoding, compression_level))
+
+        return Response(content=content, media_type=headers["Content-Type"], headers=headers)
+
+    except ValueError as e:
+        return Response(
+            content=f"Validation error: {str(e)}", 
+            status_code=400,
+            media_type="text/plain"
+        )
+    except Exception as e:
+        return Response(
+            content=f"Internal server error: {str(e)}", 
+            status_code=500,
+            media_type="text/plain"
+        )
+
+
+@router.post("/sweep", status_code=status.HTTP_200_OK)
+async def run_simulation_sweep(sweep_request: SimulationSweepRequest, accept_encoding: str | None = Header(None), compression_level: int | None = Query(None, ge=0, le=9, description="zlib compression level of the result, 0 (fastest) to 9 (smallest)")):
+    """
+    Evaluate every combination of the swept parameters with the batched engine across the worker pool,
+    and download a table of summary metrics per grid point as compressed JSON. No entities are persisted.
+    """
+    encoding = get_valid_content_encoding(accept_encoding)
+
+    try:
+        axes = get_sweep_axes(sweep_request)
+        point_count = validate_sweep(sweep_request, axes)
+
+        futures = submit_sweep_chunks(sweep_request, axes, get_sweep_chunks(point_count))
+        chunk_results = await asyncio.gather(*(asyncio.wrap_future(future) for future in futures))
+
+        # Building and compressing a large table is CPU bound, keep it off the event loop
+        content, headers = await asyncio.to_thread(lambda: compress_json(merge_sweep_chunks(axes, chunk_results), encoding, compression_level))
+
+        return Response(content=content, media_type=headers["Content-Type"], headers=headers)
+
+    except ValueError as e:
+        return Response(
+            content=f"Validation error: {str(e)}", 
+            status_code=400,
+            media_type="text/plain"
+        )
+    except Exception as e:
+        return Response(
+            content=f"Internal server error: {str(e)}", 
+            status_code=500,
+            media_type="text/plain"
+        )
+
+
+@router.post("/jobs", response_model=SimulationJobResponse, status_code=status.HTTP_202_ACCEPTED)
+async def submit_simulation(simulation_request: SimulationRequest, accept: str | None = Header(None), accept_encoding: str | None = Header(None), compression_level: int | None = Query(None, ge=0, le=9, description="zlib compression level of the result, 0 (fastest) to 9 (smallest)")):
+    """Submit a simulation to the background worker pool and return its job id immediately"""
+    export_format = get_valid_export_format(simulation_request.export_format, accept)
+    # The result's encoding is negotiated when it is downloaded; rejecting unsupported encodings up front still helps the client
+    get_valid_content_encoding(accept_encoding)
+    job = submit_simulation_job(simulation_request, export_format, compression_level)
+
+    return to_simulation_job_response(job)
+
+
+@router.post("/jobs/complete-flow", response_model=SimulationJobResponse, status_code=status.HTTP_202_ACCEPTED)
+async def submit_complete_flow_simulation(complete_flow_request: CompleteFlowRequest, accept: str | None = Header(None), accept_encoding: str | None = Header(None), compression_level: int | None = Query(None, ge=0, le=9, description="zlib compression level of the result, 0 (fastest) to 9 (smallest)")):
+    """Submit entity creation and simulation to the background worker pool and return its job id immediately"""
+    export_format = get_valid_export_format(complete_flow_request.export_format, accept)
+    # The result's encoding is negotiated when it is downloaded; rejecting unsupported encodings up front still helps the client
+    get_valid_content_encoding(accept_encoding)
+    job = submit_complete_flow_job(complete_flow_request, export_format, compression_level)
+
+    return to_simulation_job_response(job)
+
+
+@router.get("/jobs/{job_id}", response_model=SimulationJobResponse, status_code=status.HTTP_200_OK)
+async def get_simulation_job_status(job_id: str, wait: float | None = Query(None, ge=0, le=300, description="Seconds to wait for the job to finish before returning its status")):
+    """Get the status of a simulation job, optionally waiting for it to finish"""
+    job = get_valid_simulation_job(job_id)
+
+    if wait:
+        try:
+            await asyncio.wait_for(asyncio.shield(asyncio.wrap_future(job.future)), timeout=wait)
+        except Exception:
+            pass  # timed out or failed; the status below reports which
+
+    return to_simulation_job_response(job)
+
+
+@router.get("/jobs/{job_id}/result", status_code=status.HTTP_200_OK)
+async def get_simulation_job_result(job_id: str, accept_encoding: str | None = Header(None)):
+    """
+    Download the results of a completed simulation job, in the format negotiated when it was submitted.
+    JSON results are encoded for the downloading request's Accept-Encoding.
+    """
+    encoding = get_valid_content_encoding(accept_encoding)
+    job = get_valid_simulation_job(job_id)
+    job_status = job.status
+
+    if job_status in (SimulationJobStatus.PENDING, SimulationJobStatus.RUNNING):
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=f"Simulation job is {job_status.value}")
+
+    if job_status == SimulationJobStatus.FAILED:
+        status_code = 400 if isinstance(job.future.exception(), ValueError) else 500
+        return Response(
+            content=f"Simulation job failed: {job.error}",
+            status_code=status_code,
+            media_type="text/plain"
+        )
+
+    content, headers = job.future.result()
+    if job.export_format == ExportFormat.JSON:
+        content, headers = await asyncio.to_thread(encode_json, content, encoding, job.compression_level)
+
+    return Response(content=content, media_type=headers["Content-Type"], headers=headers)
+
+
+def get_valid_simulation_job(job_id: str) -> SimulationJob:
+    job = get_simulation_job(job_id)
+    if job is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Simulation job not found")
+
+    return job
+
+
+def to_simulation_job_response(job: SimulationJob) -> SimulationJobResponse:
+    return SimulationJobResponse(
+        job_id=job.id,
+        status=job.status.value,
+        submitted_at=job.submitted_at,
+        completed_at=job.completed_at,
+        error=job.error,
+    )
+
+
 @router.get("/{simulation_id}")
 async def get_simulation_run(simulation_id: str, db: Session = Depends(get_db)):
     """Get a simulation run by its ID"""
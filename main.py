@@ -1,3 +1,5 @@
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
@@ -7,6 +9,28 @@ from app.routers.tube_router import router as tube_router
 from app.routers.coil_router import router as coil_router
 from app.routers.capsule_router import router as capsule_router
 from app.routers.analytics_router import router as analytics_router
+from app.routers.network_router import router as network_router
+from app.domain.services.simulation_job_service import shutdown_simulation_job_pool
+from app.data_access.jsonl_entity_store import get_entity_store, start_entity_compactor, stop_entity_compactor
+from app.domain.entities.tube import Tube
+from app.domain.entities.capsule import Capsule
+from app.domain.entities.coil import Coil
+from app.domain.entities.system import System
+from app.domain.entities.network import Network
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Build the id indexes of the entity files once at startup instead of on the first request
+    for entity_file_path in (Tube.DATABASE_FILE_PATH, Capsule.DATABASE_FILE_PATH, Coil.DATABASE_FILE_PATH, System.DATABASE_FILE_PATH, Network.DATABASE_FILE_PATH):
+        get_entity_store(entity_file_path).refresh()
+
+    start_entity_compactor()
+
+    yield
+    stop_entity_compactor()
+    shutdown_simulation_job_pool()
+
 
 app = FastAPI(
     title="Tube Capsule Model API",
@@ -14,6 +38,7 @@ app = FastAPI(
     version="1.0.0",
     docs_url="/docs",  # Swagger UI endpoint
     redoc_url="/redoc",  # ReDoc endpoint
+    lifespan=lifespan,
 )
 
 # Add CORS middleware
@@ -29,6 +54,7 @@ app.include_router(tube_router)
 app.include_router(coil_router)
 app.include_router(capsule_router)
 app.include_router(system_router)
+app.include_router(network_router)
 app.include_router(simulation_router)
 app.include_router(analytics_router)
 
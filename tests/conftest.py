@@ -0,0 +1,4 @@
+import os
+
+# The engine, store and sensitivity tests never open a session; an in-memory database keeps imports free of PostgreSQL
+os.environ.setdefault("DATABASE_URL", "sqlite://")
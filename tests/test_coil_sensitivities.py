@@ -0,0 +1,64 @@
+import pytest
+
+from app.domain.entities.capsule import Capsule
+from app.domain.entities.coil import Coil
+from app.domain.entities.system_coil import SystemCoil
+from app.domain.entities.tube import Tube
+from app.domain.services.simulation_service import get_coil_sensitivities
+from app.domain.utils.vectorized_segments_utils import run_vectorized_segments
+
+MASS = 7.0
+TUBE = Tube(tube_id=1, length=100.0, save_to_file=False)
+# Coil id -> (position, length, force applied); the middle coil brakes
+COILS = {1: (10.0, 4.0, 50.0), 2: (40.0, 6.0, -20.0), 3: (70.0, 3.0, 80.0)}
+
+OUTPUTS = ("total_travel_time_s", "final_velocity_mps", "total_energy_consumed_j")
+# Length steps change the acceleration length by whole micrometres, which the engine rounds to
+PARAMETER_STEPS = {"force_applied": 1e-3, "length": 2e-4, "position": 1e-4}
+
+
+def run(coils: dict[int, tuple[float, float, float]]):
+    system_coils = [
+        SystemCoil(coil_id=coil_id, position=position, coil=Coil(coil_id=coil_id, length=length, force_applied=force_applied, save_to_file=False))
+        for coil_id, (position, length, force_applied) in coils.items()
+    ]
+
+    return run_vectorized_segments(None, system_coils, Capsule(capsule_id=1, mass=MASS, initial_velocity=3.0, save_to_file=False), TUBE)
+
+
+def get_outputs(coils: dict[int, tuple[float, float, float]]) -> dict[str, float]:
+    segment_table = run(coils)
+
+    return {
+        "total_travel_time_s": segment_table.total_travel_time,
+        "final_velocity_mps": segment_table.final_velocity,
+        "total_energy_consumed_j": segment_table.total_energy_consumed,
+    }
+
+
+def shift_coil(coil_id: int, parameter: str, step: float) -> dict[int, tuple[float, float, float]]:
+    coils = dict(COILS)
+    values = list(coils[coil_id])
+    values[("position", "length", "force_applied").index(parameter)] += step
+    coils[coil_id] = tuple(values)
+
+    return coils
+
+
+def test_sensitivities_match_central_finite_differences():
+    sensitivities = get_coil_sensitivities(run(COILS), MASS)
+
+    assert [sensitivity.coil_id for sensitivity in sensitivities] == list(COILS)
+
+    for sensitivity in sensitivities:
+        for parameter, step in PARAMETER_STEPS.items():
+            above = get_outputs(shift_coil(sensitivity.coil_id, parameter, step))
+            below = get_outputs(shift_coil(sensitivity.coil_id, parameter, -step))
+
+            for output in OUTPUTS:
+                finite_difference = (above[output] - below[output]) / (2 * step)
+                assert getattr(getattr(sensitivity, parameter), output) == pytest.approx(finite_difference, rel=1e-5, abs=1e-8), (sensitivity.coil_id, parameter, output)
+
+
+def test_no_coils_have_no_sensitivities():
+    assert get_coil_sensitivities(run({}), MASS) == []
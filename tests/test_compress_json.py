@@ -0,0 +1,56 @@
+import gzip
+import zlib
+
+import pytest
+
+from app.domain.schemas.simulation_schemas import ContentEncoding
+from app.domain.utils.compress_json import EncodingNotAcceptableError, encode_json, negotiate_content_encoding
+
+
+@pytest.mark.parametrize("accept_encoding, encoding", [
+    (None, None),
+    ("", ContentEncoding.IDENTITY),
+    ("gzip, deflate", ContentEncoding.GZIP),
+    ("deflate, gzip", ContentEncoding.GZIP),
+    ("gzip;q=0.5, deflate", ContentEncoding.DEFLATE),
+    ("gzip;q=0.5, identity;q=0.8", ContentEncoding.IDENTITY),
+    ("br", ContentEncoding.IDENTITY),
+    ("GZIP;Q=1", ContentEncoding.GZIP),
+    ("gzip;q=abc, deflate;q=0.1", ContentEncoding.DEFLATE),
+])
+def test_highest_quality_supported_encoding_wins(accept_encoding, encoding):
+    assert negotiate_content_encoding(accept_encoding) == encoding
+
+
+@pytest.mark.parametrize("accept_encoding, encoding", [
+    ("*", ContentEncoding.GZIP),
+    ("*;q=0.5, deflate", ContentEncoding.DEFLATE),
+    ("gzip;q=0, *", ContentEncoding.DEFLATE),
+    ("*;q=0, identity", ContentEncoding.IDENTITY),
+])
+def test_wildcard_covers_the_encodings_not_listed(accept_encoding, encoding):
+    assert negotiate_content_encoding(accept_encoding) == encoding
+
+
+def test_identity_can_be_ruled_out():
+    assert negotiate_content_encoding("br, identity;q=0, deflate;q=0.5") == ContentEncoding.DEFLATE
+
+
+@pytest.mark.parametrize("accept_encoding", ["br, identity;q=0", "gzip;q=0, deflate;q=0, identity;q=0", "*;q=0"])
+def test_no_acceptable_encoding_is_rejected(accept_encoding):
+    with pytest.raises(EncodingNotAcceptableError):
+        negotiate_content_encoding(accept_encoding)
+
+
+@pytest.mark.parametrize("encoding, decode", [
+    (None, gzip.decompress),
+    (ContentEncoding.GZIP, gzip.decompress),
+    (ContentEncoding.DEFLATE, zlib.decompress),
+    (ContentEncoding.IDENTITY, lambda content: content),
+])
+def test_encoded_json_decodes_to_the_original(encoding, decode):
+    json_content = b'{"total_travel_time_s":12.5,"coil_engagement_logs":[]}'
+    content, headers = encode_json(json_content, encoding, compression_level=9)
+
+    assert decode(content) == json_content
+    assert headers.get("Content-Encoding") == (encoding.value if encoding not in (None, ContentEncoding.IDENTITY) else None)
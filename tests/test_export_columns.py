@@ -0,0 +1,76 @@
+import io
+import json
+
+import numpy as np
+import pytest
+
+from app.domain.schemas.simulation_schemas import ExportFormat
+from app.domain.utils.export_columns import export_columns, get_accepted_media_types, is_pyarrow_available, negotiate_export_format
+
+
+def test_accepted_media_types_by_quality():
+    accept = "application/json;q=0.5, application/x-npz, text/html;q=0, Application/Vnd.Apache.Parquet;q=0.8"
+
+    assert get_accepted_media_types(accept) == ["application/x-npz", "application/vnd.apache.parquet", "application/json"]
+    assert get_accepted_media_types("application/x-npz;q=abc") == []
+    assert get_accepted_media_types(None) == []
+
+
+def test_explicit_format_wins_over_accept():
+    assert negotiate_export_format(ExportFormat.NPZ, "application/json") == ExportFormat.NPZ
+    assert negotiate_export_format(ExportFormat.JSON, "application/x-npz") == ExportFormat.JSON
+
+
+def test_accept_negotiation():
+    assert negotiate_export_format(None, None) == ExportFormat.JSON
+    assert negotiate_export_format(None, "text/csv") == ExportFormat.JSON
+    assert negotiate_export_format(None, "application/json;q=0.9, application/x-npz") == ExportFormat.NPZ
+    assert negotiate_export_format(None, "application/x-npz;q=0.9, */*") == ExportFormat.JSON
+
+
+@pytest.mark.skipif(is_pyarrow_available(), reason="pyarrow is installed")
+def test_pyarrow_formats_without_pyarrow():
+    with pytest.raises(ValueError):
+        negotiate_export_format(ExportFormat.PARQUET, None)
+
+    # Skipped during negotiation rather than rejected
+    assert negotiate_export_format(None, "application/vnd.apache.parquet, application/x-npz;q=0.5") == ExportFormat.NPZ
+
+
+def get_engagement_columns() -> dict[str, list | np.ndarray]:
+    return {
+        "timestamp_s": np.array([0.0, 1.5, 2.25]),
+        "event": ["enter", "exit", "enter"],
+        "coil_id": [1, None, 3],
+    }
+
+
+def test_npz_round_trip():
+    content, headers = export_columns(get_engagement_columns(), ExportFormat.NPZ, {"simulation_id": "abc"})
+    assert headers["Content-Type"] == "application/x-npz"
+
+    with np.load(io.BytesIO(content)) as arrays:
+        np.testing.assert_array_equal(arrays["timestamp_s"], [0.0, 1.5, 2.25])
+        assert arrays["event"].tolist() == ["enter", "exit", "enter"]
+        # Missing coil IDs become NaN in a float column
+        assert arrays["coil_id"].dtype == np.float64
+        np.testing.assert_array_equal(arrays["coil_id"], [1.0, np.nan, 3.0])
+        assert json.loads(str(arrays["metadata"])) == {"simulation_id": "abc"}
+
+
+@pytest.mark.skipif(not is_pyarrow_available(), reason="pyarrow is not installed")
+@pytest.mark.parametrize("export_format", [ExportFormat.ARROW, ExportFormat.PARQUET])
+def test_arrow_round_trip(export_format):
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    content, headers = export_columns(get_engagement_columns(), export_format, {"simulation_id": "abc"})
+
+    if export_format == ExportFormat.PARQUET:
+        table = pq.read_table(pa.BufferReader(content))
+    else:
+        table = pa.ipc.open_stream(content).read_all()
+
+    assert table.column("coil_id").to_pylist() == [1, None, 3]
+    assert table.column("timestamp_s").to_pylist() == [0.0, 1.5, 2.25]
+    assert table.schema.metadata[b"simulation_id"] == b"abc"
@@ -0,0 +1,88 @@
+import json
+import threading
+import time
+
+from app.data_access.jsonl_entity_store import JsonlEntityStore, TOMBSTONE_KEY
+
+
+def read_lines(path) -> list[bytes]:
+    return [line for line in path.read_bytes().splitlines() if line.strip()]
+
+
+def test_compaction_drops_tombstoned_and_superseded_records(tmp_path):
+    path = tmp_path / "entity.jsonl"
+    store = JsonlEntityStore(path)
+
+    for entity_id in (1, 2, 3, 4):
+        store.append({"id": entity_id, "length": float(entity_id)})
+    store.update(2, {"length": 20.0})
+    store.update(2, {"length": 200.0})
+    store.delete(3)
+    live_records = store.all()
+
+    assert len(read_lines(path)) == 7
+    assert store.dead_line_count == 4
+
+    assert store.compact() == 4
+
+    assert [json.loads(line) for line in read_lines(path)] == live_records
+    assert live_records == [{"id": 1, "length": 1.0}, {"id": 2, "length": 200.0}, {"id": 4, "length": 4.0}]
+    assert store.dead_line_count == 0
+    assert store.get(3) is None
+
+    # A store opening the compacted file sees the same live set
+    assert JsonlEntityStore(path).all() == live_records
+
+
+def test_compaction_keeps_malformed_lines(tmp_path):
+    path = tmp_path / "entity.jsonl"
+    path.write_bytes(b'{"id": 1, "length": 1.0}\nnot json\n{"id": 1, "length": 2.0}\n')
+    store = JsonlEntityStore(path)
+
+    assert store.compact() == 1
+
+    assert read_lines(path) == [b'{"id": 1, "length": 2.0}', b"not json"]
+
+
+def test_store_picks_up_compaction_by_another_store(tmp_path):
+    path = tmp_path / "entity.jsonl"
+    writer, reader = JsonlEntityStore(path), JsonlEntityStore(path)
+
+    writer.append({"id": 1, "length": 1.0})
+    writer.append({"id": 2, "length": 2.0})
+    assert len(reader.all()) == 2
+
+    writer.delete(1)
+    writer.compact()
+    writer.append({"id": 3, "length": 3.0})
+
+    assert reader.all() == [{"id": 2, "length": 2.0}, {"id": 3, "length": 3.0}]
+    assert reader.get(1) is None
+    assert not any(json.loads(line).get(TOMBSTONE_KEY) for line in read_lines(path))
+
+
+def test_update_does_not_revive_a_concurrently_deleted_record(tmp_path):
+    path = tmp_path / "entity.jsonl"
+    updater, deleter = JsonlEntityStore(path), JsonlEntityStore(path)
+    updater.append({"id": 1, "length": 1.0})
+
+    # Pause the update right after it has read the record, and let the other store delete it meanwhile
+    record_read = threading.Event()
+    refresh = updater.refresh
+
+    def refresh_then_pause():
+        refresh()
+        if not record_read.is_set():
+            record_read.set()
+            time.sleep(0.2)
+
+    updater.refresh = refresh_then_pause
+    deletion = threading.Thread(target=lambda: record_read.wait() and deleter.delete(1))
+    deletion.start()
+
+    updater.update(1, {"length": 2.0})
+    deletion.join()
+
+    assert updater.get(1) is None
+    assert deleter.get(1) is None
+    assert updater.update(1, {"length": 3.0}) is None
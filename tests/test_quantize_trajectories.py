@@ -0,0 +1,51 @@
+import math
+
+import numpy as np
+import pytest
+
+from app.domain.utils.quantize_trajectories import DEFAULT_TRAJECTORY_QUANTA, dequantize_trajectories, get_trajectory_quanta, quantize_trajectories
+
+COLUMNS = {
+    "t_s": np.array([0.0, 0.25, 3.3087216, 1e4]),
+    "position_m": np.array([0.0, 1.5, 11.0, 100.0]),
+    "velocity_mps": np.array([3.0, 3.0, 5.123456789, 5.123456789]),
+    "acceleration_mps2": np.array([0.0, 7.142857, 0.0, 0.0]),
+    "force_applied_n": np.array([0.0, 50.0, -20.0, 0.0]),
+    "total_energy_consumed_j": np.array([0.0, 100.0, 40.0, 40.0]),
+}
+
+
+@pytest.mark.parametrize("trajectory_quanta", [None, {"t_s": 1e-3, "position_m": 0.01, "total_energy_consumed_j": 0.5}])
+def test_dequantized_values_are_within_half_a_quantum(trajectory_quanta):
+    quanta = get_trajectory_quanta(trajectory_quanta)
+    decoded = dequantize_trajectories(quantize_trajectories(COLUMNS, trajectory_quanta))
+
+    assert decoded.keys() == COLUMNS.keys()
+    for channel, values in COLUMNS.items():
+        # Delta encoding is undone exactly, so no channel drifts along the run
+        np.testing.assert_array_less(np.abs(decoded[channel] - values), quanta[channel] / 2 * (1 + 1e-9), err_msg=channel)
+
+
+def test_encoded_integers_are_deltas_of_monotonic_channels():
+    encoded = quantize_trajectories(COLUMNS)
+
+    assert encoded["delta_encoded"] == ["t_s", "position_m", "total_energy_consumed_j"]
+    assert encoded["position_m"] == [0, 15_000, 95_000, 890_000]
+    assert encoded["velocity_mps"] == [30_000, 30_000, 51_235, 51_235]
+    assert encoded["quanta"] == DEFAULT_TRAJECTORY_QUANTA
+
+
+@pytest.mark.parametrize("quantum", [0.0, -1e-6, math.inf, math.nan])
+def test_invalid_quanta_are_rejected(quantum):
+    with pytest.raises(ValueError, match="positive and finite"):
+        get_trajectory_quanta({"t_s": quantum})
+
+
+def test_quanta_too_small_for_the_values_are_rejected():
+    with pytest.raises(ValueError, match="too small"):
+        quantize_trajectories(COLUMNS, {"t_s": 1e-16})
+
+
+def test_unknown_channels_are_rejected():
+    with pytest.raises(ValueError, match="Unknown trajectory channel"):
+        get_trajectory_quanta({"jerk": 1e-3})
@@ -0,0 +1,56 @@
+import numpy as np
+
+from app.domain.entities.capsule import Capsule
+from app.domain.entities.segment_index import SegmentIndex
+from app.domain.entities.tube import Tube
+from app.domain.utils.vectorized_segments_utils import run_vectorized_segments
+from tests.test_vectorized_engine import get_system_coils
+
+
+def get_segment_index(coil_count: int) -> SegmentIndex:
+    capsule = Capsule(capsule_id=1, mass=12.0, initial_velocity=5.0, save_to_file=False)
+    tube = Tube(tube_id=1, length=10_000.0, save_to_file=False)
+
+    return SegmentIndex(run_vectorized_segments(None, get_system_coils(coil_count), capsule, tube))
+
+
+def test_time_position_time_round_trip():
+    segment_index = get_segment_index(40)
+    times = np.linspace(0, segment_index.end_time, 5_001)
+
+    state = segment_index.get_state_at_times(times)
+    round_trip = segment_index.get_state_at_positions(state["position_m"])
+
+    np.testing.assert_allclose(round_trip["t_s"], times, rtol=1e-9, atol=1e-9)
+    for channel in ("velocity_mps", "total_energy_consumed_j"):
+        np.testing.assert_allclose(round_trip[channel], state[channel], rtol=1e-9, atol=1e-9, err_msg=channel)
+
+
+def test_zero_duration_end_marker():
+    segment_index = get_segment_index(7)
+    segment_table = segment_index.segment_table
+
+    # Runs with coils end on a zero-duration row at the tube's end, which must not count as a segment of tube
+    assert segment_table.traverse_time[-1] == 0
+    assert segment_index.end_position == 10_000.0
+
+    at_end = segment_index.get_state_at_positions(np.array([segment_index.end_position]))
+    np.testing.assert_allclose(at_end["t_s"], [segment_index.end_time])
+    np.testing.assert_allclose(at_end["velocity_mps"], [segment_table.final_velocity])
+
+    at_end_time = segment_index.get_state_at_times(np.array([segment_index.end_time]))
+    np.testing.assert_allclose(at_end_time["position_m"], [segment_index.end_position])
+
+
+def test_nan_outside_run():
+    segment_index = get_segment_index(7)
+
+    state = segment_index.get_state_at_times(np.array([-1.0, 0.0, segment_index.end_time + 1]))
+    for values in state.values():
+        assert np.isnan(values[[0, 2]]).all()
+        assert not np.isnan(values[1])
+
+    state = segment_index.get_state_at_positions(np.array([-1.0, 0.0, segment_index.end_position + 1]))
+    for values in state.values():
+        assert np.isnan(values[[0, 2]]).all()
+        assert not np.isnan(values[1])
@@ -0,0 +1,86 @@
+import numpy as np
+import pytest
+
+from app.domain.entities.capsule import Capsule
+from app.domain.entities.coil import Coil
+from app.domain.entities.segment_table import SegmentTable
+from app.domain.entities.simulation_checkpoint import SimulationCheckpoint
+from app.domain.entities.simulation_context import SimulationContext
+from app.domain.entities.system_coil import SystemCoil
+from app.domain.entities.tube import Tube
+from app.domain.services.simulation_cache_service import EVENT_ID_FIELDS
+from app.domain.utils.vectorized_segments_utils import get_coil_arrays, resume_vectorized_segments, run_vectorized_segments
+
+CAPSULE = Capsule(capsule_id=1, mass=12.0, initial_velocity=5.0, save_to_file=False)
+
+
+def get_system_coil(coil_id: int, position: float, length: float = 2.0, force_applied: float = 100.0) -> SystemCoil:
+    return SystemCoil(coil_id=coil_id, position=position, coil=Coil(coil_id=coil_id, length=length, force_applied=force_applied, save_to_file=False))
+
+
+def run(system_coils: list[SystemCoil], tube: Tube, checkpoint: SimulationCheckpoint | None = None) -> tuple[SegmentTable, list[dict]]:
+    context = SimulationContext(simulation_id="run", system_id=1, db=None)
+    if checkpoint is None:
+        segment_table = run_vectorized_segments(context, system_coils, CAPSULE, tube)
+    else:
+        segment_table = resume_vectorized_segments(context, system_coils, CAPSULE, tube, checkpoint)
+
+    return segment_table, context.engagement_events
+
+
+def to_checkpoint(system_coils: list[SystemCoil], tube: Tube, segment_table: SegmentTable, engagement_events: list[dict]) -> SimulationCheckpoint:
+    coil_ids, positions, lengths, forces_applied = get_coil_arrays(system_coils)
+
+    return SimulationCheckpoint(
+        mass=CAPSULE.mass,
+        initial_velocity=CAPSULE.initial_velocity,
+        tube_length=tube.length,
+        coil_ids=coil_ids,
+        positions=positions,
+        lengths=lengths,
+        forces_applied=forces_applied,
+        segment_table=segment_table,
+        engagement_events=[{field: value for field, value in event.items() if field not in EVENT_ID_FIELDS} for event in engagement_events],
+    )
+
+
+BASE_COILS = [get_system_coil(coil_id=i + 1, position=10.0 * (i + 1)) for i in range(10)]
+BASE_TUBE = Tube(tube_id=1, length=200.0, save_to_file=False)
+
+CHANGES = {
+    "unchanged": (BASE_COILS, BASE_TUBE, 10),
+    "first coil force": ([get_system_coil(1, 10.0, force_applied=50.0)] + BASE_COILS[1:], BASE_TUBE, 0),
+    "middle coil force": (BASE_COILS[:4] + [get_system_coil(5, 50.0, force_applied=-30.0)] + BASE_COILS[5:], BASE_TUBE, 4),
+    "middle coil length": (BASE_COILS[:6] + [get_system_coil(7, 70.0, length=3.5)] + BASE_COILS[7:], BASE_TUBE, 6),
+    "last coil moved": (BASE_COILS[:9] + [get_system_coil(10, 120.0)], BASE_TUBE, 9),
+    "coil added": (BASE_COILS + [get_system_coil(11, 150.0)], BASE_TUBE, 10),
+    "coil removed": (BASE_COILS[:9], BASE_TUBE, 8),
+    "tube length": (BASE_COILS, Tube(tube_id=1, length=300.0, save_to_file=False), 9),
+}
+
+
+@pytest.mark.parametrize("change", CHANGES)
+def test_resumed_run_equals_full_run(change):
+    system_coils, tube, resume_index = CHANGES[change]
+    checkpoint = to_checkpoint(BASE_COILS, BASE_TUBE, *run(BASE_COILS, BASE_TUBE))
+
+    assert checkpoint.get_resume_coil_index(*get_coil_arrays(system_coils), CAPSULE.mass, CAPSULE.initial_velocity, tube.length) == resume_index
+
+    resumed_table, resumed_events = run(system_coils, tube, checkpoint)
+    full_table, full_events = run(system_coils, tube)
+
+    assert len(resumed_table) == len(full_table)
+    for name in SegmentTable.COLUMNS:
+        np.testing.assert_allclose(getattr(resumed_table, name), getattr(full_table, name), rtol=1e-12, atol=1e-12, err_msg=name)
+
+    assert len(resumed_events) == len(full_events)
+    for resumed_event, full_event in zip(resumed_events, full_events):
+        assert resumed_event.keys() == full_event.keys()
+        for field, value in full_event.items():
+            assert resumed_event[field] == (pytest.approx(value, rel=1e-12, abs=1e-12) if isinstance(value, float) else value), field
+
+
+def test_changed_capsule_resumes_from_the_start():
+    checkpoint = to_checkpoint(BASE_COILS, BASE_TUBE, *run(BASE_COILS, BASE_TUBE))
+
+    assert checkpoint.get_resume_coil_index(*get_coil_arrays(BASE_COILS), CAPSULE.mass + 1.0, CAPSULE.initial_velocity, BASE_TUBE.length) == 0
@@ -0,0 +1,80 @@
+import numpy as np
+import pytest
+
+from app.domain.utils.traffic_scheduler_utils import get_traffic_event_arrays, run_traffic_events
+from app.domain.utils.vectorized_segments_utils import compute_batch_coil_pass_arrays
+
+TUBE_LENGTH = 500.0
+POSITIONS = np.array([50.0, 200.0, 350.0])
+LENGTHS = np.array([10.0, 20.0, 10.0])
+FORCES_APPLIED = np.array([200.0, -150.0, 300.0])
+
+
+def run_pair(launch_times: list[float], masses: list[float], initial_velocities: list[float]):
+    launch_times, masses, initial_velocities = np.array(launch_times), np.array(masses), np.array(initial_velocities)
+    batch = compute_batch_coil_pass_arrays(POSITIONS, LENGTHS, FORCES_APPLIED, masses, initial_velocities, TUBE_LENGTH)
+    arrays = get_traffic_event_arrays(batch, launch_times, initial_velocities)
+
+    return arrays, run_traffic_events(**arrays)
+
+
+def get_positions(arrays: dict[str, np.ndarray], capsule: int, times: np.ndarray) -> np.ndarray:
+    """Brute force: position of the capsule at each time from its segment starts, NaN outside the tube"""
+    event_times = arrays["event_times"][capsule]
+    starts = np.flatnonzero(arrays["event_segments"] >= 0)
+    start_times = event_times[starts]
+    segments = arrays["event_segments"][starts]
+
+    index = np.clip(np.searchsorted(start_times, times, side="right") - 1, 0, None)
+    elapsed = times - start_times[index]
+    positions = arrays["segment_positions"][segments[index]] + arrays["entry_velocities"][capsule, segments[index]] * elapsed + arrays["accelerations"][capsule, segments[index]] * elapsed ** 2 / 2
+
+    return np.where((times >= event_times[0]) & (times <= event_times[-1]), positions, np.nan)
+
+
+def get_sampled_gaps(arrays: dict[str, np.ndarray], sample_count: int = 400_001) -> tuple[np.ndarray, np.ndarray]:
+    event_times = arrays["event_times"]
+    times = np.linspace(event_times[1, 0], min(event_times[0, -1], event_times[1, -1]), sample_count)
+
+    return times, get_positions(arrays, 0, times) - get_positions(arrays, 1, times)
+
+
+def test_closest_approach_matches_sampling_when_the_trailing_capsule_never_catches_up():
+    # The braking coil slows the light leader far more than the heavy capsule behind it, which closes in without reaching it
+    arrays, events = run_pair([0.0, 8.0], [10.0, 40.0], [12.0, 12.5])
+    times, gaps = get_sampled_gaps(arrays)
+
+    assert np.all(gaps > 0)
+    # The closest approach is inside the run, not at either end
+    assert 0 < np.argmin(gaps) < len(gaps) - 1
+    assert np.isnan(events["catch_up_times"][1])
+    assert events["minimum_separations"][1] == pytest.approx(gaps.min(), abs=1e-6)
+    assert events["minimum_separation_times"][1] == pytest.approx(times[np.argmin(gaps)], abs=1e-3)
+    assert events["minimum_separation_positions"][1] == pytest.approx(get_positions(arrays, 1, times[[np.argmin(gaps)]])[0], abs=1e-2)
+
+
+def test_pair_is_followed_until_the_trailing_capsule_catches_up():
+    # The trailing capsule is lighter and faster, and passes the leader inside the tube
+    arrays, events = run_pair([0.0, 2.0], [40.0, 10.0], [10.0, 16.0])
+    times, gaps = get_sampled_gaps(arrays)
+
+    first_crossing = np.argmax(gaps < 0)
+    assert first_crossing > 0
+
+    catch_up_time = events["catch_up_times"][1]
+    assert times[first_crossing - 1] <= catch_up_time <= times[first_crossing]
+    assert events["catch_up_positions"][1] == pytest.approx(get_positions(arrays, 0, np.array([catch_up_time]))[0], abs=1e-6)
+    assert events["catch_up_positions"][1] == pytest.approx(get_positions(arrays, 1, np.array([catch_up_time]))[0], abs=1e-6)
+
+    # Nothing after the catch-up counts: the gap never goes negative
+    assert events["minimum_separations"][1] == 0.0
+    assert events["minimum_separation_times"][1] == catch_up_time
+
+
+def test_capsules_never_in_the_tube_together_have_no_separation():
+    arrays, events = run_pair([0.0, 1000.0], [10.0, 10.0], [12.0, 12.0])
+
+    assert np.isnan(events["minimum_separations"][1])
+    assert np.isnan(events["catch_up_times"][1])
+    # Launch, three events per coil and arrival for each capsule
+    assert events["event_count"] == 2 * (3 * len(POSITIONS) + 2)
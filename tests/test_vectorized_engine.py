@@ -0,0 +1,39 @@
+import numpy as np
+import pytest
+
+from app.domain.entities.capsule import Capsule
+from app.domain.entities.coil import Coil
+from app.domain.entities.segment_table import SegmentTable
+from app.domain.entities.system_coil import SystemCoil
+from app.domain.entities.tube import Tube
+from app.domain.services.segments_service import run_loop_segments
+from app.domain.utils.vectorized_segments_utils import run_vectorized_segments
+
+
+def get_system_coils(coil_count: int, seed: int = 0) -> list[SystemCoil]:
+    """Coils of random lengths and forces (some braking), laid out in order along a 10 km tube"""
+    rng = np.random.default_rng(seed)
+    lengths = rng.uniform(0.5, 5.0, coil_count)
+    gaps = rng.uniform(1.0, 20.0, coil_count)
+    positions = np.cumsum(gaps) + np.concatenate(([0.0], np.cumsum(lengths)[:-1]))
+    forces_applied = rng.uniform(-20.0, 200.0, coil_count)
+
+    return [
+        SystemCoil(coil_id=i + 1, position=round(float(position), 6), coil=Coil(coil_id=i + 1, length=round(float(length), 6), force_applied=float(force_applied), save_to_file=False))
+        for i, (position, length, force_applied) in enumerate(zip(positions, lengths, forces_applied))
+    ]
+
+
+@pytest.mark.parametrize("coil_count", [0, 1, 7, 300])
+def test_vectorized_engine_matches_loop_engine(coil_count):
+    system_coils = get_system_coils(coil_count)
+    capsule = Capsule(capsule_id=1, mass=12.0, initial_velocity=5.0, save_to_file=False)
+    tube = Tube(tube_id=1, length=10_000.0, save_to_file=False)
+
+    loop_table = SegmentTable.from_segments(run_loop_segments(None, system_coils, capsule, tube), {system_coil.coil_id: system_coil.coil for system_coil in system_coils})
+    vectorized_table = run_vectorized_segments(None, system_coils, capsule, tube)
+
+    assert len(vectorized_table) == len(loop_table)
+    # The loop engine's (v_f - v_i) / a loses digits on coils with a small force, the vectorized 2·L / (v_i + v_f) does not
+    for name in SegmentTable.COLUMNS:
+        np.testing.assert_allclose(getattr(vectorized_table, name), getattr(loop_table, name), rtol=1e-6, atol=1e-9, err_msg=name)